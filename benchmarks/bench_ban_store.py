@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Ban store warm start benchmark
+
+Writes a room's ban log of the given size through BanStore, then measures how long
+a fresh store takes to load it and answer lookups: first with unbans mixed in, as
+the log looks between compactions, then after compacting it.
+
+    python benchmarks/bench_ban_store.py [ban_count]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from pump_self_melon.core import BanStore
+
+
+async def write_log(directory, count):
+    store = BanStore(directory, compact_min=count * 10)
+    for index in range(count):
+        store.record_ban("room", f"{index:044d}")
+        if index % 10 == 0:
+            store.record_unban("room", f"{index:044d}")
+    started = time.perf_counter()
+    await store.close()
+    return time.perf_counter() - started
+
+
+async def compact(directory):
+    # Any write to the room now rewrites its log; address 0 is already unbanned
+    store = BanStore(directory, compact_min=0, compact_ratio=1.0)
+    store.record_unban("room", f"{0:044d}")
+    await store.close()
+
+
+def load(label, directory, count):
+    store = BanStore(directory)
+    store.banned("room")
+    stats = store.get_stats()
+    print(f"{label:<18}{stats['log_lines']:>8} lines, {stats['bans']} live bans in {stats['load_time'] * 1000:.1f}ms")
+
+    addresses = [f"{index:044d}" for index in range(count)]
+    started = time.perf_counter()
+    hits = sum(store.is_banned("room", address) for address in addresses)
+    elapsed = time.perf_counter() - started
+    print(f"{'':<18}lookups: {elapsed / count * 1e9:.0f} ns each ({hits} banned)")
+
+
+def main(count):
+    with tempfile.TemporaryDirectory() as directory:
+        write_time = asyncio.run(write_log(directory, count))
+        size = os.path.getsize(BanStore(directory).path_for("room"))
+        print(f"wrote {count} bans ({size / 1e6:.1f} MB) in {write_time * 1000:.1f}ms")
+
+        load("with unbans", directory, count)
+        asyncio.run(compact(directory))
+        load("compacted", directory, count)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 300_000)
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Inbound frame throughput benchmark
+
+Compares the legacy multi-pass handling (auth check, substring scan, then a separate
+parse) with the client's single-pass decoder and dispatch table, and measures a
+client with no ``message`` listeners, whose frames are skipped before decoding.
+
+    python benchmarks/bench_frames.py [frame_count]
+"""
+import asyncio
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from pump_self_melon import Client, Message, User, Room
+
+
+def make_frames(count):
+    frames = []
+    for index in range(count):
+        if index % 10 == 9:
+            frames.append('42["userJoined",{"roomId":"room_1","username":"someone"}]')
+        else:
+            payload = {
+                "id": f"msg_{index}",
+                "roomId": "room_1",
+                "username": f"user_{index % 500}",
+                "userAddress": f"address_{index % 500}",
+                "message": "gm gm, wagmi " * 3,
+                "timestamp": 1700000000000 + index,
+                "messageType": "regular",
+            }
+            frames.append(f'42["newMessage",{json.dumps(payload)}]')
+    return frames
+
+
+def legacy_check_authentication(raw_message):
+    if len(raw_message) > 2 and raw_message[:3] == "430":
+        json_part = raw_message[3:]
+        if json_part.startswith('['):
+            parsed = json.loads(json_part)
+            if isinstance(parsed, list) and parsed and isinstance(parsed[0], dict):
+                return bool(parsed[0].get('authenticated'))
+    return False
+
+
+def legacy_parse_message(raw_message):
+    try:
+        if len(raw_message) > 2 and raw_message[:2] == "42":
+            json_part = raw_message[2:]
+            if json_part.startswith('['):
+                parsed = json.loads(json_part)
+                if (isinstance(parsed, list) and len(parsed) >= 2 and
+                        parsed[0] == "newMessage" and isinstance(parsed[1], dict)):
+                    msg_data = parsed[1]
+                    user = User(msg_data.get('username', 'unknown'), msg_data.get('userAddress'))
+                    room = Room(msg_data.get('roomId', ''))
+                    timestamp = None
+                    if msg_data.get('timestamp'):
+                        timestamp = datetime.fromtimestamp(msg_data['timestamp'] / 1000)
+                    return Message(msg_data.get('id', ''), msg_data.get('message', ''), user, room,
+                                   timestamp, msg_data.get('messageType', 'regular'), msg_data)
+    except Exception:
+        pass
+    return None
+
+
+async def legacy_handle(raw_message, handlers):
+    if legacy_check_authentication(raw_message):
+        return
+    if "Invalid message" in raw_message and "Failed to subscribe" in raw_message:
+        pass
+    message = legacy_parse_message(raw_message)
+    if message:
+        await asyncio.gather(*(handler(message) for handler in handlers), return_exceptions=True)
+
+
+async def bench(frames):
+    received = 0
+
+    async def on_message(message):
+        nonlocal received
+        received += 1
+
+    started = time.perf_counter()
+    for raw_message in frames:
+        await legacy_handle(raw_message, [on_message])
+    legacy_elapsed = time.perf_counter() - started
+
+    client = Client("bench_token")
+    client.listen('message')(on_message)
+    started = time.perf_counter()
+    for raw_message in frames:
+        await client._handle_message(raw_message)
+    client_elapsed = time.perf_counter() - started
+
+    idle_client = Client("bench_token")
+    idle_client.listen('ready')(on_message)
+    started = time.perf_counter()
+    for raw_message in frames:
+        await idle_client._handle_message(raw_message)
+    idle_elapsed = time.perf_counter() - started
+
+    count = len(frames)
+    print(f"frames:        {count}")
+    print(f"legacy:        {count / legacy_elapsed:>12,.0f} frames/sec")
+    print(f"single-pass:   {count / client_elapsed:>12,.0f} frames/sec")
+    print(f"unsubscribed:  {count / idle_elapsed:>12,.0f} frames/sec")
+    print(f"speedup:       {legacy_elapsed / client_elapsed:.2f}x")
+
+
+if __name__ == "__main__":
+    frame_count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    asyncio.run(bench(make_frames(frame_count)))
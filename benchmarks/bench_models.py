@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Retained memory per message benchmark
+
+Builds and keeps N messages from realistic newMessage payloads and reports the
+bytes each retained message costs, comparing the legacy per-instance __dict__
+models (fresh User/Room per frame, full raw_data) with the slotted, interned
+models under each raw_data mode.
+
+    python benchmarks/bench_models.py [message_count]
+"""
+import gc
+import json
+import os
+import sys
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from pump_self_melon import Client
+
+
+class LegacyUser:
+    def __init__(self, username, address=None):
+        self.username = username
+        self.address = address
+
+
+class LegacyRoom:
+    def __init__(self, room_id):
+        self.id = room_id
+
+
+class LegacyMessage:
+    def __init__(self, id, content, author, room, timestamp=None, message_type="regular", raw_data=None):
+        self.id = id
+        self.content = content
+        self.author = author
+        self.room = room
+        self.timestamp = timestamp or datetime.now()
+        self.message_type = message_type
+        self.raw_data = raw_data or {}
+
+
+def make_payloads(count):
+    # Payloads arrive as JSON text, decode them so each owns its strings like real frames
+    return [
+        json.loads(json.dumps({
+            "id": f"msg_{index:08d}",
+            "roomId": f"room_{index % 20}",
+            "username": f"user_{index % 2000}",
+            "userAddress": f"Addr{index % 2000:040d}",
+            "message": f"message number {index}",
+            "timestamp": 1700000000000 + index,
+            "messageType": "regular",
+        }))
+        for index in range(count)
+    ]
+
+
+def legacy_build(msg_data):
+    return LegacyMessage(
+        msg_data.get('id', ''), msg_data.get('message', ''),
+        LegacyUser(msg_data.get('username', 'unknown'), msg_data.get('userAddress')),
+        LegacyRoom(msg_data.get('roomId', '')),
+        datetime.fromtimestamp(msg_data['timestamp'] / 1000),
+        msg_data.get('messageType', 'regular'), msg_data,
+    )
+
+
+def measure(label, build, count):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    payloads = make_payloads(count)
+    retained = [build(payload) for payload in payloads]
+    del payloads
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"{label:<24}{(after - before) / len(retained):>10.1f} bytes/message")
+    return retained
+
+
+if __name__ == "__main__":
+    message_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    print(f"messages retained: {message_count}")
+    measure("legacy", legacy_build, message_count)
+    for mode in ("full", "compact", "none"):
+        client = Client("bench_token", raw_data=mode)
+        measure(f"slotted raw_data={mode}", client._build_message, message_count)
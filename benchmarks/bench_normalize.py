@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Text normalization cost benchmark
+
+Measures the per-message cost of TextNormalizer on fresh text (cache misses) and
+on raid-style repeated text (cache hits), and of a rule scan with and without
+normalization in front of it.
+
+    python benchmarks/bench_normalize.py [message_count]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from pump_self_melon import RuleSet
+from pump_self_melon.core import TextNormalizer
+
+
+def make_messages(count):
+    words = ["gm", "wagmi", "ser", "moon", "pump", "chart", "dev", "based", "send it", "lfg"]
+    obfuscated = ["\uff26\uff32\uff25\uff25 \uff33\uff2f\uff2c", "fr\u200bee s\u200bol", "fr\u0435\u0435 s\u043el",
+                  "fr33 s0l", "freeeee sol"]
+    messages = []
+    for index in range(count):
+        if index % 20 == 0:
+            messages.append(f"{random.choice(obfuscated)} at t.me/x{index}")
+        else:
+            messages.append(" ".join(random.choice(words) for _ in range(8)) + f" {index}")
+    return messages
+
+
+def per_message(label, func, messages):
+    started = time.perf_counter()
+    for message in messages:
+        func(message)
+    elapsed = time.perf_counter() - started
+    print(f"{label:<28}{elapsed / len(messages) * 1e6:>8.2f} us/message")
+
+
+def main(count):
+    messages = make_messages(count)
+    raid = [messages[0]] * count
+    phrases = [f"blocked phrase {index}" for index in range(5_000)] + ["free sol"]
+
+    normalizer = TextNormalizer(cache_size=count * 2)
+    per_message("normalize (miss)", normalizer.normalize, messages)
+    per_message("normalize (hit)", normalizer.normalize, messages)
+    per_message("normalize (raid repeat)", normalizer.normalize, raid)
+
+    plain = RuleSet.from_lists(phrases=phrases)
+    normalized = RuleSet.from_lists(phrases=phrases, normalizer=TextNormalizer(cache_size=count * 2))
+    per_message("scan, casefold only", plain.scan, messages)
+    per_message("scan, normalized", normalized.scan, messages)
+
+    caught_plain = sum(1 for message in messages if plain.scan(message))
+    caught_normalized = sum(1 for message in messages if normalized.scan(message))
+    print(f"obfuscated spam caught:     {caught_plain} plain vs {caught_normalized} normalized")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50_000)
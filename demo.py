@@ -4,7 +4,7 @@ import sys
 import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
 
-from pump_self_melon import Client
+from pump_self_melon import Client, CommandRouter
 
 async def main():
     print("Pump-Self Integration Demo")
@@ -25,6 +25,7 @@ async def main():
         return
     
     client = Client(token=token)
+    commands = CommandRouter(client)
     
     message_count = 0
     bot_username = None
@@ -42,33 +43,33 @@ async def main():
         message_count += 1
         
         print(f"[{message_count}] {message.author.username}: {message.content}")
-        
-        if message.author.username == bot_username:
-            return
-        
-        content = message.content.lower().strip()
-        
-        if content == "ping":
-            await client.send_message("pong! 🏓")
-        
-        elif content == "help":
-            help_text = "Available commands: ping, echo <text>, stats, time, hello"
-            await client.reply(message, help_text)
-        
-        elif content.startswith("echo "):
-            echo_text = message.content[5:]
-            await client.reply(message, f"📢 {echo_text}")
-        
-        elif content == "stats":
-            await client.send_message(f"📊 Total messages processed: {message_count}")
-        
-        elif content == "time":
-            import datetime
-            now = datetime.datetime.now().strftime("%H:%M:%S")
-            await client.send_message(f"🕐 Current time: {now}")
-        
-        elif content == "hello":
-            await client.send_message(f"👋 Hello {message.author.username}!")
+    
+    @commands.command()
+    async def ping(ctx):
+        await ctx.send("pong! 🏓")
+    
+    @commands.command(name="help")
+    async def help_command(ctx):
+        help_text = "Available commands: ping, echo <text>, stats, time, hello"
+        await ctx.reply(help_text)
+    
+    @commands.command(cooldown=(3, 10))
+    async def echo(ctx):
+        await ctx.reply(f"📢 {ctx.rest}")
+    
+    @commands.command()
+    async def stats(ctx):
+        await ctx.send(f"📊 Total messages processed: {message_count}")
+    
+    @commands.command()
+    async def time(ctx):
+        import datetime
+        now = datetime.datetime.now().strftime("%H:%M:%S")
+        await ctx.send(f"🕐 Current time: {now}")
+    
+    @commands.command()
+    async def hello(ctx):
+        await ctx.send(f"👋 Hello {ctx.author.username}!")
     
     @client.event
     async def on_join(room, user):
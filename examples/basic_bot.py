@@ -1,11 +1,12 @@
 import asyncio
-from pump_self_melon import Client
+from pump_self_melon import Client, CommandRouter
 
 async def main():
     print("Pump-Self Example Bot")
     print("Replace YOUR_TOKEN_HERE and ROOM_ID_HERE with your actual values")
     
     client = Client(token="YOUR_TOKEN_HERE")
+    commands = CommandRouter(client)
     
     @client.event
     async def on_ready():
@@ -19,23 +20,25 @@ async def main():
     async def on_message(message):
         print(f"[{message.room.id[:8]}] {message.author.username}: {message.content}")
         
-        if message.content.lower() == "ping":
-            await client.send_message("pong!")
-        
-        elif message.content.lower().startswith("echo "):
-            text = message.content[5:]
-            await client.send_message(f"Echo: {text}")
-        
-        elif message.content.lower() == "hello":
-            await client.send_message(f"Hello {message.author.username}!")
-        
         # Example: Ban user if they send inappropriate content
         # (Uncomment to enable - requires moderator permissions)
-        # elif "spam" in message.content.lower():
+        # if "spam" in message.content.lower():
         #     success = await client.ban_user_by_message_id(message.id, "Spam detected")
         #     if success:
         #         print(f"Banned user {message.author.username} for spam")
     
+    @commands.command()
+    async def ping(ctx):
+        await ctx.send("pong!")
+    
+    @commands.command()
+    async def echo(ctx):
+        await ctx.send(f"Echo: {ctx.rest}")
+    
+    @commands.command()
+    async def hello(ctx):
+        await ctx.send(f"Hello {ctx.author.username}!")
+    
     @client.event
     async def on_join(room, user):
         print(f"Joined room {room.id} as {user.username}")
@@ -4,7 +4,7 @@ Example demonstrating the banning functionality in pump.fun-self
 
 This example shows how to:
 1. Connect to a pump.fun room with banning enabled
-2. Automatically ban users based on message content
+2. Automatically ban users based on compiled moderation rules
 3. Ban users by message ID
 4. Check moderator permissions
 """
@@ -25,9 +25,17 @@ BAN_TRIGGERS = [
     "hate speech"
 ]
 
+# Regular expressions that trigger automatic banning
+BAN_PATTERNS = [
+    r"free\s+(sol|airdrop)",
+    r"t\.me/\S+",
+]
+
 class ModerationBot:
     def __init__(self):
-        self.client = pump_self_melon.Client(TOKEN)
+        # Every trigger is checked in a single pass over each message
+        rules = pump_self_melon.RuleSet.from_lists(phrases=BAN_TRIGGERS, regexes=BAN_PATTERNS)
+        self.client = pump_self_melon.Client(TOKEN, rules=pump_self_melon.RuleEngine(rules))
         self.banned_message_ids = set()
     
     async def setup_events(self):
@@ -67,33 +75,32 @@ class ModerationBot:
         if message.author.username == USERNAME:
             return
         
-        # Check for ban triggers in message content
-        message_lower = message.content.lower()
-        
-        for trigger in BAN_TRIGGERS:
-            if trigger in message_lower:
-                print(f"🚨 Ban trigger detected: '{trigger}' in message from {message.author.username}")
-                
-                # Attempt to ban the user by message ID
-                success = await self.client.ban_user_by_message_id(
-                    message.id, 
-                    f"Auto-ban: {trigger}"
-                )
-                
-                if success:
-                    print(f"🔨 Successfully banned {message.author.username} for: {trigger}")
-                    self.banned_message_ids.add(message.id)
-                else:
-                    print(f"❌ Failed to ban {message.author.username}")
-                
-                break
+        # Check the message against the rules; a match bans the author
+        matches = await self.client.moderate(message)
+        
+        if matches:
+            trigger = matches[0].pattern
+            print(f"🚨 Ban trigger detected: '{trigger}' in message from {message.author.username}")
+            
+            if self.client.ban_manager and self.client.ban_manager.is_user_banned(message.author.address):
+                print(f"🔨 Successfully banned {message.author.username} for: {trigger}")
+                self.banned_message_ids.add(message.id)
+            else:
+                print(f"❌ Failed to ban {message.author.username}")
+    
+    async def reload_rules(self, phrases, patterns):
+        """Swap in a new blocklist without pausing the message stream"""
+        await self.client.rules.reload(
+            [pump_self_melon.Rule(phrase) for phrase in phrases] +
+            [pump_self_melon.Rule(pattern, kind="regex") for pattern in patterns]
+        )
     
     async def run(self):
         """Run the moderation bot"""
         print("🚀 Starting moderation bot...")
         print(f"📡 Connecting to room: {ROOM_ID}")
         print(f"👤 Username: {USERNAME}")
-        print(f"🎯 Ban triggers: {', '.join(BAN_TRIGGERS)}")
+        print(f"🎯 Ban triggers: {', '.join(BAN_TRIGGERS)} (+{len(BAN_PATTERNS)} patterns)")
         print("-" * 50)
         
         # Set up event handlers
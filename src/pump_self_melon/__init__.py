@@ -1,6 +1,11 @@
 from .client import Client
-from .models import Message, User, Room
+from .models import Message, MessageBatch, User, Room, ModelCache
 from .ban_manager import BanManager
+from .pool import ClientPool
+from .commands import CommandRouter, Command, Context, CommandError
+from .moderation import Rule, RuleSet, RuleEngine
 
 __version__ = "1.0.0"
-__all__ = ["Client", "Message", "User", "Room", "BanManager"]
\ No newline at end of file
+__all__ = ["Client", "Message", "MessageBatch", "User", "Room", "ModelCache", "BanManager", "ClientPool",
+           "CommandRouter", "Command", "Context", "CommandError",
+           "Rule", "RuleSet", "RuleEngine"]
\ No newline at end of file
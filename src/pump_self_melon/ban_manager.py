@@ -2,17 +2,26 @@
 Ban management system for pump.fun-self
 """
 import aiohttp
+import asyncio
 import logging
-from typing import Dict, List, Optional, Set
+from typing import AsyncIterator, Callable, Dict, Iterable, List, Optional, Set, Tuple
 from datetime import datetime, timedelta
 from .models import Message, User
+from .moderation import Rule, RuleEngine, BAN
+from .core import codec
+from .core.index import MessageIndex
+from .core.store import BanStore
+from .core.pipeline import SingleFlight, map_concurrent
+from .core.retry import RetryableError, RetryLater, RetryQueue, parse_retry_after
 
 logger = logging.getLogger(__name__)
 
 class BanManager:
     """Manages banning users based on message IDs and user addresses"""
     
-    def __init__(self, auth_token: str, room_id: str, enabled: bool = False):
+    def __init__(self, auth_token: str, room_id: str, enabled: bool = False,
+                 rules: Optional[RuleEngine] = None, message_index: Optional[MessageIndex] = None,
+                 store: Optional[BanStore] = None, retry_queue: Optional[RetryQueue] = None):
         """
         Initialize the ban manager
         
@@ -20,21 +29,50 @@ class BanManager:
             auth_token: Authentication token for API requests
             room_id: The room ID where banning will occur
             enabled: Whether banning functionality is enabled
+            rules: Moderation rules checked by moderate()
+            message_index: Bounded store for tracked messages (default limits if omitted)
+            store: Durable ban log; bans recorded there are known banned from the start
+            retry_queue: Where bans and unbans that hit 429/5xx are retried (kept next to
+                the store's log if there is one)
         """
         self.auth_token = auth_token
         self.room_id = room_id
-        self.enabled = enabled
+        # Called whenever banning is switched on or off, e.g. so a client can re-plan its routing
+        self.on_toggle: Optional[Callable[[], None]] = None
+        self._enabled = enabled
         self.has_mod_permissions = False
+        self.rules = rules
         
-        # Track message ID to user address mapping
-        self.message_to_user: Dict[str, str] = {}
+        # Track message ID to user address mapping, bounded by entry count, age and memory
+        if message_index is None:
+            message_index = MessageIndex(normalizer=rules.normalizer if rules is not None else None)
+        self.message_to_user = message_index
         
         # Track banned users and messages
-        self.banned_users: Set[str] = set()
+        self.store = store
+        self.banned_users: Set[str] = store.banned(room_id) if store is not None else set()
         self.banned_messages: Set[str] = set()
         
-        # Session for HTTP requests
+        # Session for HTTP requests, and the ban/unban requests in flight
         self._session = None
+        self._requests = SingleFlight()
+        
+        # Bans and unbans the server couldn't take right now, retried in the background
+        if retry_queue is None:
+            retry_queue = RetryQueue(path=store.path_for(room_id, ".retry.json") if store is not None else None)
+        self.retry_queue = retry_queue
+        self.retry_queue.bind(self._retry)
+    
+    @property
+    def enabled(self) -> bool:
+        return self._enabled
+    
+    @enabled.setter
+    def enabled(self, value: bool):
+        changed = value != self._enabled
+        self._enabled = value
+        if changed and self.on_toggle is not None:
+            self.on_toggle()
     
     def enable_banning(self):
         """Enable the banning functionality"""
@@ -51,11 +89,12 @@ class BanManager:
         """Get or create HTTP session"""
         if self._session is None or self._session.closed:
             cookies = {"auth_token": self.auth_token}
-            self._session = aiohttp.ClientSession(cookies=cookies)
+            self._session = aiohttp.ClientSession(cookies=cookies, json_serialize=codec.dumps)
         return self._session
     
     async def close(self):
-        """Close the HTTP session"""
+        """Stop retrying (pending retries are saved if the queue is durable) and close the HTTP session"""
+        await self.retry_queue.close()
         if self._session and not self._session.closed:
             await self._session.close()
     
@@ -65,9 +104,29 @@ class BanManager:
             return
         
         if message.id and message.author.address:
-            self.message_to_user[message.id] = message.author.address
+            self.message_to_user.add(message.id, message.author.address, message.room.id, message.content)
             logger.debug(f"Tracking message {message.id} from user {message.author.address}")
     
+    async def moderate(self, message: Message) -> List[Rule]:
+        """
+        Check a message against the moderation rules and ban on a match
+        
+        Args:
+            message: The message to check
+            
+        Returns:
+            Every rule the message matched (empty if none or no rules are set)
+        """
+        if self.rules is None:
+            return []
+        
+        matches = self.rules.scan(message.content)
+        for rule in matches:
+            if rule.action == BAN and message.author.address and self.enabled:
+                await self.ban_user(message.author.address, rule.reason)
+                break
+        return matches
+    
     async def check_mod_permissions(self) -> bool:
         """Check if the user has moderator permissions in the room"""
         try:
@@ -86,6 +145,8 @@ class BanManager:
                 if response.status == 200:
                     self.has_mod_permissions = True
                     logger.info("✅ Moderator permissions confirmed")
+                    # Pick up retries saved before a restart
+                    self.retry_queue.start()
                     return True
                 elif response.status == 403:
                     self.has_mod_permissions = False
@@ -126,6 +187,36 @@ class BanManager:
         
         return await self.ban_user(user_address, reason)
     
+    async def ban_by_text(self, text: str, reason: str = "Inappropriate content",
+                          within: Optional[float] = 300.0) -> Dict[str, bool]:
+        """
+        Ban every user who recently posted the given text
+        
+        Text is matched the way the message index folds it (case-folded, or through
+        its normalizer), so only messages tracked while banning was enabled count.
+        
+        Args:
+            text: Message text to look for
+            reason: Reason for the bans
+            within: Only consider messages from the last this many seconds (None for all tracked)
+            
+        Returns:
+            Mapping of each matching address to whether its ban succeeded
+        """
+        return {user_address: banned async for user_address, banned
+                in self.ban_many(self.message_to_user.authors_of(text, within), reason)}
+    
+    def get_user_activity(self, user_address: str, within: Optional[float] = None) -> Dict:
+        """Recently tracked message IDs and rooms for a user"""
+        return {
+            "messages": self.message_to_user.messages_from(user_address, within),
+            "rooms": self.message_to_user.rooms_of(user_address, within),
+        }
+    
+    def purge_user(self, user_address: str) -> int:
+        """Forget every tracked message from a user, returning how many were dropped"""
+        return len(self.message_to_user.forget(user_address))
+    
     async def ban_user(self, user_address: str, reason: str = "Inappropriate content") -> bool:
         """
         Ban a user by their address
@@ -135,7 +226,8 @@ class BanManager:
             reason: Reason for the ban
             
         Returns:
-            True if ban was successful, False otherwise
+            True if ban was successful, False otherwise (a ban refused with 429/5xx or
+            lost to a network error is retried in the background)
         """
         if not self.enabled:
             logger.warning("Banning is not enabled")
@@ -149,6 +241,23 @@ class BanManager:
             logger.info(f"User {user_address[:8]}... is already banned")
             return True
         
+        # Handlers racing on the same address share one request
+        return await self._requests.run(("ban", user_address), lambda: self._post_ban(user_address, reason))
+    
+    async def _post_ban(self, user_address: str, reason: str) -> bool:
+        # The latest intent for an address wins over an older one waiting to be retried
+        self.retry_queue.cancel(("unban", user_address))
+        try:
+            banned = await self._request_ban(user_address, reason)
+        except RetryableError as e:
+            logger.warning(f"Ban of {user_address[:8]}... will be retried: {e}")
+            self.retry_queue.submit(("ban", user_address), reason, e.retry_after, str(e))
+            return False
+        if banned:
+            self.retry_queue.cancel(("ban", user_address))
+        return banned
+    
+    async def _request_ban(self, user_address: str, reason: str) -> bool:
         try:
             session = await self._get_session()
             url = f"https://livechat.pump.fun/chat/moderation/rooms/{self.room_id}/bans"
@@ -169,21 +278,66 @@ class BanManager:
                 "reason": reason
             }
             
-            async with session.post(url, headers=headers, json=data) as response:
-                if response.status in [200, 201, 204]:
+            async with session.post(url, headers=headers, data=codec.dumps_bytes(data)) as response:
+                # 409: already banned, e.g. by an earlier attempt whose response was lost
+                if response.status in [200, 201, 204, 409]:
                     self.banned_users.add(user_address)
+                    if self.store is not None:
+                        self.store.record_ban(self.room_id, user_address)
                     logger.info(f"✅ Successfully banned user {user_address[:8]}... for: {reason}")
                     print(f"🔨 BANNED USER: {user_address[:8]}... | Reason: {reason}")
                     return True
                 else:
                     error_text = await response.text()
+                    self._raise_if_retryable(response, error_text)
                     logger.error(f"Failed to ban user {user_address[:8]}...: {response.status} - {error_text}")
                     return False
                     
+        except RetryableError:
+            raise
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise RetryableError(f"{type(e).__name__}: {e}") from e
         except Exception as e:
             logger.error(f"Error banning user {user_address[:8]}...: {e}")
             return False
     
+    async def ban_many(self, user_addresses: Iterable[str], reason: str = "Inappropriate content",
+                       concurrency: int = 16) -> AsyncIterator[Tuple[str, bool]]:
+        """
+        Ban many users at once, yielding each result as it completes
+        
+        Up to ``concurrency`` requests run at a time. Duplicate addresses are banned
+        once, and an address already being banned elsewhere shares that request.
+        
+        Args:
+            user_addresses: Addresses of the users to ban
+            reason: Reason for the bans
+            concurrency: Maximum number of requests in flight
+            
+        Yields:
+            ``(address, success)`` pairs in completion order
+        """
+        async for user_address, banned in map_concurrent(
+            lambda address: self.ban_user(address, reason), dict.fromkeys(user_addresses), concurrency
+        ):
+            yield user_address, banned
+    
+    async def unban_many(self, user_addresses: Iterable[str],
+                         concurrency: int = 16) -> AsyncIterator[Tuple[str, bool]]:
+        """
+        Unban many users at once, yielding each result as it completes
+        
+        Args:
+            user_addresses: Addresses of the users to unban
+            concurrency: Maximum number of requests in flight
+            
+        Yields:
+            ``(address, success)`` pairs in completion order
+        """
+        async for user_address, unbanned in map_concurrent(self.unban_user, dict.fromkeys(user_addresses),
+                                                           concurrency):
+            yield user_address, unbanned
+    
     async def unban_user(self, user_address: str) -> bool:
         """
         Unban a user by their address
@@ -202,6 +356,21 @@ class BanManager:
             logger.warning("Cannot unban user: no moderator permissions")
             return False
         
+        return await self._requests.run(("unban", user_address), lambda: self._delete_ban(user_address))
+    
+    async def _delete_ban(self, user_address: str) -> bool:
+        self.retry_queue.cancel(("ban", user_address))
+        try:
+            unbanned = await self._request_unban(user_address)
+        except RetryableError as e:
+            logger.warning(f"Unban of {user_address[:8]}... will be retried: {e}")
+            self.retry_queue.submit(("unban", user_address), None, e.retry_after, str(e))
+            return False
+        if unbanned:
+            self.retry_queue.cancel(("unban", user_address))
+        return unbanned
+    
+    async def _request_unban(self, user_address: str) -> bool:
         try:
             session = await self._get_session()
             url = f"https://livechat.pump.fun/chat/moderation/rooms/{self.room_id}/bans/{user_address}"
@@ -217,20 +386,47 @@ class BanManager:
             }
             
             async with session.delete(url, headers=headers) as response:
-                if response.status in [200, 204]:
+                # 404: not banned (any more), which is what we wanted
+                if response.status in [200, 204, 404]:
                     self.banned_users.discard(user_address)
+                    if self.store is not None:
+                        self.store.record_unban(self.room_id, user_address)
                     logger.info(f"✅ Successfully unbanned user {user_address[:8]}...")
                     print(f"✅ UNBANNED USER: {user_address[:8]}...")
                     return True
                 else:
                     error_text = await response.text()
+                    self._raise_if_retryable(response, error_text)
                     logger.error(f"Failed to unban user {user_address[:8]}...: {response.status} - {error_text}")
                     return False
                     
+        except RetryableError:
+            raise
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise RetryableError(f"{type(e).__name__}: {e}") from e
         except Exception as e:
             logger.error(f"Error unbanning user {user_address[:8]}...: {e}")
             return False
     
+    @staticmethod
+    def _raise_if_retryable(response, error_text: str):
+        if response.status == 429 or response.status >= 500:
+            raise RetryableError(f"{response.status} - {error_text}",
+                                 parse_retry_after(response.headers.get("Retry-After")))
+    
+    async def _retry(self, key: Tuple[str, str], reason: Optional[str]) -> bool:
+        """Retry queue callback: one more attempt at a ban or unban"""
+        action, user_address = key
+        if (user_address in self.banned_users) == (action == "ban"):
+            # Already where we wanted it, e.g. a fresh request landed in the meantime
+            return True
+        if key in self._requests:
+            # Not a failed attempt: check back once the running request has settled
+            raise RetryLater(1.0, "a request for this address is already in flight")
+        if action == "ban":
+            return await self._request_ban(user_address, reason)
+        return await self._request_unban(user_address)
+    
     def is_user_banned(self, user_address: str) -> bool:
         """Check if a user is currently banned"""
         return user_address in self.banned_users
@@ -246,5 +442,9 @@ class BanManager:
             "has_mod_permissions": self.has_mod_permissions,
             "banned_users_count": len(self.banned_users),
             "tracked_messages": len(self.message_to_user),
-            "banned_users": list(self.banned_users)
+            "message_index": self.message_to_user.get_stats(),
+            "banned_users": list(self.banned_users),
+            "requests": self._requests.get_stats(),
+            "retries": self.retry_queue.get_stats(),
+            "rules": self.rules.get_stats() if self.rules is not None else None
         }
\ No newline at end of file
@@ -1,28 +1,59 @@
 import asyncio
 import websockets
-import json
 import time
 import logging
-from typing import Optional, Callable, Dict, Any, List
+from typing import Optional, Callable, Dict, Any, List, Iterable, Union
 from functools import wraps
-from datetime import datetime
 
-from .models import Message, User, Room
+from .models import Message, MessageBatch, User, Room, ModelCache, RAW_DATA_FULL
 from .utils import get_user_info
 from .ban_manager import BanManager
+from .moderation import Rule, RuleEngine
+from .core.heartbeat import Heartbeat
+from .core.reconnect import ReconnectPolicy
+from .core import codec
+from .core.sender import SendQueue
+from .core.dispatch import Dispatcher
+from .core.supervisor import HandlerSupervisor
+from .core.batch import Batcher
+from .core.stream import Stream, OVERFLOW_BLOCK
+from .core.waiters import WaiterRegistry
+from .core.store import BanStore
+from .core.protocol import (
+    Frame, decode_frame, peek_event, EIO_OPEN, EIO_PING, SIO_ACK, SIO_CONNECT_ERROR, SIO_EVENT
+)
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.ERROR)
 
 class Client:
-    def __init__(self, token: str, websocket_uri: str = "wss://livechat.pump.fun/socket.io/?EIO=4&transport=websocket"):
+    def __init__(self, token: str, websocket_uri: str = "wss://livechat.pump.fun/socket.io/?EIO=4&transport=websocket",
+                 auth_timeout: float = 10.0, reconnect_policy: Optional[ReconnectPolicy] = None,
+                 send_queue: Optional[SendQueue] = None, raw_data: str = RAW_DATA_FULL,
+                 model_cache: Optional[ModelCache] = None, dispatcher: Optional[Dispatcher] = None,
+                 supervisor: Optional[HandlerSupervisor] = None, batcher: Optional[Batcher] = None,
+                 rules: Optional[RuleEngine] = None, ban_store: Optional[BanStore] = None):
         self.token = token
         self.websocket_uri = websocket_uri
+        self.auth_timeout = auth_timeout
+        self.reconnect_policy = reconnect_policy or ReconnectPolicy()
         self.websocket = None
         self.is_authenticated = False
         self.current_room = None
         self.current_username = None
         self.ban_manager = None
+        self.raw_data_mode = raw_data
+        self.model_cache = model_cache or ModelCache()
+        
+        # Every room joined over this connection, keyed by room ID
+        self.rooms: Dict[str, Room] = {}
+        self.ban_managers: Dict[str, BanManager] = {}
+        self._room_usernames: Dict[str, str] = {}
+        self._banning_enabled = False
+        # Moderation rules shared by every room's BanManager
+        self.rules = rules or RuleEngine()
+        # Durable ban log, so bans survive restarts
+        self.ban_store = ban_store
         
         self._event_handlers = {
             'message': [],
@@ -32,8 +63,43 @@ class Client:
             'error': []
         }
         
+        self.heartbeat = Heartbeat(on_stall=self._on_heartbeat_stall)
+        
+        # Frame routing: packet type first, then Socket.IO event name
+        self._packet_handlers = {
+            EIO_PING: self._on_ping,
+            EIO_OPEN: self._on_open,
+            SIO_EVENT: self._on_event,
+            SIO_ACK: self._on_ack,
+            SIO_CONNECT_ERROR: self._on_connect_error,
+        }
+        self._socket_event_handlers = {
+            'newMessage': self._on_new_message,
+        }
+        # Subset of _socket_event_handlers with someone consuming the result,
+        # rebuilt lazily whenever handlers or banning change
+        self._routes: Optional[Dict[str, Callable]] = None
+        self.frames_skipped = 0
+        self.send_queue = send_queue or SendQueue()
+        self.send_queue.bind(self._send_frame)
+        # Without a dispatcher, message handlers run inline on the receive loop
+        self.dispatcher = dispatcher
+        # Time budgets for handlers; None runs them without timeouts
+        self.supervisor = supervisor
+        # Feeds 'message_batch' handlers, only used once one is registered
+        self.batcher = batcher or Batcher()
+        self.batcher.bind(self._flush_batch)
+        # messages() consumers, indexed by room ID (None for every room)
+        self._streams: Dict[Optional[str], List[Stream]] = {}
+        self._waiters = WaiterRegistry()
+        
         self._running = False
     
+    @property
+    def latency(self) -> Optional[float]:
+        """Last measured websocket round-trip time in seconds"""
+        return self.heartbeat.latency
+    
     def event(self, func):
         if not asyncio.iscoroutinefunction(func):
             raise TypeError('Event handler must be a coroutine function')
@@ -46,26 +112,197 @@ class Client:
             self._event_handlers[event_name] = []
         
         self._event_handlers[event_name].append(func)
+        self._routes = None
         return func
     
-    def listen(self, event_name: str):
+    def listen(self, event_name: str, timeout: Optional[float] = None):
         def decorator(func):
             if not asyncio.iscoroutinefunction(func):
                 raise TypeError('Event handler must be a coroutine function')
             
+            if timeout is not None:
+                if self.supervisor is None:
+                    self.supervisor = HandlerSupervisor()
+                self.supervisor.set_timeout(func, timeout)
+            
             if event_name not in self._event_handlers:
                 self._event_handlers[event_name] = []
             
             self._event_handlers[event_name].append(func)
+            self._routes = None
             return func
         return decorator
     
-    async def _dispatch(self, event_name: str, *args, **kwargs):
+    def remove_listener(self, func, event_name: Optional[str] = None):
+        """Unregister a handler added with ``event`` or ``listen``"""
+        if event_name is None:
+            event_name = func.__name__[3:] if func.__name__.startswith('on_') else func.__name__
         handlers = self._event_handlers.get(event_name, [])
-        if handlers:
-            tasks = [handler(*args, **kwargs) for handler in handlers]
-            if tasks:
-                await asyncio.gather(*tasks, return_exceptions=True)
+        if func in handlers:
+            handlers.remove(func)
+            self._routes = None
+    
+    def messages(self, room: Union[Room, str, None] = None, predicate: Optional[Callable[[Message], bool]] = None,
+                 maxsize: int = 1000, overflow: str = OVERFLOW_BLOCK) -> Stream:
+        """Stream incoming messages as an async iterator
+        
+        Args:
+            room: Only yield messages from this room (default: every room)
+            predicate: Only yield messages for which this returns True
+            maxsize: Messages buffered before the overflow policy applies
+            overflow: "block" (pause reading the socket), "drop_oldest" or "drop_newest"
+        
+        Returns:
+            Stream: Iterate it with ``async for``; ``close()`` unregisters it
+        """
+        room_id = room.id if isinstance(room, Room) else room
+        stream = Stream(maxsize, overflow, predicate,
+                        on_close=lambda closed: self._remove_stream(room_id, closed))
+        self._streams.setdefault(room_id, []).append(stream)
+        self._routes = None
+        return stream
+    
+    def _remove_stream(self, room_id: Optional[str], stream: Stream):
+        streams = self._streams.get(room_id)
+        if streams and stream in streams:
+            streams.remove(stream)
+            if not streams:
+                del self._streams[room_id]
+            self._routes = None
+    
+    async def _feed_streams(self, message: Message):
+        for key in (message.room.id, None):
+            streams = self._streams.get(key)
+            if streams:
+                for stream in tuple(streams):
+                    await stream.put(message)
+    
+    def _wants_socket_event(self, event: str) -> bool:
+        if event == 'newMessage':
+            # Messages feed handlers, messages() streams, wait_for() and ban tracking
+            handlers = self._event_handlers
+            if handlers.get('message') or handlers.get('message_batch') or self._streams:
+                return True
+            if self._waiters.pending('message'):
+                return True
+            return any(ban_manager.enabled for ban_manager in self._iter_ban_managers())
+        return True
+    
+    def _invalidate_routes(self):
+        self._routes = None
+    
+    def _compile_routes(self) -> Dict[str, Callable]:
+        self._routes = {
+            event: handler for event, handler in self._socket_event_handlers.items()
+            if self._wants_socket_event(event)
+        }
+        return self._routes
+    
+    async def wait_for(self, event_name: str, check: Optional[Callable[..., bool]] = None,
+                       timeout: Optional[float] = None, room: Union[Room, str, None] = None,
+                       author: Union[User, str, None] = None, reply_to: Union[Message, str, None] = None) -> Any:
+        """Wait for the next matching event and return its arguments
+        
+        Args:
+            event_name: Event to wait for, e.g. 'message' or 'join'
+            check: Only accept events for which this returns True
+            timeout: Seconds to wait before raising asyncio.TimeoutError
+            room: For messages, only accept this room
+            author: For messages, only accept this user (User, address or username)
+            reply_to: For messages, only accept replies to this message (or message ID)
+        
+        Returns:
+            The single event argument, or a tuple when the event has several
+        """
+        room_id = room.id if isinstance(room, Room) else room
+        if isinstance(author, User):
+            author = author.address or author.username
+        reply_to_id = reply_to.id if isinstance(reply_to, Message) else reply_to
+        
+        # File the waiter under its most selective constraint, check the rest
+        if reply_to_id is not None:
+            key = ('reply_to', reply_to_id)
+        elif author is not None:
+            key = ('author', author)
+        elif room_id is not None:
+            key = ('room', room_id)
+        else:
+            key = None
+        
+        if room_id is not None or author is not None or reply_to_id is not None:
+            user_check = check
+            
+            def check(message, *args):
+                if room_id is not None and message.room.id != room_id:
+                    return False
+                if author is not None and author not in (message.author.address, message.author.username):
+                    return False
+                if reply_to_id is not None and message.reply_to_id != reply_to_id:
+                    return False
+                return user_check is None or user_check(message, *args)
+        
+        self._routes = None
+        try:
+            return await self._waiters.wait(event_name, key, check, timeout)
+        finally:
+            self._routes = None
+    
+    def _waiter_keys(self, event_name: str, args) -> List[Any]:
+        if event_name != 'message' or not args:
+            return [None]
+        message = args[0]
+        keys = [None, ('room', message.room.id), ('author', message.author.username)]
+        if message.author.address:
+            keys.append(('author', message.author.address))
+        if message.reply_to_id:
+            keys.append(('reply_to', message.reply_to_id))
+        return keys
+    
+    async def _dispatch(self, event_name: str, *args, **kwargs):
+        await self._run_handlers(event_name, args, kwargs, False)
+    
+    async def _dispatch_job(self, event_name: str, *args):
+        # Dispatcher jobs let handler errors through so the dispatcher counts them
+        await self._run_handlers(event_name, args, {}, True)
+    
+    async def _run_handlers(self, event_name: str, args, kwargs, raise_errors: bool):
+        if len(self._waiters):
+            self._waiters.resolve(event_name, args, self._waiter_keys(event_name, args))
+        handlers = self._event_handlers.get(event_name)
+        if not handlers:
+            return
+        if self.supervisor is not None:
+            # The supervisor keeps its own failure counts
+            await self._dispatch_supervised(event_name, handlers, args, kwargs)
+            return
+        if len(handlers) == 1:
+            # Skip gather's task and future bookkeeping for the common single-handler case
+            try:
+                await handlers[0](*args, **kwargs)
+            except Exception:
+                if raise_errors:
+                    raise
+            return
+        results = await asyncio.gather(*(handler(*args, **kwargs) for handler in handlers), return_exceptions=True)
+        if raise_errors:
+            for result in results:
+                if isinstance(result, Exception):
+                    raise result
+    
+    async def _dispatch_supervised(self, event_name: str, handlers: List[Callable], args, kwargs):
+        supervisor = self.supervisor
+        if len(handlers) == 1:
+            problems = [await supervisor.run(event_name, handlers[0], *args, **kwargs)]
+        else:
+            problems = await asyncio.gather(
+                *(supervisor.run(event_name, handler, *args, **kwargs) for handler in handlers)
+            )
+        if event_name == 'error':
+            # Never report on the error handlers through themselves
+            return
+        for problem in problems:
+            if problem is not None:
+                await self._dispatch('error', problem)
     
     async def connect(self) -> bool:
         try:
@@ -77,35 +314,103 @@ class Client:
     
     async def _send_auth(self):
         timestamp = int(time.time() * 1000)
-        auth_message = f'40{{"origin":"https://pump.fun","timestamp":{timestamp},"token":"{self.token}"}}'
+        payload = {"origin": "https://pump.fun", "timestamp": timestamp, "token": self.token}
+        auth_message = f'40{codec.dumps(payload)}'
         await self.websocket.send(auth_message)
     
+    async def _wait_for_authentication(self, timeout: Optional[float] = None):
+        """Read frames until the server acknowledges auth with a 430 packet"""
+        async def read_until_authenticated():
+            while True:
+                frame = decode_frame(await self.websocket.recv())
+                if self._check_auth_frame(frame):
+                    return
+                await self._handle_frame(frame)
+        
+        self.is_authenticated = False
+        await asyncio.wait_for(read_until_authenticated(), timeout=timeout or self.auth_timeout)
+    
     async def join_room(self, room_id: str, username: str = "anonymous"):
-        self.current_room = Room(room_id)
+        room = self.rooms.get(room_id)
+        if room is None:
+            room = Room(room_id)
+            self.rooms[room_id] = room
+        self._room_usernames[room_id] = username
+        self.current_room = room
         self.current_username = username
         
         # Initialize ban manager for this room
+        ban_manager = self.ban_managers.get(room_id)
+        if ban_manager is None:
+            ban_manager = BanManager(self.token, room_id, enabled=self._banning_enabled, rules=self.rules,
+                                     store=self.ban_store)
+            # Toggling banning on the manager itself changes whether messages need decoding
+            ban_manager.on_toggle = self._invalidate_routes
+            self.ban_managers[room_id] = ban_manager
+            self._routes = None
         if self.ban_manager is None:
-            self.ban_manager = BanManager(self.token, room_id, enabled=False)
+            self.ban_manager = ban_manager
         
-        join_message = f'420["joinRoom",{{"roomId":"{room_id}","username":"{username}"}}]'
+        join_message = f'420{codec.dumps(["joinRoom", {"roomId": room_id, "username": username}])}'
         await self.websocket.send(join_message)
         
-        # Check mod permissions if banning is enabled
-        if self.ban_manager and self.ban_manager.enabled:
+        # Check mod permissions if banning is enabled; once confirmed they aren't
+        # looked up again when the room is rejoined after a reconnect or restart
+        if ban_manager.enabled and not ban_manager.has_mod_permissions:
             print("🔍 Checking moderator permissions...")
-            await self.ban_manager.check_mod_permissions()
-            if not self.ban_manager.has_mod_permissions:
+            await ban_manager.check_mod_permissions()
+            if not ban_manager.has_mod_permissions:
                 print("⚠️  WARNING: Banning is enabled but you don't have moderator permissions!")
                 print("   You will need moderator permissions to ban users effectively.")
             else:
                 print("✅ Moderator permissions confirmed - banning functionality active")
         
-        await self._dispatch('join', self.current_room, User(username))
+        await self._dispatch('join', room, User(username))
+    
+    async def leave_room(self, room_id: str):
+        room = self.rooms.pop(room_id, None)
+        if room is None:
+            return
+        username = self._room_usernames.pop(room_id, self.current_username)
+        
+        if self.websocket is not None:
+            leave_message = f'42{codec.dumps(["leaveRoom", {"roomId": room_id}])}'
+            await self.websocket.send(leave_message)
+        
+        if self.current_room is room:
+            # Fall back to the most recently joined room still open
+            self.current_room = next(reversed(self.rooms.values()), None)
+            self.current_username = (
+                self._room_usernames.get(self.current_room.id) if self.current_room else None
+            )
+        
+        await self._dispatch('leave', room, User(username or "anonymous"))
+    
+    def get_room(self, room_id: str) -> Optional[Room]:
+        return self.rooms.get(room_id)
+    
+    async def _send_frame(self, frame: str):
+        if self.websocket is None:
+            raise ConnectionError("Not connected")
+        await self.websocket.send(frame)
     
-    async def send_message(self, content: str, room_id: Optional[str] = None, username: Optional[str] = None):
+    async def send_message(self, content: str, room_id: Optional[str] = None, username: Optional[str] = None,
+                           priority: bool = False, wait: bool = False):
+        """
+        Queue a message for a joined room
+        
+        Returns as soon as the message is queued, so a handler never holds up the
+        receive loop while its room is being paced.
+        
+        Args:
+            content: Message text
+            room_id: Target room (defaults to the current room)
+            username: Username to send as (defaults to the one used to join the room)
+            priority: Skip ahead of regular messages queued for the room
+            wait: Wait until the frame is written instead of returning the pending future
+        """
         room_id = room_id or (self.current_room.id if self.current_room else None)
-        username = username or self.current_username
+        username = username or self._room_usernames.get(room_id) or self.current_username
         
         if not room_id or not username:
             raise ValueError("Room ID and username required")
@@ -116,108 +421,170 @@ class Client:
             "username": username
         }
         
-        chat_message = f'423["sendMessage",{json.dumps(message_data)}]'
-        await self.websocket.send(chat_message)
+        future = await self.send_queue.put(room_id, message_data, priority=priority)
+        return await self._sent(future, wait)
 
-    async def send_reply(self, message: Message, content: str):
+    async def send_reply(self, message: Message, content: str, priority: bool = False, wait: bool = False):
         reply_data = {
             "roomId": message.room.id,
             "message": content,
-            "username": self.current_username,
+            "username": self._room_usernames.get(message.room.id, self.current_username),
             "replyToId": message.id,
             "replyPreview": message.content[:50] if message.content else ""
         }
         
-        reply_message = f'423["sendMessage",{json.dumps(reply_data)}]'
-        await self.websocket.send(reply_message)
+        # Replies are never merged with other queued messages
+        future = await self.send_queue.put(message.room.id, reply_data, priority=priority, coalesce=False)
+        return await self._sent(future, wait)
+    
+    async def _sent(self, future: asyncio.Future, wait: bool):
+        if wait:
+            await future
+            return None
+        # Nobody may ever look at the future; report a failed write here instead
+        future.add_done_callback(self._log_send_failure)
+        return future
+    
+    @staticmethod
+    def _log_send_failure(future: asyncio.Future):
+        if not future.cancelled() and future.exception() is not None:
+            logger.error(f"Failed to send message: {future.exception()}")
     
     async def reply(self, message: Message, content: str):
         # Deprecated alias for send_reply
-        await self.send_reply(message, content)
+        return await self.send_reply(message, content)
     
     def _check_authentication(self, raw_message: str) -> bool:
-        try:
-            if len(raw_message) > 2 and raw_message[:3] == "430":
-                json_part = raw_message[3:]
-                if json_part.startswith('['):
-                    parsed = json.loads(json_part)
-                    
-                    if isinstance(parsed, list) and len(parsed) > 0:
-                        if isinstance(parsed[0], dict) and 'authenticated' in parsed[0]:
-                            auth_status = parsed[0]['authenticated']
-                            if auth_status:
-                                self.is_authenticated = True
-                                return True
-                            else:
-                                raise Exception("Authentication failed")
-        except json.JSONDecodeError:
-            pass
-        except Exception as e:
-            raise e
+        return self._check_auth_frame(decode_frame(raw_message))
+    
+    def _check_auth_frame(self, frame: Frame) -> bool:
+        if frame.packet_type != SIO_ACK or frame.ack_id != 0 or not frame.args:
+            return False
         
+        first = frame.args[0]
+        if isinstance(first, dict) and 'authenticated' in first:
+            if first['authenticated']:
+                self.is_authenticated = True
+                return True
+            raise Exception("Authentication failed")
         return False
     
     def _parse_message(self, raw_message: str) -> Optional[Message]:
-        try:
-            if len(raw_message) > 2 and raw_message[:2] == "42":
-                json_part = raw_message[2:]
-                if json_part.startswith('['):
-                    parsed = json.loads(json_part)
-                    
-                    if (isinstance(parsed, list) and len(parsed) >= 2 and 
-                        parsed[0] == "newMessage" and isinstance(parsed[1], dict)):
-                        
-                        msg_data = parsed[1]
-                        
-                        user = User(
-                            username=msg_data.get('username', 'unknown'),
-                            address=msg_data.get('userAddress')
-                        )
-                        
-                        room = Room(msg_data.get('roomId', ''))
-                        
-                        timestamp = None
-                        if msg_data.get('timestamp'):
-                            try:
-                                timestamp = datetime.fromtimestamp(msg_data['timestamp'] / 1000)
-                            except:
-                                pass
-                        
-                        message = Message(
-                            id=msg_data.get('id', ''),
-                            content=msg_data.get('message', ''),
-                            author=user,
-                            room=room,
-                            timestamp=timestamp,
-                            message_type=msg_data.get('messageType', 'regular'),
-                            raw_data=msg_data
-                        )
-                        
-                        return message
-        except json.JSONDecodeError:
-            pass
-        except Exception:
-            pass
-        
+        frame = decode_frame(raw_message)
+        if frame.event == "newMessage" and frame.args:
+            return self._build_message(frame.args[0])
         return None
     
+    def _build_message(self, msg_data: Any) -> Optional[Message]:
+        if not isinstance(msg_data, dict):
+            return None
+        
+        # Route by roomId onto the shared Room object for a joined room
+        room_id = msg_data.get('roomId', '')
+        room = self.rooms.get(room_id)
+        if room is None:
+            if self.rooms:
+                return None
+            room = self.model_cache.room(room_id)
+        
+        # Fields are read from the payload lazily; modes that drop the payload
+        # need them copied out first
+        message = Message.from_payload(msg_data, room=room, cache=self.model_cache)
+        if self.raw_data_mode != RAW_DATA_FULL:
+            message.materialize(self.raw_data_mode)
+        return message
+    
     async def _handle_message(self, raw_message: str):
-        if self._check_authentication(raw_message):
+        routes = self._routes
+        if routes is None:
+            routes = self._compile_routes()
+        event = peek_event(raw_message)
+        if event is not None and event not in routes:
+            # Nobody consumes this event, skip the JSON decode entirely
+            self.heartbeat.touch()
+            self.frames_skipped += 1
+            if event not in self._socket_event_handlers:
+                self._check_moderation_notice(raw_message)
+            return
+        await self._handle_frame(decode_frame(raw_message))
+    
+    async def _handle_frame(self, frame: Frame):
+        self.heartbeat.touch()
+        if frame.event is not None:
+            # Events are the hot path, route straight on the event name
+            routes = self._routes
+            if routes is None:
+                routes = self._compile_routes()
+            handler = routes.get(frame.event)
+            if handler is not None:
+                await handler(frame)
+            elif frame.event not in self._socket_event_handlers:
+                self._check_moderation_notice(frame.raw)
+            return
+        handler = self._packet_handlers.get(frame.packet_type)
+        if handler is not None:
+            await handler(frame)
+    
+    async def _on_ping(self, frame: Frame):
+        # Engine.IO ping - answer before doing any other work
+        await self.websocket.send("3")
+        self.heartbeat.handle_ping()
+    
+    async def _on_open(self, frame: Frame):
+        # Engine.IO open packet carries pingInterval/pingTimeout
+        if isinstance(frame.data, dict):
+            self.heartbeat.handle_open(frame.data)
+    
+    async def _on_event(self, frame: Frame):
+        # Event packets without a usable event name
+        self._check_moderation_notice(frame.raw)
+    
+    async def _on_ack(self, frame: Frame):
+        if self._check_auth_frame(frame):
             await self._dispatch('ready')
             return
-            
-        # Check for content moderation issues
+        self._check_moderation_notice(frame.raw)
+    
+    async def _on_connect_error(self, frame: Frame):
+        self._check_moderation_notice(frame.raw)
+    
+    def _check_moderation_notice(self, raw_message: str):
         if "Invalid message" in raw_message and "Failed to subscribe" in raw_message:
             logger.warning("Content moderation issue detected - message may have been filtered")
+    
+    async def _on_new_message(self, frame: Frame):
+        message = self._build_message(frame.args[0]) if frame.args else None
+        if message is None:
+            return
         
-        message = self._parse_message(raw_message)
-        if message:
-            # Track message for potential banning
-            if self.ban_manager:
-                self.ban_manager.track_message(message)
-            
+        # Track message for potential banning
+        ban_manager = self.ban_managers.get(message.room.id, self.ban_manager)
+        if ban_manager:
+            ban_manager.track_message(message)
+        
+        if self._event_handlers.get('message_batch'):
+            await self.batcher.add(message)
+        if self._streams:
+            await self._feed_streams(message)
+        
+        dispatcher = self.dispatcher
+        if dispatcher is not None:
+            await dispatcher.submit(dispatcher.key_for(message), self._dispatch_job, 'message', message)
+        else:
             await self._dispatch('message', message)
     
+    async def _flush_batch(self, messages: List[Message]):
+        await self._dispatch('message_batch', MessageBatch(messages))
+    
+    async def _on_heartbeat_stall(self):
+        await self._dispatch('error', TimeoutError("Heartbeat timed out, reconnecting"))
+        if self.websocket is not None:
+            # Closing ends _listen, which lets start() reconnect straight away
+            try:
+                await self.websocket.close()
+            except Exception:
+                pass
+    
     async def _listen(self):
         try:
             async for raw_message in self.websocket:
@@ -230,11 +597,12 @@ class Client:
             if self._running:
                 raise
     
-    async def start(self, room_id: str, username: Optional[str] = None):
+    async def start(self, room_id: Union[str, Iterable[str]], username: Optional[str] = None):
+        room_ids = [room_id] if isinstance(room_id, str) else list(room_id)
         self._running = True
-        max_reconnect_attempts = 10
-        reconnect_delay = 5
-        attempt = 0
+        policy = self.reconnect_policy
+        policy.reset()
+        has_connected = False
         
         # Auto-fetch username from user info if not provided
         if username is None:
@@ -247,48 +615,58 @@ class Client:
                 await self._dispatch('error', f"Failed to get username from user info: {e}")
                 return
         
-        while attempt < max_reconnect_attempts and self._running:
+        while self._running:
             try:
-                if attempt > 0:
-                    await asyncio.sleep(reconnect_delay)
-                
                 if await self.connect():
-                    attempt = 0
+                    self.heartbeat.start(self.websocket)
                     
                     try:
                         await self._send_auth()
-                        await asyncio.sleep(1)
-                        await self.join_room(room_id, username)
+                        await self._wait_for_authentication()
+                        await self._join_rooms(room_ids, username)
+                        if has_connected:
+                            await self._dispatch('reconnect', policy.attempts)
+                        policy.record_success()
+                        has_connected = True
+                        await self._dispatch('ready')
                         await self._listen()
                     except (websockets.exceptions.ConnectionClosed, 
                            websockets.exceptions.WebSocketException):
-                        if self._running:
-                            attempt += 1
-                            continue
-                        else:
-                            break
+                        pass
                     except Exception as e:
                         await self._dispatch('error', e)
-                        if self._running:
-                            attempt += 1
-                            continue
-                        else:
-                            break
-                else:
-                    attempt += 1
-                    continue
+                    finally:
+                        self.heartbeat.stop()
                     
             except KeyboardInterrupt:
                 break
             except Exception as e:
                 await self._dispatch('error', e)
-                attempt += 1
-                await asyncio.sleep(reconnect_delay)
+            
+            if not self._running:
+                break
+            
+            delay = policy.record_failure()
+            if delay is None:
+                logger.error(f"Giving up after {policy.attempts} failed reconnect attempts")
+                break
+            await self._dispatch('backoff', delay, policy.attempts)
+            await asyncio.sleep(delay)
         
         await self.disconnect()
     
+    async def _join_rooms(self, room_ids: List[str], username: str):
+        # Rejoin everything tracked on reconnect, otherwise the initial room list
+        rejoin = list(self._room_usernames.items())
+        if not rejoin:
+            rejoin = [(room_id, username) for room_id in room_ids]
+        for room_id, room_username in rejoin:
+            await self.join_room(room_id, room_username)
+    
     async def disconnect(self):
         self._running = False
+        self.heartbeat.stop()
+        self.send_queue.close()
         if self.websocket and not self.websocket.closed:
             try:
                 await self.websocket.close()
@@ -298,85 +676,205 @@ class Client:
         self.is_authenticated = False
     
     async def close(self):
-        if self.ban_manager:
-            await self.ban_manager.close()
+        for ban_manager in self._iter_ban_managers():
+            await ban_manager.close()
+        if self.ban_store is not None:
+            await self.ban_store.close()
+        await self.batcher.close()
+        for streams in list(self._streams.values()):
+            for stream in tuple(streams):
+                stream.close()
         await self.disconnect()
+        if self.dispatcher is not None:
+            self.dispatcher.close()
+    
+    def _get_ban_manager(self, room_id: Optional[str] = None) -> Optional[BanManager]:
+        if room_id is not None:
+            return self.ban_managers.get(room_id)
+        return self.ban_manager
     
     def enable_banning(self):
-        """Enable automatic user banning functionality"""
-        if self.ban_manager:
-            self.ban_manager.enable_banning()
-        else:
-            print("⚠️  Cannot enable banning: not connected to a room yet")
+        """Enable automatic user banning functionality in every joined room"""
+        self._banning_enabled = True
+        if not self.ban_managers and not self.ban_manager:
+            print("⚠️  Banning will be enabled once a room is joined")
+            return
+        for ban_manager in self._iter_ban_managers():
+            ban_manager.enable_banning()
+        self._routes = None
     
     def disable_banning(self):
-        """Disable automatic user banning functionality"""
-        if self.ban_manager:
-            self.ban_manager.disable_banning()
+        """Disable automatic user banning functionality in every joined room"""
+        self._banning_enabled = False
+        for ban_manager in self._iter_ban_managers():
+            ban_manager.disable_banning()
+        self._routes = None
+    
+    def _iter_ban_managers(self) -> List[BanManager]:
+        managers = list(self.ban_managers.values())
+        if self.ban_manager is not None and self.ban_manager not in managers:
+            managers.append(self.ban_manager)
+        return managers
     
-    async def ban_user_by_message_id(self, message_id: str, reason: str = "Inappropriate content") -> bool:
+    async def moderate(self, message: Message) -> List[Rule]:
+        """
+        Check a message against the moderation rules, banning the author on a ban rule
+        
+        Args:
+            message: The message to check
+            
+        Returns:
+            Every rule the message matched
+        """
+        ban_manager = self.ban_managers.get(message.room.id, self.ban_manager)
+        if ban_manager is None:
+            return self.rules.scan(message.content)
+        return await ban_manager.moderate(message)
+    
+    async def ban_user_by_message_id(self, message_id: str, reason: str = "Inappropriate content",
+                                     room_id: Optional[str] = None) -> bool:
         """
         Ban a user based on their message ID
         
         Args:
             message_id: The ID of the message from the user to ban
             reason: Reason for the ban
+            room_id: Room the message was sent in (looked up if omitted)
             
         Returns:
             True if ban was successful, False otherwise
         """
-        if not self.ban_manager:
+        ban_manager = self._get_ban_manager(room_id)
+        if room_id is None:
+            for candidate in self.ban_managers.values():
+                if message_id in candidate.message_to_user:
+                    ban_manager = candidate
+                    break
+        
+        if not ban_manager:
             print("⚠️  Banning not available: not connected to a room")
             return False
         
-        return await self.ban_manager.ban_by_message_id(message_id, reason)
+        return await ban_manager.ban_by_message_id(message_id, reason)
     
-    async def ban_user_by_address(self, user_address: str, reason: str = "Inappropriate content") -> bool:
+    async def ban_user_by_address(self, user_address: str, reason: str = "Inappropriate content",
+                                  room_id: Optional[str] = None) -> bool:
         """
         Ban a user by their address
         
         Args:
             user_address: The address of the user to ban
             reason: Reason for the ban
+            room_id: Room to ban the user from (defaults to the current room)
             
         Returns:
             True if ban was successful, False otherwise
         """
-        if not self.ban_manager:
+        ban_manager = self._get_ban_manager(room_id)
+        if not ban_manager:
             print("⚠️  Banning not available: not connected to a room")
             return False
         
-        return await self.ban_manager.ban_user(user_address, reason)
+        return await ban_manager.ban_user(user_address, reason)
+    
+    async def ban_many(self, user_addresses: Iterable[str], reason: str = "Inappropriate content",
+                       room_id: Optional[str] = None, concurrency: int = 16):
+        """
+        Ban many users at once, yielding ``(address, success)`` as each ban completes
+        
+        Args:
+            user_addresses: Addresses of the users to ban
+            reason: Reason for the bans
+            room_id: Room to ban the users from (defaults to the current room)
+            concurrency: Maximum number of requests in flight
+        """
+        ban_manager = self._get_ban_manager(room_id)
+        if not ban_manager:
+            print("⚠️  Banning not available: not connected to a room")
+            return
+        
+        async for result in ban_manager.ban_many(user_addresses, reason, concurrency):
+            yield result
+    
+    async def unban_many(self, user_addresses: Iterable[str], room_id: Optional[str] = None,
+                         concurrency: int = 16):
+        """
+        Unban many users at once, yielding ``(address, success)`` as each unban completes
+        
+        Args:
+            user_addresses: Addresses of the users to unban
+            room_id: Room to unban the users from (defaults to the current room)
+            concurrency: Maximum number of requests in flight
+        """
+        ban_manager = self._get_ban_manager(room_id)
+        if not ban_manager:
+            print("⚠️  Banning not available: not connected to a room")
+            return
+        
+        async for result in ban_manager.unban_many(user_addresses, concurrency):
+            yield result
+    
+    async def ban_users_by_text(self, text: str, reason: str = "Inappropriate content",
+                                within: Optional[float] = 300.0, room_id: Optional[str] = None) -> Dict[str, bool]:
+        """
+        Ban every user who recently posted the given text
+        
+        Args:
+            text: Message text to look for
+            reason: Reason for the bans
+            within: Only consider messages from the last this many seconds
+            room_id: Room to clean up (defaults to every joined room)
+            
+        Returns:
+            Mapping of each matching address to whether its ban succeeded
+        """
+        if room_id is not None:
+            ban_managers = [self.ban_managers[room_id]] if room_id in self.ban_managers else []
+        else:
+            ban_managers = self._iter_ban_managers()
+        if not ban_managers:
+            print("⚠️  Banning not available: not connected to a room")
+            return {}
+        
+        results: Dict[str, bool] = {}
+        for ban_manager in ban_managers:
+            for user_address, banned in (await ban_manager.ban_by_text(text, reason, within)).items():
+                results[user_address] = results.get(user_address, False) or banned
+        return results
     
-    async def unban_user(self, user_address: str) -> bool:
+    async def unban_user(self, user_address: str, room_id: Optional[str] = None) -> bool:
         """
         Unban a user by their address
         
         Args:
             user_address: The address of the user to unban
+            room_id: Room to unban the user from (defaults to the current room)
             
         Returns:
             True if unban was successful, False otherwise
         """
-        if not self.ban_manager:
+        ban_manager = self._get_ban_manager(room_id)
+        if not ban_manager:
             print("⚠️  Banning not available: not connected to a room")
             return False
         
-        return await self.ban_manager.unban_user(user_address)
+        return await ban_manager.unban_user(user_address)
     
-    def get_ban_stats(self) -> dict:
+    def get_ban_stats(self, room_id: Optional[str] = None) -> dict:
         """Get banning statistics"""
-        if not self.ban_manager:
+        ban_manager = self._get_ban_manager(room_id)
+        if not ban_manager:
             return {"error": "Banning not available: not connected to a room"}
         
-        return self.ban_manager.get_stats()
+        return ban_manager.get_stats()
     
-    async def check_mod_permissions(self) -> bool:
+    async def check_mod_permissions(self, room_id: Optional[str] = None) -> bool:
         """Check if the current user has moderator permissions"""
-        if not self.ban_manager:
+        ban_manager = self._get_ban_manager(room_id)
+        if not ban_manager:
             return False
         
-        return await self.ban_manager.check_mod_permissions()
+        return await ban_manager.check_mod_permissions()
 
 def on_message(func):
     return func
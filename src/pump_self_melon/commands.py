@@ -0,0 +1,342 @@
+import inspect
+import logging
+import shlex
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .core.normalize import TextNormalizer
+from .core.utils import RateLimiter
+from .models import Message
+
+logger = logging.getLogger(__name__)
+
+# Cooldown scopes
+PER_USER = "user"
+PER_ROOM = "room"
+GLOBAL = "global"
+
+_TERMINAL = ""
+
+
+class CommandError(Exception):
+    """A command could not be run, e.g. its arguments did not convert"""
+
+
+class CommandOnCooldown(CommandError):
+    def __init__(self, command: "Command", retry_after: float):
+        self.command = command
+        self.retry_after = retry_after
+        super().__init__(f"Command '{command.name}' is on cooldown, retry in {retry_after:.1f}s")
+
+
+class Command:
+    """A registered command and its call statistics"""
+
+    def __init__(self, name: str, callback: Callable, aliases: Tuple[str, ...] = (),
+                 cooldown: Optional[Tuple[int, float]] = None, per: str = PER_USER,
+                 description: Optional[str] = None):
+        if per not in (PER_USER, PER_ROOM, GLOBAL):
+            raise ValueError(f"Unknown cooldown scope: {per}")
+        self.name = name
+        self.callback = callback
+        self.aliases = tuple(aliases)
+        self.per = per
+        self.description = description or inspect.getdoc(callback)
+        self.limiter = RateLimiter(*cooldown) if cooldown else None
+
+        self.calls = 0
+        self.failures = 0
+        self.rate_limited = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+
+        self._converters, self._required, self._varargs = self._inspect(callback)
+
+    @staticmethod
+    def _inspect(callback: Callable):
+        # Everything after the context parameter is filled from the message arguments
+        parameters = list(inspect.signature(callback).parameters.values())[1:]
+        converters = []
+        required = 0
+        varargs = None
+        for parameter in parameters:
+            annotation = parameter.annotation
+            converter = annotation if annotation in (int, float, str) else str
+            if parameter.kind == inspect.Parameter.VAR_POSITIONAL:
+                varargs = converter
+                break
+            if parameter.kind not in (inspect.Parameter.POSITIONAL_ONLY, inspect.Parameter.POSITIONAL_OR_KEYWORD):
+                break
+            converters.append(converter)
+            if parameter.default is inspect.Parameter.empty:
+                required += 1
+        return converters, required, varargs
+
+    def cooldown_key(self, message: Message) -> Any:
+        if self.per == PER_USER:
+            return message.author.address or message.author.username
+        if self.per == PER_ROOM:
+            return message.room.id
+        return None
+
+    def convert(self, args: List[str]) -> List[Any]:
+        if len(args) < self._required:
+            raise CommandError(f"Command '{self.name}' needs {self._required} argument(s), got {len(args)}")
+        converted = []
+        try:
+            for converter, value in zip(self._converters, args):
+                converted.append(converter(value))
+            if self._varargs is not None:
+                converted.extend(self._varargs(value) for value in args[len(self._converters):])
+        except ValueError as e:
+            raise CommandError(f"Bad argument for '{self.name}': {e}") from e
+        return converted
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "failures": self.failures,
+            "rate_limited": self.rate_limited,
+            "avg_time": self.total_time / self.calls if self.calls else None,
+            "max_time": self.max_time,
+        }
+
+
+class Context:
+    """What a command callback gets as its first argument"""
+
+    def __init__(self, client, message: Message, command: Command, invoked_with: str, rest: str):
+        self.client = client
+        self.message = message
+        self.command = command
+        self.invoked_with = invoked_with
+        self.rest = rest
+        self._args: Optional[List[str]] = None
+
+    @property
+    def author(self):
+        return self.message.author
+
+    @property
+    def room(self):
+        return self.message.room
+
+    @property
+    def args(self) -> List[str]:
+        """Arguments after the command, split shell-style so quotes group words"""
+        if self._args is None:
+            try:
+                self._args = shlex.split(self.rest)
+            except ValueError:
+                # Unbalanced quotes: fall back to plain whitespace splitting
+                self._args = self.rest.split()
+        return self._args
+
+    async def send(self, content: str, **kwargs):
+        return await self.client.send_message(content, room_id=self.message.room.id, **kwargs)
+
+    async def reply(self, content: str, **kwargs):
+        return await self.client.send_reply(self.message, content, **kwargs)
+
+
+class CommandRouter:
+    """Routes chat messages to commands through a prefix trie
+
+    Command names (and aliases, which may contain spaces) are stored in a character
+    trie, so finding the command for a message walks at most the length of the
+    longest name, however many commands are registered. The longest name that ends
+    on a word boundary wins.
+
+    Failures are reported through the client's ``command_error`` event as
+    ``(ctx, error)``; with no handler registered they are logged.
+
+    A ``normalizer`` is applied to command names and to the part of each message
+    after the prefix, so styled or obfuscated commands still match. The prefix
+    itself is matched as typed, and ``ctx.rest`` and the arguments are cut from the
+    original message, so addresses and numbers reach the callback as typed.
+    """
+
+    def __init__(self, client, prefix: str = "", case_insensitive: bool = True, ignore_self: bool = True,
+                 normalizer: Optional[TextNormalizer] = None):
+        self.client = client
+        self.normalizer = normalizer
+        self.case_insensitive = case_insensitive
+        self.prefix = prefix.lower() if case_insensitive else prefix
+        self.ignore_self = ignore_self
+        self.commands: Dict[str, Command] = {}
+        self.unmatched = 0
+
+        self._trie: Dict[str, Any] = {}
+        client.listen('message')(self.process)
+
+    def command(self, name: Optional[str] = None, aliases: Tuple[str, ...] = (),
+                cooldown: Optional[Tuple[int, float]] = None, per: str = PER_USER,
+                description: Optional[str] = None):
+        """Register a coroutine as a command
+
+        Args:
+            name: Command name, defaults to the function name
+            aliases: Other names that invoke the same command
+            cooldown: ``(calls, seconds)`` allowed per cooldown scope
+            per: Cooldown scope, "user", "room" or "global"
+            description: Help text, defaults to the docstring
+        """
+        def decorator(func):
+            if not inspect.iscoroutinefunction(func):
+                raise TypeError('Command callback must be a coroutine function')
+            self.add_command(Command(name or func.__name__, func, aliases, cooldown, per, description))
+            return func
+        return decorator
+
+    def _key(self, name: str) -> str:
+        if self.normalizer is not None:
+            return self.normalizer.normalize(name, cache=False)
+        return name.lower() if self.case_insensitive else name
+
+    def add_command(self, command: Command):
+        if command.name in self.commands:
+            raise ValueError(f"Command '{command.name}' is already registered")
+        names = (command.name, *command.aliases)
+        # Check every name first so a collision leaves the trie untouched
+        for name in names:
+            existing = self._lookup(self._key(name))
+            if existing is not None and existing is not command:
+                raise ValueError(f"'{name}' is already taken by command '{existing.name}'")
+        self.commands[command.name] = command
+        for name in names:
+            node = self._trie
+            for char in self._key(name):
+                node = node.setdefault(char, {})
+            node[_TERMINAL] = command
+
+    def _lookup(self, key: str) -> Optional[Command]:
+        node = self._trie
+        for char in key:
+            node = node.get(char)
+            if node is None:
+                return None
+        return node.get(_TERMINAL)
+
+    def remove_command(self, name: str) -> Optional[Command]:
+        command = self.commands.pop(name, None)
+        if command is None:
+            return None
+        for alias in (command.name, *command.aliases):
+            path = [self._trie]
+            for char in self._key(alias):
+                path.append(path[-1][char])
+            path[-1].pop(_TERMINAL, None)
+            # Prune branches that no longer lead anywhere
+            for node, char in zip(reversed(path[:-1]), reversed(self._key(alias))):
+                if node[char]:
+                    break
+                del node[char]
+        return command
+
+    def find(self, content: str) -> Optional[Tuple[Command, str, str]]:
+        """Match content to a command, returning ``(command, invoked_with, rest)``"""
+        text = content.strip()
+        if not self._has_prefix(text):
+            return None
+        prefix_length = len(self.prefix)
+        match = self._match(text, prefix_length)
+        if match is None:
+            return None
+        command, end = match
+        return command, text[prefix_length:end], text[end:].strip()
+
+    def _has_prefix(self, text: str) -> bool:
+        head = text[:len(self.prefix)]
+        return (head.lower() if self.case_insensitive else head) == self.prefix
+
+    def _match(self, text: str, start: int = 0) -> Optional[Tuple[Command, int]]:
+        # The command whose name, starting at start, ends furthest into text, and where it ends
+        node = self._trie
+        match = None
+        index = start
+        length = len(text)
+        lower = self.case_insensitive
+        while index < length:
+            char = text[index]
+            node = node.get(char.lower() if lower else char)
+            if node is None:
+                break
+            index += 1
+            if _TERMINAL in node and (index == length or text[index].isspace()):
+                match = (node[_TERMINAL], index)
+        return match
+
+    def _find_normalized(self, content: str) -> Optional[Tuple[Command, str, str]]:
+        original = content.strip()
+        # The prefix is matched as typed: folding it would let "iban" pass for "!ban"
+        if not self._has_prefix(original):
+            return None
+        body = original[len(self.prefix):]
+        text = self.normalizer.normalize(body)
+        match = self._match(text)
+        if match is None:
+            return None
+        command, end = match
+        invoked_with = text[:end]
+        if not text[end:].strip():
+            return command, invoked_with, ""
+        # Normalizing shifts offsets, so find the word boundary in the original
+        # whose normalized head is exactly the matched command name
+        for index, char in enumerate(body):
+            if not char.isspace():
+                continue
+            folded = self.normalizer.normalize(body[:index], cache=False)
+            if folded == invoked_with:
+                return command, invoked_with, body[index:].strip()
+            if len(folded) > len(invoked_with):
+                break
+        return command, invoked_with, text[end:].strip()
+
+    def _is_own_message(self, message: Message) -> bool:
+        username = self.client._room_usernames.get(message.room.id, self.client.current_username)
+        return username is not None and message.author.username == username
+
+    async def process(self, message: Message):
+        if self.normalizer is not None:
+            found = self._find_normalized(message.content)
+        else:
+            found = self.find(message.content)
+        if found is None:
+            self.unmatched += 1
+            return
+        if self.ignore_self and self._is_own_message(message):
+            return
+        command, invoked_with, rest = found
+        ctx = Context(self.client, message, command, invoked_with, rest)
+
+        if command.limiter is not None:
+            key = command.cooldown_key(message)
+            if not command.limiter.try_acquire(key):
+                command.rate_limited += 1
+                await self._report(ctx, CommandOnCooldown(command, command.limiter.delay(key)))
+                return
+
+        started = time.monotonic()
+        try:
+            await command.callback(ctx, *command.convert(ctx.args))
+        except Exception as e:
+            command.failures += 1
+            await self._report(ctx, e)
+        finally:
+            elapsed = time.monotonic() - started
+            command.calls += 1
+            command.total_time += elapsed
+            if elapsed > command.max_time:
+                command.max_time = elapsed
+
+    async def _report(self, ctx: Context, error: Exception):
+        if self.client._event_handlers.get('command_error'):
+            await self.client._dispatch('command_error', ctx, error)
+        else:
+            logger.warning(f"Command '{ctx.command.name}' failed: {error}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "commands": {name: command.get_stats() for name, command in self.commands.items()},
+            "unmatched": self.unmatched,
+        }
@@ -1,3 +1,19 @@
 from .utils import EventEmitter, RateLimiter
+from .heartbeat import Heartbeat
+from .reconnect import ReconnectPolicy
+from .sender import SendQueue
+from .dispatch import Dispatcher
+from .batch import Batcher
+from .stream import Stream
+from .waiters import WaiterRegistry
+from .normalize import TextNormalizer
+from .index import MessageIndex
+from .store import BanStore
+from .pipeline import SingleFlight, map_concurrent
+from .retry import RetryQueue, RetryableError, RetryLater
+from .supervisor import HandlerSupervisor, SlowHandlerError
 
-__all__ = ["EventEmitter", "RateLimiter"]
\ No newline at end of file
+__all__ = ["EventEmitter", "RateLimiter", "Heartbeat", "ReconnectPolicy", "SendQueue", "Dispatcher",
+           "Batcher", "Stream", "WaiterRegistry", "TextNormalizer", "MessageIndex", "BanStore",
+           "SingleFlight", "map_concurrent", "RetryQueue", "RetryableError", "RetryLater", "HandlerSupervisor",
+           "SlowHandlerError"]
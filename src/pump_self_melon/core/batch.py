@@ -0,0 +1,77 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Batcher:
+    """Collects items into micro-batches flushed by size or by deadline
+
+    A batch is handed to the flush coroutine once it holds ``max_size`` items, or
+    ``max_delay`` seconds after its first item arrived, whichever comes first. Size
+    flushes are awaited by ``add``, so a slow consumer pushes back on the producer.
+    """
+
+    def __init__(self, flush: Optional[Callable[[List[Any]], Awaitable[None]]] = None,
+                 max_size: int = 100, max_delay: float = 0.25):
+        self._flush = flush
+        self.max_size = max_size
+        self.max_delay = max_delay
+
+        self.batches = 0
+        self.items = 0
+
+        self._pending: List[Any] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks = set()
+
+    def bind(self, flush: Callable[[List[Any]], Awaitable[None]]):
+        """Set the coroutine that receives each batch"""
+        self._flush = flush
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    async def add(self, item: Any):
+        self._pending.append(item)
+        if len(self._pending) >= self.max_size:
+            await self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.max_delay, self._on_deadline)
+
+    def _on_deadline(self):
+        self._timer = None
+        task = asyncio.create_task(self.flush())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def flush(self):
+        """Hand over whatever is pending now"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        self.batches += 1
+        self.items += len(batch)
+        try:
+            await self._flush(batch)
+        except Exception as e:
+            logger.error(f"Batch handler failed: {e}")
+
+    async def close(self):
+        """Flush the last partial batch and wait for deadline flushes in progress"""
+        await self.flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def get_stats(self):
+        return {
+            "pending": len(self._pending),
+            "batches": self.batches,
+            "items": self.items,
+            "average_size": self.items / self.batches if self.batches else None,
+        }
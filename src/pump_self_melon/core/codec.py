@@ -0,0 +1,69 @@
+"""
+JSON codec used for every frame and HTTP body
+
+orjson is used when it is installed, otherwise the standard library. Both produce
+compact output (no spaces after separators, non-ASCII left unescaped) so frames are
+byte-for-byte identical whichever backend is active.
+"""
+import json
+from typing import Any, Callable, Optional, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+JSONInput = Union[str, bytes, bytearray, memoryview]
+
+name: str = "json"
+loads: Callable[[JSONInput], Any]
+dumps: Callable[[Any], str]
+dumps_bytes: Callable[[Any], bytes]
+
+
+def _use_stdlib():
+    global name, loads, dumps, dumps_bytes
+    encoder = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False)
+
+    def stdlib_loads(data: JSONInput) -> Any:
+        if isinstance(data, memoryview):
+            data = data.tobytes()
+        return json.loads(data)
+
+    def stdlib_dumps_bytes(obj: Any) -> bytes:
+        return encoder.encode(obj).encode("utf-8")
+
+    name = "json"
+    loads = stdlib_loads
+    dumps = encoder.encode
+    dumps_bytes = stdlib_dumps_bytes
+
+
+def _use_orjson():
+    global name, loads, dumps, dumps_bytes
+
+    def orjson_dumps(obj: Any) -> str:
+        return orjson.dumps(obj).decode("utf-8")
+
+    name = "orjson"
+    loads = orjson.loads
+    dumps = orjson_dumps
+    dumps_bytes = orjson.dumps
+
+
+def use(codec: Optional[str] = None) -> str:
+    """Select the JSON backend (``"orjson"``, ``"json"`` or ``None`` for the fastest available)"""
+    if codec is None:
+        codec = "orjson" if orjson is not None else "json"
+    if codec == "orjson":
+        if orjson is None:
+            raise ImportError("orjson is not installed")
+        _use_orjson()
+    elif codec == "json":
+        _use_stdlib()
+    else:
+        raise ValueError(f"Unknown JSON codec: {codec}")
+    return name
+
+
+use()
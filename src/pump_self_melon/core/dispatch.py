@@ -0,0 +1,153 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Ordering modes for message handlers
+ORDER_ROOM = "room"
+ORDER_AUTHOR = "author"
+ORDER_NONE = None
+
+
+class _Job:
+    __slots__ = ("func", "args", "queued_at")
+
+    def __init__(self, func: Callable[..., Awaitable[Any]], args: Tuple[Any, ...], queued_at: float):
+        self.func = func
+        self.args = args
+        self.queued_at = queued_at
+
+
+class Dispatcher:
+    """Runs event handlers on a bounded pool of worker tasks
+
+    Jobs submitted with the same key run one at a time in submission order, while
+    different keys run concurrently on up to ``workers`` tasks, so a slow handler
+    only holds up its own room (or author) instead of the whole receive loop. At
+    most ``max_in_flight`` jobs may be queued or running; ``submit`` waits for space
+    beyond that, which pushes back on the reader.
+    """
+
+    def __init__(self, workers: int = 8, max_in_flight: int = 1000, ordering: Optional[str] = ORDER_ROOM,
+                 latency_samples: int = 100):
+        if ordering not in (ORDER_ROOM, ORDER_AUTHOR, ORDER_NONE):
+            raise ValueError(f"Unknown ordering: {ordering}")
+        self.workers = workers
+        self.max_in_flight = max_in_flight
+        self.ordering = ordering
+
+        self.processed = 0
+        self.failed = 0
+
+        self._lanes: Dict[Hashable, Deque[_Job]] = {}
+        self._ready: Optional[asyncio.Queue] = None
+        self._space: Optional[asyncio.Semaphore] = None
+        self._tasks = []
+        self._depth = 0
+        self._running = 0
+        self._latencies: Deque[float] = deque(maxlen=latency_samples)
+        self._waits: Deque[float] = deque(maxlen=latency_samples)
+
+    @property
+    def depth(self) -> int:
+        """Jobs queued but not yet started"""
+        return self._depth
+
+    @property
+    def in_flight(self) -> int:
+        return self._depth + self._running
+
+    def key_for(self, message) -> Optional[Hashable]:
+        """Ordering key for a message under this dispatcher's ordering mode"""
+        if self.ordering == ORDER_ROOM:
+            return message.room.id
+        if self.ordering == ORDER_AUTHOR:
+            author = message.author
+            return author.address or author.username
+        return None
+
+    def _start(self):
+        self._ready = asyncio.Queue()
+        self._space = asyncio.Semaphore(self.max_in_flight)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def submit(self, key: Optional[Hashable], func: Callable[..., Awaitable[Any]], *args):
+        """Queue ``func(*args)`` behind earlier jobs with the same key
+
+        A ``None`` key gives the job no ordering constraint at all.
+        """
+        if not self._tasks:
+            self._start()
+        await self._space.acquire()
+
+        job = _Job(func, args, time.monotonic())
+        if key is None:
+            key = job
+        self._depth += 1
+        lane = self._lanes.get(key)
+        if lane is not None:
+            # Already queued or running, the worker that owns it will get to this job
+            lane.append(job)
+            return
+        self._lanes[key] = deque((job,))
+        self._ready.put_nowait(key)
+
+    async def _worker(self):
+        while True:
+            key = await self._ready.get()
+            lane = self._lanes[key]
+            job = lane.popleft()
+            self._depth -= 1
+            self._running += 1
+            started = time.monotonic()
+            self._waits.append(started - job.queued_at)
+            try:
+                await job.func(*job.args)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Handler {getattr(job.func, '__name__', job.func)} failed: {e}")
+            finally:
+                self._running -= 1
+                self._latencies.append(time.monotonic() - started)
+                self.processed += 1
+                self._space.release()
+                if lane:
+                    # Back of the line, so a busy key can't starve the others
+                    self._ready.put_nowait(key)
+                else:
+                    self._lanes.pop(key, None)
+
+    async def join(self):
+        """Wait until every submitted job has finished"""
+        while self.in_flight:
+            await asyncio.sleep(0.01)
+
+    def close(self):
+        """Stop the workers, dropping anything still queued"""
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        self._lanes.clear()
+        self._depth = 0
+
+    @staticmethod
+    def _summary(samples: Deque[float]) -> Dict[str, Optional[float]]:
+        if not samples:
+            return {"avg": None, "max": None}
+        return {"avg": sum(samples) / len(samples), "max": max(samples)}
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "depth": self._depth,
+            "running": self._running,
+            "active_keys": len(self._lanes),
+            "processed": self.processed,
+            "failed": self.failed,
+            "handler_latency": self._summary(self._latencies),
+            "queue_wait": self._summary(self._waits),
+        }
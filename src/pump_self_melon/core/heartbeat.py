@@ -0,0 +1,133 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Engine.IO v4 defaults, used until the server's open packet says otherwise
+DEFAULT_PING_INTERVAL = 25.0
+DEFAULT_PING_TIMEOUT = 20.0
+
+
+class Heartbeat:
+    """Engine.IO heartbeat bookkeeping for a single websocket connection
+
+    Tracks the server's ping cadence from the open packet, notices when the stream
+    goes quiet for longer than ``pingInterval + pingTimeout`` and periodically
+    measures round-trip time with websocket-level pings.
+    """
+
+    def __init__(self, on_stall: Optional[Callable[[], Awaitable[None]]] = None,
+                 rtt_interval: Optional[float] = None, rtt_samples: int = 20):
+        self.on_stall = on_stall
+        self.ping_interval = DEFAULT_PING_INTERVAL
+        self.ping_timeout = DEFAULT_PING_TIMEOUT
+        self.rtt_interval = rtt_interval
+        self.session_id: Optional[str] = None
+
+        self.latency: Optional[float] = None
+        self.pings_received = 0
+        self.stalls = 0
+
+        self._rtt_samples = rtt_samples
+        self._rtt_history = []
+        self._last_seen = 0.0
+        self._websocket = None
+        self._tasks = []
+
+    @staticmethod
+    def _now() -> float:
+        return time.monotonic()
+
+    def handle_open(self, payload: Dict[str, Any]):
+        """Apply the ``pingInterval``/``pingTimeout`` from an Engine.IO open packet"""
+        self.session_id = payload.get("sid")
+        if payload.get("pingInterval"):
+            self.ping_interval = payload["pingInterval"] / 1000
+        if payload.get("pingTimeout"):
+            self.ping_timeout = payload["pingTimeout"] / 1000
+        self.touch()
+
+    def handle_ping(self):
+        self.pings_received += 1
+        self.touch()
+
+    def touch(self):
+        self._last_seen = self._now()
+
+    @property
+    def deadline(self) -> float:
+        return self._last_seen + self.ping_interval + self.ping_timeout
+
+    @property
+    def average_latency(self) -> Optional[float]:
+        if not self._rtt_history:
+            return None
+        return sum(self._rtt_history) / len(self._rtt_history)
+
+    def start(self, websocket):
+        self.stop()
+        self._websocket = websocket
+        self.touch()
+        self._tasks = [asyncio.create_task(self._watchdog())]
+        if self.rtt_interval is None or self.rtt_interval > 0:
+            self._tasks.append(asyncio.create_task(self._measure_loop()))
+
+    def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        self._websocket = None
+
+    async def _watchdog(self):
+        while True:
+            remaining = self.deadline - self._now()
+            if remaining > 0:
+                await asyncio.sleep(remaining)
+                continue
+            self.stalls += 1
+            logger.warning(
+                f"No heartbeat for {self.ping_interval + self.ping_timeout:.1f}s, connection stalled"
+            )
+            if self.on_stall is not None:
+                await self.on_stall()
+            return
+
+    async def measure_rtt(self) -> Optional[float]:
+        """Send a websocket ping and record how long the pong takes"""
+        websocket = self._websocket
+        if websocket is None:
+            return None
+        started = self._now()
+        pong_waiter = await websocket.ping()
+        await asyncio.wait_for(pong_waiter, timeout=self.ping_timeout)
+        rtt = self._now() - started
+
+        self.latency = rtt
+        self._rtt_history.append(rtt)
+        if len(self._rtt_history) > self._rtt_samples:
+            del self._rtt_history[0]
+        return rtt
+
+    async def _measure_loop(self):
+        while True:
+            try:
+                await self.measure_rtt()
+            except asyncio.CancelledError:
+                raise
+            except asyncio.TimeoutError:
+                logger.warning("Websocket ping timed out")
+            except Exception as e:
+                logger.debug(f"RTT measurement failed: {e}")
+            await asyncio.sleep(self.rtt_interval or self.ping_interval)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "latency": self.latency,
+            "average_latency": self.average_latency,
+            "ping_interval": self.ping_interval,
+            "ping_timeout": self.ping_timeout,
+            "pings_received": self.pings_received,
+            "stalls": self.stalls,
+        }
@@ -0,0 +1,243 @@
+import sys
+import time
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional
+
+from .normalize import TextNormalizer
+
+# Rough per-entry cost on top of the strings themselves: the ordered dict slot and
+# its link node, the entry object, and its slots in the author and text postings
+_ENTRY_OVERHEAD = 300
+_GROUP_OVERHEAD = 250
+
+
+class _Group:
+    """Message IDs sharing an author or a text, oldest first"""
+
+    __slots__ = ("key", "messages")
+
+    def __init__(self, key: str):
+        self.key = key
+        self.messages: Dict[str, None] = {}
+
+
+class _Entry:
+    __slots__ = ("author", "text", "room", "timestamp")
+
+    def __init__(self, author: _Group, text: Optional[_Group], room: Optional[str], timestamp: float):
+        self.author = author
+        self.text = text
+        self.room = room
+        self.timestamp = timestamp
+
+
+class MessageIndex:
+    """A bounded message ID -> author address map, with reverse lookups
+
+    Entries are kept in insertion order, so the oldest is always at the front and
+    eviction pops from there in O(1). An entry is dropped once it is older than
+    ``max_age`` seconds, once there are more than ``max_entries``, or while the
+    estimated footprint is over ``max_bytes``; expired entries are swept as new ones
+    come in, and lookups never return one. Tracking an ID again refreshes it.
+
+    Every entry is also filed under its author and, when text is given, under the
+    text folded through ``normalizer`` (or just case-folded). Those postings share
+    the entry's lifetime, so addresses and repeated texts are stored once and
+    ``messages_from`` / ``authors_of`` cost time in the number of matches rather
+    than the size of the index. Any limit can be ``None`` to disable it.
+    """
+
+    def __init__(self, max_entries: Optional[int] = 100_000, max_age: Optional[float] = 3600.0,
+                 max_bytes: Optional[int] = 64 * 1024 * 1024, normalizer: Optional[TextNormalizer] = None):
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self.normalizer = normalizer
+
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._authors: Dict[str, _Group] = {}
+        self._texts: Dict[str, _Group] = {}
+        self._bytes = 0
+
+        self.evicted_size = 0
+        self.evicted_age = 0
+        self.evicted_memory = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, message_id: object) -> bool:
+        return self.get(message_id) is not None
+
+    def __getitem__(self, message_id: str) -> str:
+        address = self.get(message_id)
+        if address is None:
+            raise KeyError(message_id)
+        return address
+
+    def __setitem__(self, message_id: str, address: str):
+        self.add(message_id, address)
+
+    def __delitem__(self, message_id: str):
+        if self.pop(message_id) is None:
+            raise KeyError(message_id)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._entries))
+
+    def _live(self, entry: _Entry, now: float) -> bool:
+        return self.max_age is None or now - entry.timestamp <= self.max_age
+
+    def get(self, message_id: object, default: Optional[str] = None) -> Optional[str]:
+        entry = self._entries.get(message_id)
+        if entry is None or not self._live(entry, time.monotonic()):
+            return default
+        return entry.author.key
+
+    def room_of(self, message_id: str) -> Optional[str]:
+        entry = self._entries.get(message_id)
+        if entry is None or not self._live(entry, time.monotonic()):
+            return None
+        return entry.room
+
+    def add(self, message_id: str, address: str, room: Optional[str] = None, text: Optional[str] = None):
+        now = time.monotonic()
+        if message_id in self._entries:
+            self._remove(message_id)
+        author = self._group(self._authors, address)
+        posting = self._group(self._texts, self.text_key(text)) if text else None
+        author.messages[message_id] = None
+        if posting is not None:
+            posting.messages[message_id] = None
+        self._entries[message_id] = _Entry(author, posting, room, now)
+        self._bytes += sys.getsizeof(message_id) + _ENTRY_OVERHEAD
+        self._evict(now)
+
+    def pop(self, message_id: str, default: Optional[str] = None) -> Optional[str]:
+        if message_id not in self._entries:
+            return default
+        return self._remove(message_id)
+
+    def forget(self, address: str) -> List[str]:
+        """Drop every tracked message from ``address``, returning their IDs"""
+        author = self._authors.get(address)
+        if author is None:
+            return []
+        message_ids = list(author.messages)
+        for message_id in message_ids:
+            self._remove(message_id)
+        return message_ids
+
+    def clear(self):
+        self._entries.clear()
+        self._authors.clear()
+        self._texts.clear()
+        self._bytes = 0
+
+    def text_key(self, text: str) -> str:
+        if self.normalizer is not None:
+            return self.normalizer.normalize(text)
+        return text.casefold().strip()
+
+    def messages_from(self, address: str, within: Optional[float] = None) -> List[str]:
+        """IDs of ``address``'s tracked messages, oldest first, optionally only the last ``within`` seconds"""
+        author = self._authors.get(address)
+        if author is None:
+            return []
+        return self._recent(author, within)
+
+    def rooms_of(self, address: str, within: Optional[float] = None) -> List[str]:
+        """Rooms ``address`` has tracked messages in, most recent activity last"""
+        rooms: Dict[str, None] = {}
+        for message_id in self.messages_from(address, within):
+            room = self._entries[message_id].room
+            if room is not None:
+                rooms.pop(room, None)
+                rooms[room] = None
+        return list(rooms)
+
+    def last_seen(self, address: str) -> Optional[float]:
+        """``time.monotonic()`` of ``address``'s newest tracked message"""
+        recent = self.messages_from(address)
+        return self._entries[recent[-1]].timestamp if recent else None
+
+    def messages_with(self, text: str, within: Optional[float] = None) -> List[str]:
+        """IDs of tracked messages whose text folds to the same key as ``text``"""
+        posting = self._texts.get(self.text_key(text))
+        if posting is None:
+            return []
+        return self._recent(posting, within)
+
+    def authors_of(self, text: str, within: Optional[float] = None) -> List[str]:
+        """Addresses that posted ``text``, in order of their first matching message"""
+        authors: Dict[str, None] = {}
+        for message_id in self.messages_with(text, within):
+            authors[self._entries[message_id].author.key] = None
+        return list(authors)
+
+    def _recent(self, group: _Group, within: Optional[float]) -> List[str]:
+        now = time.monotonic()
+        windows = [window for window in (within, self.max_age) if window is not None]
+        if not windows:
+            return list(group.messages)
+        cutoff = now - min(windows)
+        entries = self._entries
+        recent = []
+        # Newest first, stopping at the first message outside the window
+        for message_id in reversed(group.messages):
+            if entries[message_id].timestamp < cutoff:
+                break
+            recent.append(message_id)
+        recent.reverse()
+        return recent
+
+    def _group(self, groups: Dict[str, _Group], key: str) -> _Group:
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = _Group(key)
+            self._bytes += sys.getsizeof(key) + _GROUP_OVERHEAD
+        return group
+
+    def _release(self, groups: Dict[str, _Group], group: _Group, message_id: str):
+        del group.messages[message_id]
+        if not group.messages:
+            del groups[group.key]
+            self._bytes -= sys.getsizeof(group.key) + _GROUP_OVERHEAD
+
+    def _remove(self, message_id: str) -> str:
+        entry = self._entries.pop(message_id)
+        self._bytes -= sys.getsizeof(message_id) + _ENTRY_OVERHEAD
+        self._release(self._authors, entry.author, message_id)
+        if entry.text is not None:
+            self._release(self._texts, entry.text, message_id)
+        return entry.author.key
+
+    def _evict(self, now: float):
+        entries = self._entries
+        if self.max_age is not None:
+            cutoff = now - self.max_age
+            while entries:
+                message_id = next(iter(entries))
+                if entries[message_id].timestamp > cutoff:
+                    break
+                self._remove(message_id)
+                self.evicted_age += 1
+        if self.max_entries is not None:
+            while len(entries) > self.max_entries:
+                self._remove(next(iter(entries)))
+                self.evicted_size += 1
+        if self.max_bytes is not None:
+            while entries and self._bytes > self.max_bytes:
+                self._remove(next(iter(entries)))
+                self.evicted_memory += 1
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "addresses": len(self._authors),
+            "texts": len(self._texts),
+            "estimated_bytes": self._bytes,
+            "evicted_size": self.evicted_size,
+            "evicted_age": self.evicted_age,
+            "evicted_memory": self.evicted_memory,
+        }
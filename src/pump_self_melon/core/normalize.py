@@ -0,0 +1,106 @@
+import re
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Optional
+
+# Zero-width and other invisible characters spammers use to split words
+INVISIBLE_CHARACTERS = (
+    "\u00ad\u034f\u061c\u115f\u1160\u17b4\u17b5\u180e"
+    "\u200b\u200c\u200d\u200e\u200f\u202a\u202b\u202c\u202d\u202e"
+    "\u2060\u2061\u2062\u2063\u2064\u206a\u206b\u206c\u206d\u206e\u206f"
+    "\u3164\ufe00\ufe01\ufe02\ufe03\ufe0e\ufe0f\ufeff\uffa0"
+)
+
+# Lowercase look-alikes from other scripts that NFKC leaves alone
+CONFUSABLES = {
+    # Cyrillic
+    "а": "a", "в": "b", "е": "e", "ё": "e", "к": "k", "м": "m", "н": "h", "о": "o",
+    "р": "p", "с": "c", "т": "t", "у": "y", "х": "x", "ѕ": "s", "і": "i", "ї": "i",
+    "ј": "j", "ԁ": "d", "ԛ": "q", "ԝ": "w", "һ": "h", "ӏ": "l", "ɡ": "g",
+    # Greek
+    "α": "a", "β": "b", "γ": "y", "ε": "e", "η": "n", "ι": "i", "κ": "k", "ν": "v",
+    "ο": "o", "ρ": "p", "τ": "t", "υ": "u", "χ": "x", "ω": "w",
+    # Latin extensions and symbols
+    "ı": "i", "ł": "l", "ø": "o", "đ": "d", "ħ": "h", "ß": "ss",
+}
+
+LEETSPEAK = {
+    "0": "o", "1": "i", "3": "e", "4": "a", "5": "s", "7": "t", "8": "b",
+    "@": "a", "$": "s", "|": "i", "+": "t", "!": "i",
+}
+
+
+class TextNormalizer:
+    """Folds chat text into a canonical form for matching
+
+    The pipeline strips invisible characters, applies NFKC (fullwidth and styled
+    letters become plain ones), optionally drops accents, case-folds, maps
+    look-alike letters from other scripts and, optionally, leetspeak onto Latin
+    letters, then collapses runs of a repeated character to ``max_repeat``.
+
+    Results are kept in a bounded LRU cache keyed on the raw text, since raids
+    repeat the same message over and over; a repeat costs one dictionary lookup.
+    """
+
+    def __init__(self, strip_accents: bool = True, leetspeak: bool = True, max_repeat: Optional[int] = 1,
+                 confusables: Optional[Dict[str, str]] = None, cache_size: int = 10_000):
+        self.strip_accents = strip_accents
+        self.leetspeak = leetspeak
+        self.max_repeat = max_repeat
+        self.cache_size = cache_size
+
+        self.hits = 0
+        self.misses = 0
+
+        self._invisible = {ord(char): None for char in INVISIBLE_CHARACTERS}
+        mapping = dict(CONFUSABLES)
+        if confusables:
+            mapping.update(confusables)
+        if leetspeak:
+            mapping.update(LEETSPEAK)
+        self._fold = str.maketrans(mapping)
+        self._repeats = (re.compile(r"(.)\1{%d,}" % max_repeat, re.DOTALL)
+                         if max_repeat is not None else None)
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+
+    def __call__(self, text: str) -> str:
+        return self.normalize(text)
+
+    def normalize(self, text: str, cache: bool = True) -> str:
+        """Normalized form of ``text``; ``cache=False`` bypasses the cache entirely"""
+        if not cache:
+            return self._normalize(text)
+        cache = self._cache
+        normalized = cache.get(text)
+        if normalized is not None:
+            self.hits += 1
+            cache.move_to_end(text)
+            return normalized
+
+        self.misses += 1
+        normalized = self._normalize(text)
+        cache[text] = normalized
+        if len(cache) > self.cache_size:
+            cache.popitem(last=False)
+        return normalized
+
+    def _normalize(self, text: str) -> str:
+        if not text.isascii():
+            text = unicodedata.normalize("NFKC", text.translate(self._invisible))
+            if self.strip_accents:
+                decomposed = unicodedata.normalize("NFD", text)
+                text = "".join(char for char in decomposed if not unicodedata.combining(char))
+        text = text.casefold().translate(self._fold)
+        if self._repeats is not None:
+            text = self._repeats.sub(lambda match: match.group(1) * self.max_repeat, text)
+        return text
+
+    def clear(self):
+        self._cache.clear()
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "cached": len(self._cache),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
@@ -0,0 +1,81 @@
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, Iterable, Tuple
+
+
+async def map_concurrent(func: Callable[[Any], Awaitable[Any]], items: Iterable[Any],
+                         concurrency: int = 16) -> AsyncIterator[Tuple[Any, Any]]:
+    """Run ``func`` over ``items`` with at most ``concurrency`` calls in flight
+
+    Yields ``(item, result)`` pairs in completion order. If a call raises, the other
+    calls are cancelled and the exception propagates to the consumer; breaking out
+    of the iteration early cancels whatever is still running.
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+    iterator = iter(items)
+    results: asyncio.Queue = asyncio.Queue()
+
+    async def worker():
+        for item in iterator:
+            try:
+                results.put_nowait((item, await func(item), None))
+            except Exception as e:
+                results.put_nowait((item, None, e))
+                return
+
+    workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    running = len(workers)
+    for task in workers:
+        task.add_done_callback(lambda _: results.put_nowait(None))
+    try:
+        while running:
+            entry = await results.get()
+            if entry is None:
+                running -= 1
+                continue
+            item, result, error = entry
+            if error is not None:
+                raise error
+            yield item, result
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+
+class SingleFlight:
+    """Merges concurrent calls for the same key into one
+
+    While a call for a key is in flight, later callers with that key await its
+    result instead of starting their own. Each caller is shielded from the others,
+    so one of them being cancelled doesn't cancel the shared call.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+        self.calls = 0
+        self.merged = 0
+
+    def __len__(self) -> int:
+        return len(self._in_flight)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._in_flight
+
+    async def run(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        future = self._in_flight.get(key)
+        if future is None:
+            self.calls += 1
+            future = asyncio.ensure_future(func())
+            self._in_flight[key] = future
+            future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        else:
+            self.merged += 1
+        return await asyncio.shield(future)
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "in_flight": len(self._in_flight),
+            "calls": self.calls,
+            "merged": self.merged,
+        }
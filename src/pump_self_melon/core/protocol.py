@@ -0,0 +1,105 @@
+from typing import Any, List, Optional
+
+from . import codec
+
+# Engine.IO packet types
+EIO_OPEN = "0"
+EIO_CLOSE = "1"
+EIO_PING = "2"
+EIO_PONG = "3"
+EIO_MESSAGE = "4"
+
+# Socket.IO packet types, carried inside an Engine.IO message packet
+SIO_CONNECT = "40"
+SIO_DISCONNECT = "41"
+SIO_EVENT = "42"
+SIO_ACK = "43"
+SIO_CONNECT_ERROR = "44"
+
+_DIGITS = frozenset("0123456789")
+
+
+class Frame:
+    """A decoded Engine.IO/Socket.IO text frame
+
+    ``packet_type`` is the Engine.IO type for transport packets (``"0"``, ``"2"``, ...)
+    and the two-character Engine.IO + Socket.IO type for messages (``"42"``, ``"43"``,
+    ...). For events, ``event`` holds the event name and ``args`` its arguments.
+    """
+
+    __slots__ = ("raw", "packet_type", "ack_id", "data", "event", "args")
+
+    def __init__(self, raw: str, packet_type: str, ack_id: Optional[int] = None,
+                 data: Any = None, event: Optional[str] = None, args: Optional[List[Any]] = None):
+        self.raw = raw
+        self.packet_type = packet_type
+        self.ack_id = ack_id
+        self.data = data
+        self.event = event
+        self.args = args if args is not None else []
+
+    def __repr__(self):
+        return f"<Frame type={self.packet_type} ack_id={self.ack_id} event={self.event}>"
+
+
+def decode_frame(raw: str) -> Frame:
+    """Classify a raw frame and decode its JSON body, reading the prefix once"""
+    if not raw:
+        return Frame(raw, "")
+
+    eio_type = raw[0]
+    if eio_type != EIO_MESSAGE or len(raw) < 2:
+        data = None
+        if len(raw) > 1 and eio_type == EIO_OPEN:
+            try:
+                data = codec.loads(raw[1:])
+            except ValueError:
+                pass
+        return Frame(raw, eio_type, data=data)
+
+    packet_type = raw[:2]
+    index = 2
+    length = len(raw)
+    ack_id = None
+    if length > 2 and raw[2] in _DIGITS:
+        while index < length and raw[index] in _DIGITS:
+            index += 1
+        ack_id = int(raw[2:index])
+
+    if index >= length:
+        return Frame(raw, packet_type, ack_id)
+
+    try:
+        data = codec.loads(raw[index:])
+    except ValueError:
+        return Frame(raw, packet_type, ack_id)
+
+    if packet_type == SIO_EVENT and isinstance(data, list) and data and isinstance(data[0], str):
+        return Frame(raw, packet_type, ack_id, data, data[0], data[1:])
+    if packet_type == SIO_ACK and isinstance(data, list):
+        return Frame(raw, packet_type, ack_id, data, args=data)
+    return Frame(raw, packet_type, ack_id, data)
+
+
+def peek_event(raw: str) -> Optional[str]:
+    """Read the event name of a Socket.IO event frame without decoding its body
+
+    Returns ``None`` for anything that isn't an event frame, or whose name can't be
+    read without a full decode (escaped characters); callers should fall back to
+    ``decode_frame`` in that case.
+    """
+    if not raw.startswith(SIO_EVENT):
+        return None
+    index = 2
+    length = len(raw)
+    while index < length and raw[index] in _DIGITS:
+        index += 1
+    if not raw.startswith('["', index):
+        return None
+    end = raw.find('"', index + 2)
+    if end < 0:
+        return None
+    event = raw[index + 2:end]
+    if "\\" in event:
+        return None
+    return event
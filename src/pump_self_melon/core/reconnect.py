@@ -0,0 +1,95 @@
+import random
+import time
+from typing import Any, Dict, Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class ReconnectPolicy:
+    """Exponential backoff with full jitter and a circuit breaker for reconnect loops
+
+    ``record_failure`` returns how long to wait before the next attempt, or ``None``
+    once ``max_attempts`` consecutive failures have been seen (``max_attempts=None``
+    retries forever). After ``failure_threshold`` consecutive failures the circuit
+    opens and attempts are held off for roughly ``cooldown`` seconds; the next attempt
+    after that is a half-open trial, and a success closes the circuit again.
+    """
+
+    def __init__(self, base_delay: float = 1.0, max_delay: float = 60.0, multiplier: float = 2.0,
+                 jitter: bool = True, max_attempts: Optional[int] = 10,
+                 failure_threshold: Optional[int] = 5, cooldown: float = 120.0):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.jitter = jitter
+        self.max_attempts = max_attempts
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+
+        self.attempts = 0
+        self.total_failures = 0
+        self.total_reconnects = 0
+        self.circuit_opens = 0
+        self.last_delay = 0.0
+
+        self._open_until: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        if self._open_until is None:
+            return CLOSED
+        if time.monotonic() < self._open_until:
+            return OPEN
+        return HALF_OPEN
+
+    @property
+    def exhausted(self) -> bool:
+        return self.max_attempts is not None and self.attempts >= self.max_attempts
+
+    def backoff(self, attempt: int) -> float:
+        """Delay for the given attempt number (1-based), before jitter is applied"""
+        return min(self.max_delay, self.base_delay * self.multiplier ** max(attempt - 1, 0))
+
+    def record_failure(self) -> Optional[float]:
+        """Register a failed attempt and get the delay before retrying"""
+        state = self.state
+        self.attempts += 1
+        self.total_failures += 1
+        if self.exhausted:
+            return None
+
+        ceiling = self.backoff(self.attempts)
+        delay = random.uniform(0, ceiling) if self.jitter else ceiling
+
+        trip = (self.failure_threshold is not None and self.attempts >= self.failure_threshold)
+        if state == HALF_OPEN or (state == CLOSED and trip):
+            # Spread the cooldown too so a fleet doesn't come back in lockstep
+            delay = random.uniform(self.cooldown / 2, self.cooldown) if self.jitter else self.cooldown
+            self._open_until = time.monotonic() + delay
+            self.circuit_opens += 1
+
+        self.last_delay = delay
+        return delay
+
+    def record_success(self):
+        """Register a successful connection, closing the circuit"""
+        if self.attempts:
+            self.total_reconnects += 1
+        self.attempts = 0
+        self._open_until = None
+
+    def reset(self):
+        self.attempts = 0
+        self._open_until = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "attempts": self.attempts,
+            "total_failures": self.total_failures,
+            "total_reconnects": self.total_reconnects,
+            "circuit_opens": self.circuit_opens,
+            "last_delay": self.last_delay,
+        }
@@ -0,0 +1,310 @@
+import asyncio
+import email.utils
+import heapq
+import logging
+import os
+import random
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, List, Optional, Tuple
+
+from . import codec
+from .reconnect import ReconnectPolicy
+
+logger = logging.getLogger(__name__)
+
+
+class RetryableError(Exception):
+    """A failure worth retrying, e.g. HTTP 429 or 5xx, optionally with the server's Retry-After"""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class RetryLater(Exception):
+    """Not a failure: the job can't run yet and should be tried again after ``delay`` seconds"""
+
+    def __init__(self, delay: float, message: str = "not ready yet"):
+        super().__init__(message)
+        self.delay = delay
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header, given as seconds or an HTTP date"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+class RetryJob:
+    __slots__ = ("key", "payload", "attempts", "due", "last_error")
+
+    def __init__(self, key: Hashable, payload: Any, attempts: int = 0, due: float = 0.0):
+        self.key = key
+        self.payload = payload
+        self.attempts = attempts
+        self.due = due
+        self.last_error: Optional[str] = None
+
+    def __repr__(self):
+        return f"<RetryJob {self.key!r} attempts={self.attempts}>"
+
+
+class RetryQueue:
+    """Retries failed operations in the background until they land or give up
+
+    ``submit`` files an operation that just failed under a key; submitting a key
+    that is already queued only updates its payload, so each operation is retried
+    once however often it is reported. A single worker task sends each job when it
+    is due by calling ``send(key, payload)``: ``True`` means done, ``False`` a
+    permanent failure, and a :class:`RetryableError` schedules the next attempt
+    after its ``retry_after`` if the server gave one, else after the ``policy``'s
+    jittered exponential backoff. Once ``policy.max_attempts`` attempts have failed
+    the job is moved to ``dead_letters``. :class:`RetryLater` puts a job off without
+    using up an attempt, for when it can't run yet rather than having failed.
+
+    With a ``path`` the pending jobs are written there (as JSON, so keys and
+    payloads must be JSON-friendly; tuple keys come back as tuples) and picked up
+    again after a restart.
+    """
+
+    def __init__(self, send: Optional[Callable[[Hashable, Any], Awaitable[bool]]] = None,
+                 policy: Optional[ReconnectPolicy] = None, path: Optional[str] = None,
+                 max_dead_letters: int = 1000, save_delay: float = 0.5):
+        self._send = send
+        self.policy = policy or ReconnectPolicy(base_delay=1.0, max_delay=300.0, max_attempts=8,
+                                                failure_threshold=None)
+        self.path = path
+        self.save_delay = save_delay
+        self.dead_letters: Deque[RetryJob] = deque(maxlen=max_dead_letters)
+
+        self._jobs: Dict[Hashable, RetryJob] = {}
+        self._schedule: List[Tuple[float, int, Hashable]] = []
+        self._sequence = 0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._save_timer: Optional[asyncio.TimerHandle] = None
+        self._save_tasks = set()
+
+        self.submitted = 0
+        self.retries = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.dead_lettered = 0
+        self.rate_limited = 0
+        self.deferred = 0
+
+        if path is not None:
+            self._load()
+
+    def bind(self, send: Callable[[Hashable, Any], Awaitable[bool]]):
+        """Set the coroutine that performs an attempt"""
+        self._send = send
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._jobs
+
+    def _load(self):
+        try:
+            with open(self.path, "rb") as file:
+                entries = codec.loads(file.read())
+        except FileNotFoundError:
+            return
+        except ValueError as e:
+            logger.error(f"Ignoring unreadable retry queue {self.path}: {e}")
+            return
+        now = time.monotonic()
+        for key, payload, attempts in entries:
+            key = tuple(key) if isinstance(key, list) else key
+            # Wall-clock deadlines don't survive a restart; retry everything soon
+            self._push(RetryJob(key, payload, attempts, now))
+        if self._jobs:
+            logger.info(f"Loaded {len(self._jobs)} pending retries from {self.path}")
+
+    def _push(self, job: RetryJob):
+        self._jobs[job.key] = job
+        self._sequence += 1
+        heapq.heappush(self._schedule, (job.due, self._sequence, job.key))
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def submit(self, key: Hashable, payload: Any = None, retry_after: Optional[float] = None,
+               error: Optional[str] = None) -> RetryJob:
+        """Queue a retry for an operation whose first attempt just failed"""
+        job = self._jobs.get(key)
+        if job is not None:
+            job.payload = payload
+            return job
+        self.submitted += 1
+        job = RetryJob(key, payload, attempts=1)
+        job.last_error = error
+        job.due = time.monotonic() + self._delay(job, retry_after)
+        self._push(job)
+        self._save_soon()
+        self.start()
+        return job
+
+    def cancel(self, key: Hashable) -> Optional[RetryJob]:
+        """Forget a queued job, e.g. because the operation has since succeeded or been superseded"""
+        job = self._jobs.pop(key, None)
+        if job is not None:
+            # Its schedule entry goes stale and is skipped when popped
+            self._save_soon()
+        return job
+
+    def _delay(self, job: RetryJob, retry_after: Optional[float]) -> float:
+        if retry_after is not None:
+            return retry_after
+        ceiling = self.policy.backoff(job.attempts)
+        return random.uniform(ceiling / 2, ceiling) if self.policy.jitter else ceiling
+
+    def start(self):
+        """Start the worker if there is anything to do; needs a running event loop"""
+        if self._worker is not None or not self._jobs:
+            return
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._wakeup = asyncio.Event()
+        self._worker = asyncio.create_task(self._run())
+
+    async def _run(self):
+        schedule = self._schedule
+        while True:
+            while not self._jobs:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+            due, _, key = schedule[0]
+            job = self._jobs.get(key)
+            if job is None or job.due != due:
+                heapq.heappop(schedule)
+                continue
+            wait = due - time.monotonic()
+            if wait > 0:
+                # Woken early if a sooner job arrives
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            heapq.heappop(schedule)
+            await self._attempt(job)
+
+    async def _attempt(self, job: RetryJob):
+        try:
+            done = await self._send(job.key, job.payload)
+        except RetryLater as e:
+            if self._jobs.get(job.key) is job:
+                self.deferred += 1
+                job.due = time.monotonic() + e.delay
+                self._push(job)
+            return
+        except RetryableError as e:
+            self.retries += 1
+            self._failed_attempt(job, str(e), e.retry_after)
+            return
+        except Exception as e:
+            self.retries += 1
+            self._failed_attempt(job, f"{type(e).__name__}: {e}", None)
+            return
+        self.retries += 1
+        if self._jobs.get(job.key) is not job:
+            # Cancelled while the attempt was running
+            return
+        del self._jobs[job.key]
+        if done:
+            self.succeeded += 1
+        else:
+            self.failed += 1
+            logger.warning(f"Retry of {job.key!r} failed permanently after {job.attempts + 1} attempts")
+        self._save_soon()
+
+    def _failed_attempt(self, job: RetryJob, error: str, retry_after: Optional[float]):
+        if self._jobs.get(job.key) is not job:
+            return
+        job.attempts += 1
+        job.last_error = error
+        if retry_after is not None:
+            self.rate_limited += 1
+        max_attempts = self.policy.max_attempts
+        if max_attempts is not None and job.attempts >= max_attempts:
+            del self._jobs[job.key]
+            self.dead_letters.append(job)
+            self.dead_lettered += 1
+            logger.error(f"Giving up on {job.key!r} after {job.attempts} attempts: {error}")
+        else:
+            job.due = time.monotonic() + self._delay(job, retry_after)
+            self._push(job)
+        self._save_soon()
+
+    def _save_soon(self):
+        if self.path is None or self._save_timer is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._save_timer = loop.call_later(self.save_delay, self._on_save_deadline)
+
+    def _on_save_deadline(self):
+        self._save_timer = None
+        task = asyncio.create_task(self.save())
+        self._save_tasks.add(task)
+        task.add_done_callback(self._save_tasks.discard)
+
+    async def save(self):
+        """Write the pending jobs to ``path`` now"""
+        if self.path is None:
+            return
+        if self._save_timer is not None:
+            self._save_timer.cancel()
+            self._save_timer = None
+        data = codec.dumps_bytes([[job.key, job.payload, job.attempts] for job in self._jobs.values()])
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, self._write, data)
+        except OSError as e:
+            logger.error(f"Failed to save retry queue {self.path}: {e}")
+
+    def _write(self, data: bytes):
+        temporary = self.path + ".tmp"
+        with open(temporary, "wb") as file:
+            file.write(data)
+        os.replace(temporary, self.path)
+
+    async def close(self):
+        """Stop the worker and save what is still pending"""
+        if self._worker is not None:
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+            self._worker = None
+        if self._save_tasks:
+            await asyncio.gather(*self._save_tasks, return_exceptions=True)
+        await self.save()
+
+    def get_stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "pending": len(self._jobs),
+            "next_due_in": max(0.0, min(job.due for job in self._jobs.values()) - now) if self._jobs else None,
+            "submitted": self.submitted,
+            "retries": self.retries,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "rate_limited": self.rate_limited,
+            "dead_lettered": self.dead_lettered,
+            "deferred": self.deferred,
+        }
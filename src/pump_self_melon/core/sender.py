@@ -0,0 +1,170 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+from . import codec
+from .utils import RateLimiter
+
+logger = logging.getLogger(__name__)
+
+
+class OutboundMessage:
+    __slots__ = ("room_id", "payload", "futures", "coalesce")
+
+    def __init__(self, room_id: str, payload: Dict[str, Any], future: asyncio.Future, coalesce: bool):
+        self.room_id = room_id
+        self.payload = payload
+        self.futures = [future]
+        self.coalesce = coalesce
+
+
+class _RoomLane:
+    __slots__ = ("priority", "normal", "task")
+
+    def __init__(self):
+        self.priority: Deque[OutboundMessage] = deque()
+        self.normal: Deque[OutboundMessage] = deque()
+        self.task: Optional[asyncio.Task] = None
+
+    def __len__(self):
+        return len(self.priority) + len(self.normal)
+
+
+class SendQueue:
+    """Per-connection outbound pipeline for ``sendMessage`` frames
+
+    Each room gets its own lane drained by a short-lived writer task, paced by a
+    per-room rate limiter so one busy room never holds up another: ``room_rate[0]``
+    messages per ``room_rate[1]`` seconds, evenly spaced unless ``room_burst`` lets
+    a few go out back to back (see :class:`RateLimiter`). Priority messages
+    skip ahead of everything queued for their room and are not subject to the queue
+    bound. With ``coalesce`` enabled, plain messages waiting for the same room and
+    username are merged into one frame.
+    """
+
+    def __init__(self, send: Optional[Callable[[str], Awaitable[None]]] = None, maxsize: int = 1000,
+                 room_rate: Tuple[int, float] = (5, 5.0), room_burst: int = 1, coalesce: bool = False,
+                 coalesce_separator: str = "\n", max_message_length: int = 500):
+        self._send = send
+        self.maxsize = maxsize
+        self.room_rate = room_rate
+        self.room_burst = room_burst
+        self.coalesce = coalesce
+        self.coalesce_separator = coalesce_separator
+        self.max_message_length = max_message_length
+
+        self.sent = 0
+        self.coalesced = 0
+        self.failed = 0
+
+        self._lanes: Dict[str, _RoomLane] = {}
+        self._limiter = RateLimiter(*room_rate, burst=room_burst)
+        self._space: Optional[asyncio.Semaphore] = None
+        self._depth = 0
+
+    def bind(self, send: Callable[[str], Awaitable[None]]):
+        """Set the coroutine used to write frames to the connection"""
+        self._send = send
+
+    @property
+    def depth(self) -> int:
+        return self._depth
+
+    async def put(self, room_id: str, payload: Dict[str, Any], priority: bool = False,
+                  coalesce: bool = True) -> asyncio.Future:
+        """Queue a ``sendMessage`` payload, returning a future resolved once it is written"""
+        if self._space is None:
+            self._space = asyncio.Semaphore(self.maxsize)
+        if not priority:
+            # Backpressure: wait for room in the bounded part of the queue
+            await self._space.acquire()
+
+        future = asyncio.get_running_loop().create_future()
+        item = OutboundMessage(room_id, payload, future, coalesce and self.coalesce and not priority)
+        if not priority:
+            future.add_done_callback(lambda _: self._space.release())
+
+        lane = self._lanes.get(room_id)
+        if lane is None:
+            lane = self._lanes[room_id] = _RoomLane()
+        (lane.priority if priority else lane.normal).append(item)
+        self._depth += 1
+
+        if lane.task is None or lane.task.done():
+            lane.task = asyncio.create_task(self._drain(room_id, lane))
+        return future
+
+    def _next(self, lane: _RoomLane) -> OutboundMessage:
+        source = lane.priority if lane.priority else lane.normal
+        item = source.popleft()
+        self._depth -= 1
+        if not item.coalesce:
+            return item
+
+        content = item.payload["message"]
+        while source and source[0].coalesce and source[0].payload.get("username") == item.payload.get("username"):
+            extra = source[0].payload["message"]
+            merged = f"{content}{self.coalesce_separator}{extra}"
+            if len(merged) > self.max_message_length:
+                break
+            content = merged
+            item.futures.extend(source.popleft().futures)
+            self._depth -= 1
+            self.coalesced += 1
+        item.payload = {**item.payload, "message": content}
+        return item
+
+    async def _drain(self, room_id: str, lane: _RoomLane):
+        try:
+            while len(lane):
+                await self._limiter.acquire(room_id)
+                # Pick after pacing so priority messages queued meanwhile go first
+                item = self._next(lane)
+                frame = f'423{codec.dumps(["sendMessage", item.payload])}'
+                try:
+                    await self._send(frame)
+                except asyncio.CancelledError:
+                    # Closed mid-write: the item is in neither deque, so close() can't fail it
+                    self.failed += len(item.futures)
+                    self._resolve(item.futures, exception=ConnectionError("Send queue closed"))
+                    raise
+                except Exception as e:
+                    self.failed += len(item.futures)
+                    self._resolve(item.futures, exception=e)
+                    continue
+                self.sent += 1
+                self._resolve(item.futures)
+        finally:
+            if not len(lane) and self._lanes.get(room_id) is lane:
+                del self._lanes[room_id]
+
+    @staticmethod
+    def _resolve(futures: List[asyncio.Future], exception: Optional[BaseException] = None):
+        for future in futures:
+            if future.done():
+                continue
+            if exception is None:
+                future.set_result(None)
+            else:
+                future.set_exception(exception)
+
+    def close(self):
+        """Cancel writers and fail anything still queued"""
+        error = ConnectionError("Send queue closed")
+        for lane in self._lanes.values():
+            if lane.task is not None:
+                lane.task.cancel()
+            for item in (*lane.priority, *lane.normal):
+                self._resolve(item.futures, exception=error)
+        self._lanes.clear()
+        self._depth = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "depth": self._depth,
+            "active_rooms": len(self._lanes),
+            "sent": self.sent,
+            "coalesced": self.coalesced,
+            "failed": self.failed,
+        }
@@ -0,0 +1,207 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import quote
+
+logger = logging.getLogger(__name__)
+
+BAN = "+"
+UNBAN = "-"
+
+
+class BanStore:
+    """Durable ban state in append-only logs, one per room
+
+    Each ban or unban appends a ``+<address>`` or ``-<address>`` line to the room's
+    log in ``directory``. A room's log is read into memory the first time that room
+    is asked about, so joining one room never pays for the others. A log without
+    unbans, which is what compaction leaves behind, is parsed with a single split;
+    loading hundreds of thousands of bans takes milliseconds. A truncated last line,
+    left by a crash mid-write, is dropped.
+
+    Records are buffered and written in batches, ``flush_delay`` seconds after the
+    first one, by a worker thread so the event loop never waits on the disk. Once a
+    log holds more than ``compact_ratio`` times as many lines as the room has live
+    bans (and at least ``compact_min``), it is rewritten as a snapshot and swapped
+    in atomically. With ``fsync`` each batch also survives a power loss, not just a
+    restart.
+    """
+
+    def __init__(self, directory: str, flush_delay: float = 0.5, compact_ratio: float = 2.0,
+                 compact_min: int = 10_000, fsync: bool = False):
+        self.directory = directory
+        self.flush_delay = flush_delay
+        self.compact_ratio = compact_ratio
+        self.compact_min = compact_min
+        self.fsync = fsync
+        os.makedirs(directory, exist_ok=True)
+
+        self._bans: Dict[str, Set[str]] = {}
+        self._log_lines: Dict[str, int] = {}
+        self._pending: List[Tuple[str, str, str]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks = set()
+        self._lock: Optional[asyncio.Lock] = None
+
+        self.writes = 0
+        self.records_written = 0
+        self.compactions = 0
+        self.skipped_lines = 0
+        self.load_time = 0.0
+
+    def path_for(self, room_id: str, suffix: str = ".log") -> str:
+        return os.path.join(self.directory, quote(room_id, safe="") + suffix)
+
+    def _room(self, room_id: str) -> Set[str]:
+        bans = self._bans.get(room_id)
+        if bans is None:
+            bans = self._bans[room_id] = self._load(room_id)
+        return bans
+
+    def _load(self, room_id: str) -> Set[str]:
+        started = time.perf_counter()
+        path = self.path_for(room_id)
+        try:
+            with open(path, "r", encoding="utf-8", newline="") as file:
+                data = file.read()
+        except FileNotFoundError:
+            data = ""
+
+        end = data.rfind("\n") + 1
+        if end < len(data):
+            # No trailing newline: the last write was cut short. Cut it off, or the
+            # next append would complete it into a bogus record
+            os.truncate(path, len(data[:end].encode("utf-8")))
+            data = data[:end]
+            self.skipped_lines += 1
+
+        lines = data.count("\n")
+        if not data:
+            bans = set()
+        elif data[0] == BAN and data.count("\n" + BAN) == lines - 1:
+            # Bans only: every line is "+<address>"
+            bans = set(data[1:-1].split("\n" + BAN))
+            bans.discard("")
+        else:
+            bans = set()
+            for line in data.split("\n"):
+                op, address = line[:1], line[1:]
+                if op == BAN and address:
+                    bans.add(address)
+                elif op == UNBAN:
+                    bans.discard(address)
+                elif line:
+                    self.skipped_lines += 1
+        self._log_lines[room_id] = lines
+
+        elapsed = time.perf_counter() - started
+        self.load_time += elapsed
+        logger.info(f"Loaded {len(bans)} bans for room {room_id} in {elapsed * 1000:.1f}ms")
+        return bans
+
+    def __len__(self) -> int:
+        return sum(len(addresses) for addresses in self._bans.values())
+
+    def banned(self, room_id: str) -> Set[str]:
+        """A copy of the addresses banned in ``room_id``"""
+        return set(self._room(room_id))
+
+    def is_banned(self, room_id: str, address: str) -> bool:
+        return address in self._room(room_id)
+
+    def record_ban(self, room_id: str, address: str):
+        self._room(room_id).add(address)
+        self._record(BAN, room_id, address)
+
+    def record_unban(self, room_id: str, address: str):
+        self._room(room_id).discard(address)
+        self._record(UNBAN, room_id, address)
+
+    def _record(self, op: str, room_id: str, address: str):
+        self._pending.append((op, room_id, address))
+        if self._timer is None:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                # No loop to schedule on; the record goes out with the next flush()
+                return
+            self._timer = loop.call_later(self.flush_delay, self._on_deadline)
+
+    def _on_deadline(self):
+        self._timer = None
+        task = asyncio.create_task(self.flush())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def flush(self):
+        """Write everything recorded so far, compacting logs that have grown too long"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if not self._pending:
+                return
+            batch, self._pending = self._pending, []
+
+            appends: Dict[str, List[str]] = {}
+            for op, room_id, address in batch:
+                appends.setdefault(room_id, []).append(op + address + "\n")
+            writes = []
+            line_counts = {}
+            for room_id, records in appends.items():
+                lines = self._log_lines.get(room_id, 0) + len(records)
+                live = self._bans[room_id]
+                if lines >= self.compact_min and lines > len(live) * self.compact_ratio:
+                    # The live set already reflects the batch, since it is updated on record
+                    writes.append((room_id, [BAN + address + "\n" for address in live], True))
+                    line_counts[room_id] = len(live)
+                else:
+                    writes.append((room_id, records, False))
+                    line_counts[room_id] = lines
+
+            try:
+                await asyncio.get_running_loop().run_in_executor(None, self._write, writes)
+            except OSError as e:
+                # Keep the records for the next attempt
+                self._pending[:0] = batch
+                logger.error(f"Failed to write ban store {self.directory}: {e}")
+                return
+            self._log_lines.update(line_counts)
+            self.compactions += sum(1 for _, _, replace in writes if replace)
+            self.writes += 1
+            self.records_written += len(batch)
+
+    def _write(self, writes: List[Tuple[str, List[str], bool]]):
+        for room_id, records, replace in writes:
+            path = self.path_for(room_id)
+            target = path + ".compact" if replace else path
+            with open(target, "w" if replace else "a", encoding="utf-8", newline="") as file:
+                file.write("".join(records))
+                if self.fsync or replace:
+                    file.flush()
+                    os.fsync(file.fileno())
+            if replace:
+                os.replace(target, path)
+
+    async def close(self):
+        """Write any buffered records and wait for scheduled flushes"""
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self.flush()
+
+    def get_stats(self):
+        return {
+            "bans": len(self),
+            "rooms_loaded": len(self._bans),
+            "log_lines": sum(self._log_lines.values()),
+            "pending": len(self._pending),
+            "writes": self.writes,
+            "records_written": self.records_written,
+            "compactions": self.compactions,
+            "skipped_lines": self.skipped_lines,
+            "load_time": self.load_time,
+        }
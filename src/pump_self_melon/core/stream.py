@@ -0,0 +1,114 @@
+import asyncio
+from collections import deque
+from typing import Any, Callable, Deque, Optional
+
+# What put() does when the buffer is full
+OVERFLOW_BLOCK = "block"
+OVERFLOW_DROP_OLDEST = "drop_oldest"
+OVERFLOW_DROP_NEWEST = "drop_newest"
+
+
+class Stream:
+    """Bounded async-iterable buffer between a producer and one consumer
+
+    ``overflow`` decides what happens when the buffer is full: ``"block"`` makes the
+    producer wait for the consumer, ``"drop_oldest"`` evicts the oldest buffered item
+    and ``"drop_newest"`` discards the incoming one. Items rejected by ``predicate``
+    are never buffered. Iteration ends once the stream is closed and drained.
+    """
+
+    def __init__(self, maxsize: int = 1000, overflow: str = OVERFLOW_BLOCK,
+                 predicate: Optional[Callable[[Any], bool]] = None,
+                 on_close: Optional[Callable[["Stream"], None]] = None):
+        if overflow not in (OVERFLOW_BLOCK, OVERFLOW_DROP_OLDEST, OVERFLOW_DROP_NEWEST):
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+        self.maxsize = maxsize
+        self.overflow = overflow
+        self.predicate = predicate
+        self.closed = False
+
+        self.received = 0
+        self.dropped = 0
+
+        self._buffer: Deque[Any] = deque()
+        self._on_close = on_close
+        self._readable: Optional[asyncio.Event] = None
+        self._writable: Optional[asyncio.Event] = None
+
+    def __len__(self):
+        return len(self._buffer)
+
+    def _events(self):
+        if self._readable is None:
+            self._readable = asyncio.Event()
+            self._writable = asyncio.Event()
+            self._writable.set()
+
+    async def put(self, item: Any) -> bool:
+        """Offer an item, returning whether it was buffered"""
+        if self.closed or (self.predicate is not None and not self.predicate(item)):
+            return False
+        self._events()
+
+        buffer = self._buffer
+        if len(buffer) >= self.maxsize:
+            if self.overflow == OVERFLOW_DROP_NEWEST:
+                self.dropped += 1
+                return False
+            if self.overflow == OVERFLOW_DROP_OLDEST:
+                buffer.popleft()
+                self.dropped += 1
+            else:
+                while len(buffer) >= self.maxsize and not self.closed:
+                    self._writable.clear()
+                    await self._writable.wait()
+                if self.closed:
+                    return False
+
+        buffer.append(item)
+        self.received += 1
+        self._readable.set()
+        return True
+
+    async def get(self) -> Any:
+        """Next item, waiting for one if needed; raises StopAsyncIteration once closed"""
+        self._events()
+        while not self._buffer:
+            if self.closed:
+                raise StopAsyncIteration
+            self._readable.clear()
+            await self._readable.wait()
+        item = self._buffer.popleft()
+        self._writable.set()
+        return item
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        return await self.get()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Stop accepting items; buffered items can still be read"""
+        if self.closed:
+            return
+        self.closed = True
+        if self._readable is not None:
+            self._readable.set()
+            self._writable.set()
+        if self._on_close is not None:
+            self._on_close(self)
+
+    def get_stats(self):
+        return {
+            "buffered": len(self._buffer),
+            "received": self.received,
+            "dropped": self.dropped,
+            "closed": self.closed,
+        }
@@ -0,0 +1,155 @@
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class SlowHandlerError(TimeoutError):
+    """A handler ran past its time budget, reported through the ``error`` event"""
+
+    def __init__(self, event_name: str, handler: Callable, elapsed: float, timed_out: bool,
+                 quarantined: bool = False):
+        self.event_name = event_name
+        self.handler = handler
+        self.elapsed = elapsed
+        self.timed_out = timed_out
+        self.quarantined = quarantined
+        name = getattr(handler, "__qualname__", repr(handler))
+        action = "timed out" if timed_out else "was slow"
+        suffix = ", quarantined" if quarantined else ""
+        super().__init__(f"Handler {name} for '{event_name}' {action} after {elapsed:.3f}s{suffix}")
+
+
+class _HandlerStats:
+    __slots__ = ("calls", "failures", "timeouts", "slow", "total_time", "max_time", "strikes",
+                 "quarantined_until", "skipped")
+
+    def __init__(self):
+        self.calls = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.slow = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.strikes = 0
+        self.quarantined_until: Optional[float] = None
+        self.skipped = 0
+
+
+class HandlerSupervisor:
+    """Time budgets for event handlers
+
+    Each handler call is bounded by a timeout, looked up per handler, then per event,
+    then the default; a handler that runs past it is cancelled. Calls that finish but
+    take longer than ``slow_threshold`` are flagged as slow. After ``quarantine_after``
+    consecutive timeouts or slow calls the handler is skipped for ``quarantine_for``
+    seconds (``None`` keeps it out until ``release`` is called).
+    """
+
+    def __init__(self, timeout: Optional[float] = None, event_timeouts: Optional[Dict[str, float]] = None,
+                 slow_threshold: Optional[float] = None, quarantine_after: Optional[int] = 3,
+                 quarantine_for: Optional[float] = 300.0):
+        self.timeout = timeout
+        self.event_timeouts = dict(event_timeouts or {})
+        self.slow_threshold = slow_threshold
+        self.quarantine_after = quarantine_after
+        self.quarantine_for = quarantine_for
+
+        self._handler_timeouts: Dict[Callable, Optional[float]] = {}
+        self._stats: Dict[Callable, _HandlerStats] = {}
+
+    def set_timeout(self, handler: Callable, timeout: Optional[float]):
+        """Give a single handler its own timeout"""
+        self._handler_timeouts[handler] = timeout
+
+    def timeout_for(self, event_name: str, handler: Callable) -> Optional[float]:
+        if handler in self._handler_timeouts:
+            return self._handler_timeouts[handler]
+        return self.event_timeouts.get(event_name, self.timeout)
+
+    def is_quarantined(self, handler: Callable) -> bool:
+        stats = self._stats.get(handler)
+        if stats is None or stats.quarantined_until is None:
+            return False
+        if time.monotonic() >= stats.quarantined_until:
+            # Back on probation: one more overrun puts it straight back
+            stats.quarantined_until = None
+            stats.strikes = max((self.quarantine_after or 1) - 1, 0)
+            return False
+        return True
+
+    def release(self, handler: Callable):
+        """Lift a quarantine early"""
+        stats = self._stats.get(handler)
+        if stats is not None:
+            stats.quarantined_until = None
+            stats.strikes = 0
+
+    async def run(self, event_name: str, handler: Callable, *args, **kwargs) -> Optional[SlowHandlerError]:
+        """Call a handler within its budget, returning a SlowHandlerError if it overran
+
+        Exceptions raised by the handler itself are logged and swallowed, as with
+        unsupervised dispatch.
+        """
+        stats = self._stats.get(handler)
+        if stats is None:
+            stats = self._stats[handler] = _HandlerStats()
+        if stats.quarantined_until is not None and self.is_quarantined(handler):
+            stats.skipped += 1
+            return None
+
+        timeout = self.timeout_for(event_name, handler)
+        started = time.monotonic()
+        timed_out = False
+        try:
+            if timeout is None:
+                await handler(*args, **kwargs)
+            else:
+                await asyncio.wait_for(handler(*args, **kwargs), timeout)
+        except asyncio.TimeoutError:
+            timed_out = True
+        except Exception as e:
+            stats.failures += 1
+            logger.debug(f"Handler {getattr(handler, '__qualname__', handler)} failed: {e}")
+        elapsed = time.monotonic() - started
+
+        stats.calls += 1
+        stats.total_time += elapsed
+        if elapsed > stats.max_time:
+            stats.max_time = elapsed
+
+        if timed_out:
+            stats.timeouts += 1
+        elif self.slow_threshold is not None and elapsed > self.slow_threshold:
+            stats.slow += 1
+        else:
+            stats.strikes = 0
+            return None
+
+        stats.strikes += 1
+        quarantined = self.quarantine_after is not None and stats.strikes >= self.quarantine_after
+        if quarantined:
+            stats.quarantined_until = (float("inf") if self.quarantine_for is None
+                                       else time.monotonic() + self.quarantine_for)
+        error = SlowHandlerError(event_name, handler, elapsed, timed_out, quarantined)
+        logger.warning(str(error))
+        return error
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-handler call counts and timings, keyed by qualified name"""
+        report = {}
+        for handler, stats in self._stats.items():
+            name = getattr(handler, "__qualname__", repr(handler))
+            report[name] = {
+                "calls": stats.calls,
+                "failures": stats.failures,
+                "timeouts": stats.timeouts,
+                "slow": stats.slow,
+                "skipped": stats.skipped,
+                "avg_time": stats.total_time / stats.calls if stats.calls else None,
+                "max_time": stats.max_time,
+                "quarantined": stats.quarantined_until is not None,
+            }
+        return report
@@ -1,5 +1,7 @@
 import asyncio
-from typing import Callable, Any, Dict, List
+import time
+from collections import OrderedDict
+from typing import Callable, Any, Dict, Hashable, List, Tuple
 
 class EventEmitter:
     def __init__(self):
@@ -35,21 +37,78 @@ class EventEmitter:
                 await asyncio.gather(*tasks, return_exceptions=True)
 
 class RateLimiter:
-    def __init__(self, max_calls: int = 5, time_window: int = 60):
+    """Keyed GCRA (token bucket) rate limiter
+
+    Sustains ``max_calls`` per ``time_window`` seconds for each key, one call every
+    ``time_window / max_calls`` seconds. By default calls are paced evenly, so no
+    stretch of ``time_window`` seconds admits more than ``max_calls``. ``burst``
+    lets up to that many calls go through back to back after a quiet spell, on top
+    of the sustained rate: a window may then admit ``max_calls + burst - 1``.
+
+    Every key costs one theoretical-arrival-time float, acquire is O(1), concurrent
+    waiters on a key are woken in FIFO order because each one reserves its slot up
+    front, and keys that have gone idle are evicted lazily.
+    """
+
+    def __init__(self, max_calls: int = 5, time_window: float = 60, burst: int = 1):
+        if burst < 1:
+            raise ValueError("burst must be at least 1")
         self.max_calls = max_calls
         self.time_window = time_window
-        self.calls = []
-    
-    async def acquire(self):
-        now = asyncio.get_event_loop().time()
-        
-        self.calls = [call_time for call_time in self.calls if now - call_time < self.time_window]
-        
-        if len(self.calls) >= self.max_calls:
-            sleep_time = self.time_window - (now - self.calls[0])
-            if sleep_time > 0:
-                await asyncio.sleep(sleep_time)
-                return await self.acquire()
-        
-        self.calls.append(now)
-        return True
\ No newline at end of file
+        self.burst = burst
+        self.emission_interval = time_window / max_calls
+        self.burst_tolerance = self.emission_interval * (burst - 1)
+        # key -> theoretical arrival time, oldest update first
+        self._tats: "OrderedDict[Hashable, float]" = OrderedDict()
+
+    def __len__(self):
+        return len(self._tats)
+
+    def _evict_idle(self, now: float):
+        # A key whose TAT has passed is indistinguishable from a fresh one
+        tats = self._tats
+        while tats:
+            key = next(iter(tats))
+            if tats[key] > now:
+                break
+            del tats[key]
+
+    def _reserve(self, key: Hashable, now: float) -> Tuple[float, float]:
+        tat = max(self._tats.get(key, now), now)
+        new_tat = tat + self.emission_interval
+        self._tats[key] = new_tat
+        self._tats.move_to_end(key)
+        return self._wait(tat, now), new_tat
+
+    def _wait(self, tat: float, now: float) -> float:
+        wait = tat - self.burst_tolerance - now
+        # Summed emission intervals drift by a few ULPs; don't turn that into a refusal
+        return wait if wait > 1e-9 else 0.0
+
+    def delay(self, key: Hashable = None) -> float:
+        """Seconds until ``key`` could acquire without waiting"""
+        now = time.monotonic()
+        return self._wait(max(self._tats.get(key, now), now), now)
+
+    def try_acquire(self, key: Hashable = None) -> bool:
+        """Take a slot for ``key`` if one is free right now, without waiting"""
+        now = time.monotonic()
+        self._evict_idle(now)
+        if self.delay(key) > 0:
+            return False
+        self._reserve(key, now)
+        return True
+
+    async def acquire(self, key: Hashable = None):
+        now = time.monotonic()
+        self._evict_idle(now)
+        wait, reserved_tat = self._reserve(key, now)
+        if wait > 0:
+            try:
+                await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                # Hand the slot back if nobody has queued behind us
+                if self._tats.get(key) == reserved_tat:
+                    self._tats[key] = reserved_tat - self.emission_interval
+                raise
+        return True
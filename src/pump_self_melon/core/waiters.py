@@ -0,0 +1,77 @@
+import asyncio
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+
+class _Waiter:
+    __slots__ = ("future", "check")
+
+    def __init__(self, future: asyncio.Future, check: Optional[Callable[..., bool]]):
+        self.future = future
+        self.check = check
+
+
+class WaiterRegistry:
+    """One-shot waiters for events, indexed by event name and a lookup key
+
+    Each waiter is filed under a single key (``None`` for "any"). ``resolve`` only
+    looks at the buckets for the keys it is given, so an event costs the number of
+    candidate keys plus the waiters actually filed under them, not the total number
+    pending. Waiters remove themselves when they resolve, time out or are cancelled.
+    """
+
+    def __init__(self):
+        self._buckets: Dict[str, Dict[Hashable, List[_Waiter]]] = {}
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def pending(self, event_name: str) -> int:
+        return sum(len(waiters) for waiters in self._buckets.get(event_name, {}).values())
+
+    async def wait(self, event_name: str, key: Hashable = None, check: Optional[Callable[..., bool]] = None,
+                   timeout: Optional[float] = None) -> Any:
+        future = asyncio.get_running_loop().create_future()
+        waiter = _Waiter(future, check)
+        self._buckets.setdefault(event_name, {}).setdefault(key, []).append(waiter)
+        self._count += 1
+        try:
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            self._remove(event_name, key, waiter)
+
+    def _remove(self, event_name: str, key: Hashable, waiter: _Waiter):
+        buckets = self._buckets.get(event_name)
+        waiters = buckets.get(key) if buckets else None
+        if not waiters or waiter not in waiters:
+            return
+        waiters.remove(waiter)
+        self._count -= 1
+        if not waiters:
+            del buckets[key]
+            if not buckets:
+                del self._buckets[event_name]
+
+    def resolve(self, event_name: str, args: Tuple[Any, ...], keys: Iterable[Hashable] = (None,)) -> int:
+        """Complete the waiters for an event whose check passes, returning how many"""
+        buckets = self._buckets.get(event_name)
+        if not buckets:
+            return 0
+        result = args[0] if len(args) == 1 else args
+        resolved = 0
+        for key in keys:
+            waiters = buckets.get(key)
+            if not waiters:
+                continue
+            for waiter in tuple(waiters):
+                if waiter.future.done():
+                    continue
+                try:
+                    if waiter.check is not None and not waiter.check(*args):
+                        continue
+                except Exception as e:
+                    waiter.future.set_exception(e)
+                    continue
+                waiter.future.set_result(result)
+                resolved += 1
+        return resolved
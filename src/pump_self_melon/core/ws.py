@@ -1,53 +1,34 @@
 import asyncio
-from typing import Callable, Any, Dict, List
-
-class EventEmitter:
-    def __init__(self):
-        self._events: Dict[str, List[Callable]] = {}
-    
-    def on(self, event: str, handler: Callable):
-        if event not in self._events:
-            self._events[event] = []
-        self._events[event].append(handler)
-    
-    def off(self, event: str, handler: Callable):
-        if event in self._events:
-            try:
-                self._events[event].remove(handler)
-            except ValueError:
-                pass
-    
-    async def emit(self, event: str, *args, **kwargs):
-        if event in self._events:
-            tasks = []
-            for handler in self._events[event]:
-                if asyncio.iscoroutinefunction(handler):
-                    tasks.append(handler(*args, **kwargs))
-                else:
-                    tasks.append(asyncio.create_task(asyncio.coroutine(lambda: handler(*args, **kwargs))()))
-            
-            if tasks:
-                await asyncio.gather(*tasks, return_exceptions=True)
-
-class RateLimiter:
-    def __init__(self, max_calls: int = 5, time_window: int = 60):
-        self.max_calls = max_calls
-        self.time_window = time_window
-        self.calls = []
-    
-    async def acquire(self):
-        now = asyncio.get_event_loop().time()
-        
-        self.calls = [call_time for call_time in self.calls if now - call_time < self.time_window]
-        
-        if len(self.calls) >= self.max_calls:
-            sleep_time = self.time_window - (now - self.calls[0])
-            if sleep_time > 0:
-                await asyncio.sleep(sleep_time)
-                return await self.acquire()
-        
-        self.calls.append(now)
-        return True
+import logging
+import time
+from typing import Awaitable, Callable, Optional
+
+import websockets
+
+from . import codec
+from .reconnect import ReconnectPolicy
+
+logger = logging.getLogger(__name__)
+
+
+class WebSocketClient:
+    def __init__(self, url: str, bot_token: str, room_id: str, bot_username: str,
+                 default_username: Optional[str] = None,
+                 message_handler: Optional[Callable[[str], Awaitable[None]]] = None,
+                 auth_timeout: float = 10.0, reconnect_policy: Optional[ReconnectPolicy] = None):
+        self.url = url
+        self.bot_token = bot_token
+        self.room_id = room_id
+        self.bot_username = bot_username
+        self.default_username = default_username or bot_username
+        self.message_handler = message_handler
+        self.auth_timeout = auth_timeout
+        self.reconnect_policy = reconnect_policy or ReconnectPolicy()
+        self.websocket = None
+        self.is_authenticated = False
+
+    async def connect(self) -> bool:
+        try:
             logger.info("Connecting to %s", self.url)
             self.websocket = await websockets.connect(self.url)
             logger.info("Connection established")
@@ -59,22 +40,36 @@ class RateLimiter:
     async def send_initial_message(self):
         timestamp = int(time.time() * 1000)
         payload = {"origin": "https://pump.fun", "timestamp": timestamp, "token": self.bot_token}
-        message = f'40{json.dumps(payload)}'
+        message = f'40{codec.dumps(payload)}'
         logger.info("Sending authentication message")
         await self.websocket.send(message)
 
+    async def wait_for_authentication(self, timeout: Optional[float] = None):
+        async def read_until_authenticated():
+            while True:
+                message = await self.websocket.recv()
+                if self.check_authentication(message):
+                    return
+                if message == "2":
+                    await self.websocket.send("3")
+                elif self.message_handler:
+                    await self.message_handler(message)
+
+        self.is_authenticated = False
+        await asyncio.wait_for(read_until_authenticated(), timeout=timeout or self.auth_timeout)
+
     async def join_room(self, room_id: Optional[str] = None, username: Optional[str] = None):
         room = room_id or self.room_id
         user = username or self.default_username
         payload = {"roomId": room, "username": user}
-        message = f'420{json.dumps(["joinRoom", payload])}'
+        message = f'420{codec.dumps(["joinRoom", payload])}'
         logger.info("Joining room %s as %s", room, user)
         await self.websocket.send(message)
 
     async def send_message(self, message_text: str):
         try:
             payload = {"roomId": self.room_id, "message": message_text, "username": self.bot_username}
-            message = f'423{json.dumps(["sendMessage", payload])}'
+            message = f'423{codec.dumps(["sendMessage", payload])}'
             logger.info("Sending message to room %s", self.room_id)
             await self.websocket.send(message)
         except Exception as exc:
@@ -87,7 +82,7 @@ class RateLimiter:
                 payload["replyToId"] = reply_to_id
             if reply_preview:
                 payload["replyPreview"] = reply_preview
-            message = f'423{json.dumps(["sendMessage", payload])}'
+            message = f'423{codec.dumps(["sendMessage", payload])}'
             logger.info("Sending reply in room %s", self.room_id)
             await self.websocket.send(message)
         except Exception as exc:
@@ -97,7 +92,7 @@ class RateLimiter:
         try:
             if message.startswith("430"):
                 json_part = message[3:]
-                parsed = json.loads(json_part)
+                parsed = codec.loads(json_part)
                 if isinstance(parsed, list) and parsed:
                     first = parsed[0]
                     if isinstance(first, dict) and "authenticated" in first:
@@ -107,7 +102,7 @@ class RateLimiter:
                             return True
                         logger.error("Authentication failed")
                         raise SystemExit("Authentication failed")
-        except json.JSONDecodeError:
+        except ValueError:
             logger.debug("Received non-JSON authentication payload")
         except Exception as exc:
             logger.error("Authentication check error: %s", exc)
@@ -145,47 +140,35 @@ class RateLimiter:
         self.is_authenticated = False
 
     async def run(self):
-        max_reconnect_attempts = 10
-        reconnect_delay = 5
-        attempt = 0
+        policy = self.reconnect_policy
+        policy.reset()
 
-        while attempt < max_reconnect_attempts:
+        while True:
             try:
-                if attempt > 0:
-                    logger.info("Reconnection attempt %d/%d", attempt, max_reconnect_attempts)
-                    await asyncio.sleep(reconnect_delay)
-
-                if not await self.connect():
-                    attempt += 1
-                    continue
-
-                attempt = 0
-
-                try:
-                    await self.send_initial_message()
-                    await asyncio.sleep(1)
-                    await self.join_room()
-                    await self.listen_for_messages()
-                except (websockets.exceptions.ConnectionClosed, websockets.exceptions.WebSocketException) as exc:
-                    logger.warning("Connection lost: %s", exc)
-                    await self.disconnect()
-                    attempt += 1
-                    continue
-                except Exception as exc:
-                    logger.error("Runtime error: %s", exc)
+                if await self.connect():
+                    try:
+                        await self.send_initial_message()
+                        await self.wait_for_authentication()
+                        await self.join_room()
+                        policy.record_success()
+                        await self.listen_for_messages()
+                    except (websockets.exceptions.ConnectionClosed, websockets.exceptions.WebSocketException) as exc:
+                        logger.warning("Connection lost: %s", exc)
+                    except Exception as exc:
+                        logger.error("Runtime error: %s", exc)
                     await self.disconnect()
-                    attempt += 1
-                    continue
 
             except KeyboardInterrupt:
                 logger.info("Termination requested by user")
                 break
             except Exception as exc:
                 logger.error("Unexpected error: %s", exc)
-                attempt += 1
-                await asyncio.sleep(reconnect_delay)
 
-        if attempt >= max_reconnect_attempts:
-            logger.error("Exceeded maximum reconnection attempts (%d)", max_reconnect_attempts)
+            delay = policy.record_failure()
+            if delay is None:
+                logger.error("Exceeded maximum reconnection attempts (%d)", policy.max_attempts)
+                break
+            logger.info("Reconnection attempt %d in %.1fs (circuit %s)", policy.attempts, delay, policy.state)
+            await asyncio.sleep(delay)
 
         await self.disconnect()
@@ -1,41 +1,338 @@
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Hashable, List, Tuple
 from datetime import datetime
 
+# raw_data retention modes for messages built from frames
+RAW_DATA_FULL = "full"
+RAW_DATA_COMPACT = "compact"
+RAW_DATA_NONE = "none"
+
+# Payload keys already stored on Message attributes, dropped in compact mode
+_MESSAGE_FIELDS = frozenset(("id", "message", "username", "userAddress", "roomId", "timestamp", "messageType"))
+
 class User:
+    __slots__ = ("username", "address")
+
     def __init__(self, username: str, address: Optional[str] = None):
         self.username = username
         self.address = address
-    
+
     def __str__(self):
         return self.username
-    
+
     def __repr__(self):
         return f"<User username={self.username} address={self.address}>"
 
 class Room:
+    __slots__ = ("id",)
+
     def __init__(self, room_id: str):
         self.id = room_id
-    
+
     def __str__(self):
         return self.id
-    
+
     def __repr__(self):
         return f"<Room id={self.id}>"
 
+_UNSET = object()
+
+class _PayloadField:
+    """Message attribute read from the decoded payload on first access, then cached"""
+
+    def __init__(self, key: str, default: Any):
+        self.key = key
+        self.default = default
+        self.slot = None
+
+    def __set_name__(self, owner, name):
+        self.slot = owner.__dict__["_" + name]
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        value = self.slot.__get__(instance, owner)
+        if value is _UNSET:
+            value = instance._payload.get(self.key, self.default)
+            self.slot.__set__(instance, value)
+        return value
+
+    def __set__(self, instance, value):
+        self.slot.__set__(instance, value)
+
 class Message:
-    def __init__(self, id: str, content: str, author: User, room: Room, 
+    """A chat message
+
+    Messages built by the client wrap the decoded ``newMessage`` payload and only
+    materialize fields when they are first read, so handlers that look at
+    ``content`` and move on never pay for the author, room or timestamp objects.
+    Timestamps are kept as integer milliseconds (``timestamp_ms``) and converted to
+    ``datetime`` on demand.
+    """
+
+    __slots__ = ("_payload", "_cache", "_id", "_content", "_author", "_room",
+                 "_timestamp_ms", "_timestamp", "_message_type", "_reply_to_id", "_raw_data")
+
+    def __init__(self, id: str, content: str, author: User, room: Room,
                  timestamp: Optional[datetime] = None, message_type: str = "regular",
-                 raw_data: Optional[Dict[str, Any]] = None):
-        self.id = id
-        self.content = content
-        self.author = author
-        self.room = room
-        self.timestamp = timestamp or datetime.now()
-        self.message_type = message_type
-        self.raw_data = raw_data or {}
-    
+                 raw_data: Optional[Dict[str, Any]] = None, reply_to_id: Optional[str] = None):
+        self._payload = None
+        self._cache = None
+        self._id = id
+        self._content = content
+        self._author = author
+        self._room = room
+        self._timestamp_ms = _UNSET
+        self._timestamp = timestamp or datetime.now()
+        self._message_type = message_type
+        self._reply_to_id = reply_to_id or (raw_data or {}).get("replyToId") or None
+        self._raw_data = raw_data
+
+    @classmethod
+    def from_payload(cls, payload: Dict[str, Any], room: Optional[Room] = None,
+                     cache: Optional["ModelCache"] = None) -> "Message":
+        """Wrap a decoded ``newMessage`` payload without materializing any fields"""
+        message = cls.__new__(cls)
+        message._payload = payload
+        message._cache = cache
+        message._id = _UNSET
+        message._content = _UNSET
+        message._author = _UNSET
+        message._room = room if room is not None else _UNSET
+        message._timestamp_ms = _UNSET
+        message._timestamp = _UNSET
+        message._message_type = _UNSET
+        message._reply_to_id = _UNSET
+        message._raw_data = payload
+        return message
+
+    id = _PayloadField("id", "")
+    content = _PayloadField("message", "")
+    message_type = _PayloadField("messageType", "regular")
+
+    @property
+    def author(self) -> User:
+        author = self._author
+        if author is _UNSET:
+            username = self._payload.get("username", "unknown")
+            address = self._payload.get("userAddress")
+            author = self._cache.user(username, address) if self._cache else User(username, address)
+            self._author = author
+        return author
+
+    @author.setter
+    def author(self, value: User):
+        self._author = value
+
+    @property
+    def room(self) -> Room:
+        room = self._room
+        if room is _UNSET:
+            room_id = self._payload.get("roomId", "")
+            room = self._cache.room(room_id) if self._cache else Room(room_id)
+            self._room = room
+        return room
+
+    @room.setter
+    def room(self, value: Room):
+        self._room = value
+
+    @property
+    def timestamp_ms(self) -> Optional[int]:
+        """Server timestamp in milliseconds since the epoch"""
+        value = self._timestamp_ms
+        if value is _UNSET:
+            if self._payload is not None:
+                raw = self._payload.get("timestamp")
+                value = int(raw) if isinstance(raw, (int, float)) and not isinstance(raw, bool) else None
+            else:
+                value = int(self._timestamp.timestamp() * 1000)
+            self._timestamp_ms = value
+        return value
+
+    @property
+    def timestamp(self) -> datetime:
+        timestamp = self._timestamp
+        if timestamp is _UNSET:
+            timestamp = None
+            timestamp_ms = self.timestamp_ms
+            if timestamp_ms:
+                try:
+                    timestamp = datetime.fromtimestamp(timestamp_ms / 1000)
+                except (OverflowError, OSError, ValueError):
+                    pass
+            # Payloads without a usable timestamp fall back to when it was first read
+            timestamp = timestamp or datetime.now()
+            self._timestamp = timestamp
+        return timestamp
+
+    @timestamp.setter
+    def timestamp(self, value: datetime):
+        self._timestamp = value
+        self._timestamp_ms = _UNSET if self._payload is None else int(value.timestamp() * 1000)
+
+    @property
+    def raw_data(self) -> Dict[str, Any]:
+        # Not stored at all when the client drops raw payloads
+        if self._raw_data is None:
+            return {}
+        return self._raw_data
+
+    @raw_data.setter
+    def raw_data(self, value: Optional[Dict[str, Any]]):
+        self._raw_data = value
+
+    @property
+    def reply_to_id(self) -> Optional[str]:
+        """ID of the message this one replies to, if any"""
+        # Kept apart from raw_data, which the client may trim or drop
+        value = self._reply_to_id
+        if value is _UNSET:
+            value = self._payload.get("replyToId") or None
+            self._reply_to_id = value
+        return value
+
+    @reply_to_id.setter
+    def reply_to_id(self, value: Optional[str]):
+        self._reply_to_id = value
+
+    def materialize(self, raw_data: str = RAW_DATA_FULL) -> "Message":
+        """Build every field now and release the payload according to a raw_data mode"""
+        if self._payload is not None:
+            # Reading each attribute caches it on the instance
+            for name in ("id", "content", "author", "room", "message_type", "reply_to_id",
+                         "timestamp_ms", "timestamp"):
+                getattr(self, name)
+            self._raw_data = compact_raw_data(self._payload, raw_data)
+            self._payload = None
+            self._cache = None
+        return self
+
+    def __reduce__(self):
+        return (Message, (self.id, self.content, self.author, self.room,
+                          self.timestamp, self.message_type, self._raw_data, self.reply_to_id))
+
     def __str__(self):
         return self.content
-    
+
     def __repr__(self):
-        return f"<Message id={self.id} author={self.author.username} content='{self.content[:30]}...'>"
\ No newline at end of file
+        return f"<Message id={self.id} author={self.author.username} content='{self.content[:30]}...'>"
+
+class MessageBatch:
+    """A micro-batch of messages with column views for vectorized handlers
+
+    Columns are built on first access and cached, so handlers that only need
+    ``contents`` never touch authors or timestamps.
+    """
+
+    __slots__ = ("messages", "_columns")
+
+    def __init__(self, messages: List[Message]):
+        self.messages = messages
+        self._columns: Dict[str, list] = {}
+
+    def __len__(self):
+        return len(self.messages)
+
+    def __iter__(self):
+        return iter(self.messages)
+
+    def __getitem__(self, index):
+        return self.messages[index]
+
+    def _column(self, name: str, attribute: str) -> list:
+        column = self._columns.get(name)
+        if column is None:
+            column = self._columns[name] = [getattr(message, attribute) for message in self.messages]
+        return column
+
+    @property
+    def ids(self) -> List[str]:
+        return self._column("ids", "id")
+
+    @property
+    def contents(self) -> List[str]:
+        return self._column("contents", "content")
+
+    @property
+    def authors(self) -> List[User]:
+        return self._column("authors", "author")
+
+    @property
+    def rooms(self) -> List[Room]:
+        return self._column("rooms", "room")
+
+    @property
+    def timestamps(self) -> List[Optional[int]]:
+        """Server timestamps in milliseconds"""
+        return self._column("timestamps", "timestamp_ms")
+
+    def columns(self) -> Dict[str, list]:
+        return {
+            "ids": self.ids,
+            "authors": self.authors,
+            "contents": self.contents,
+            "timestamps": self.timestamps,
+        }
+
+    def __repr__(self):
+        return f"<MessageBatch size={len(self.messages)}>"
+
+def compact_raw_data(raw_data: Dict[str, Any], mode: str = RAW_DATA_FULL) -> Optional[Dict[str, Any]]:
+    """Trim a message payload according to a raw_data retention mode"""
+    if mode == RAW_DATA_FULL:
+        return raw_data
+    if mode == RAW_DATA_NONE:
+        return None
+    if mode == RAW_DATA_COMPACT:
+        extra = {key: value for key, value in raw_data.items() if key not in _MESSAGE_FIELDS}
+        return extra or None
+    raise ValueError(f"Unknown raw_data mode: {mode}")
+
+class ModelCache:
+    """Interns User and Room objects so repeat authors and rooms share one instance
+
+    Each table is bounded; once full, the oldest entry is dropped (FIFO), which keeps
+    lookups and inserts O(1). Interned objects are shared between messages, so they
+    should be treated as read-only.
+    """
+
+    def __init__(self, max_users: int = 100_000, max_rooms: int = 10_000):
+        self.max_users = max_users
+        self.max_rooms = max_rooms
+        self._users: Dict[Tuple[Hashable, str], User] = {}
+        self._rooms: Dict[str, Room] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def user(self, username: str, address: Optional[str] = None) -> User:
+        key = (address, username)
+        user = self._users.get(key)
+        if user is not None:
+            self.hits += 1
+            return user
+
+        self.misses += 1
+        if len(self._users) >= self.max_users:
+            del self._users[next(iter(self._users))]
+        user = self._users[key] = User(username, address)
+        return user
+
+    def room(self, room_id: str) -> Room:
+        room = self._rooms.get(room_id)
+        if room is None:
+            if len(self._rooms) >= self.max_rooms:
+                del self._rooms[next(iter(self._rooms))]
+            room = self._rooms[room_id] = Room(room_id)
+        return room
+
+    def clear(self):
+        self._users.clear()
+        self._rooms.clear()
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "users": len(self._users),
+            "rooms": len(self._rooms),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
@@ -0,0 +1,219 @@
+"""
+Compiled moderation rules for pump.fun-self
+"""
+import asyncio
+import logging
+import re
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .core.normalize import TextNormalizer
+
+logger = logging.getLogger(__name__)
+
+PHRASE = "phrase"
+REGEX = "regex"
+
+# Rule actions
+BAN = "ban"
+FLAG = "flag"
+
+
+class Rule:
+    """A single moderation trigger: a literal phrase or a regular expression"""
+
+    __slots__ = ("pattern", "kind", "action", "reason", "name")
+
+    def __init__(self, pattern: str, kind: str = PHRASE, action: str = BAN,
+                 reason: Optional[str] = None, name: Optional[str] = None):
+        if kind not in (PHRASE, REGEX):
+            raise ValueError(f"Unknown rule kind: {kind}")
+        if action not in (BAN, FLAG):
+            raise ValueError(f"Unknown rule action: {action}")
+        self.pattern = pattern
+        self.kind = kind
+        self.action = action
+        self.reason = reason or f"Auto-ban: {pattern}"
+        self.name = name or pattern
+
+    def __repr__(self):
+        return f"<Rule {self.kind} {self.pattern!r} action={self.action}>"
+
+
+class RuleSet:
+    """An immutable, compiled set of rules
+
+    Phrases are compiled into an Aho-Corasick automaton, so every phrase is looked
+    for in one pass over the text regardless of how many there are. Regexes
+    without capturing groups are joined into a single alternation used as a
+    prefilter: clean text costs one search, and only text that hits it is checked
+    rule by rule to report every match. Matching is case-insensitive unless
+    ``case_sensitive`` is set.
+
+    With a ``normalizer``, phrases and scanned text both go through it (which also
+    case-folds), so obfuscated text still matches. Regexes always run against the
+    original text, since folding digits and collapsing repeats would break them.
+    """
+
+    def __init__(self, rules: Iterable[Rule] = (), case_sensitive: bool = False,
+                 normalizer: Optional[TextNormalizer] = None):
+        self.rules: List[Rule] = list(rules)
+        self.case_sensitive = case_sensitive
+        self.normalizer = normalizer
+
+        # Aho-Corasick automaton: goto table, failure links, and the rules ending at each state
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Tuple[int, ...]] = [()]
+
+        self._regexes: List[Tuple[int, "re.Pattern"]] = []
+        self._combined: Optional["re.Pattern"] = None
+        self._standalone: List[Tuple[int, "re.Pattern"]] = []
+
+        self._compile()
+
+    @classmethod
+    def from_lists(cls, phrases: Iterable[str] = (), regexes: Iterable[str] = (), action: str = BAN,
+                   case_sensitive: bool = False, normalizer: Optional[TextNormalizer] = None) -> "RuleSet":
+        rules = [Rule(phrase, PHRASE, action) for phrase in phrases]
+        rules.extend(Rule(pattern, REGEX, action) for pattern in regexes)
+        return cls(rules, case_sensitive, normalizer)
+
+    def __len__(self):
+        return len(self.rules)
+
+    def _fold(self, text: str) -> str:
+        return text if self.case_sensitive else text.casefold()
+
+    def _compile(self):
+        goto, output = self._goto, self._output
+        phrase_outputs: Dict[int, List[int]] = {}
+        flags = 0 if self.case_sensitive else re.IGNORECASE
+
+        for index, rule in enumerate(self.rules):
+            if rule.kind == REGEX:
+                self._regexes.append((index, re.compile(rule.pattern, flags)))
+                continue
+            if not rule.pattern:
+                continue
+            state = 0
+            pattern = (self.normalizer.normalize(rule.pattern, cache=False)
+                       if self.normalizer is not None else self._fold(rule.pattern))
+            for char in pattern:
+                next_state = goto[state].get(char)
+                if next_state is None:
+                    next_state = len(goto)
+                    goto[state][char] = next_state
+                    goto.append({})
+                    self._fail.append(0)
+                    output.append(())
+                state = next_state
+            phrase_outputs.setdefault(state, []).append(index)
+
+        for state, indexes in phrase_outputs.items():
+            output[state] = tuple(indexes)
+
+        # Breadth-first so every failure link points at an already finished state
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                if output[self._fail[next_state]]:
+                    output[next_state] = output[next_state] + output[self._fail[next_state]]
+
+        # Joining renumbers capturing groups, so a backreference in one pattern would
+        # point at another's group without any error; patterns with groups are
+        # checked on their own instead
+        joinable = [(index, pattern) for index, pattern in self._regexes if not pattern.groups]
+        self._standalone = [(index, pattern) for index, pattern in self._regexes if pattern.groups]
+        if joinable:
+            try:
+                self._combined = re.compile(
+                    "|".join(f"(?:{pattern.pattern})" for _, pattern in joinable), flags
+                )
+            except re.error:
+                # Inline global flags don't survive being joined either
+                self._combined = None
+                self._standalone = list(self._regexes)
+
+    def scan(self, text: str) -> List[Rule]:
+        """Every rule that matches the text, phrases in order of appearance first"""
+        matched: Dict[int, None] = {}
+        goto, fail, output = self._goto, self._fail, self._output
+        if self.normalizer is not None:
+            folded = self.normalizer.normalize(text)
+        else:
+            folded = self._fold(text)
+        if len(goto) > 1:
+            state = 0
+            for char in folded:
+                while state and char not in goto[state]:
+                    state = fail[state]
+                state = goto[state].get(char, 0)
+                if output[state]:
+                    for index in output[state]:
+                        matched[index] = None
+
+        if self._regexes:
+            if self._combined is not None and self._combined.search(text):
+                candidates = self._regexes
+            else:
+                candidates = self._standalone
+            for index, pattern in candidates:
+                if pattern.search(text):
+                    matched[index] = None
+
+        return [self.rules[index] for index in matched]
+
+
+class RuleEngine:
+    """Holds the active RuleSet and swaps it atomically
+
+    ``scan`` reads the current set once per call, so a swap never affects a scan in
+    progress. ``reload`` compiles the new set in a worker thread, keeping the event
+    loop free while a large blocklist is built, and gives it the engine's
+    ``normalizer``.
+    """
+
+    def __init__(self, ruleset: Optional[RuleSet] = None, normalizer: Optional[TextNormalizer] = None):
+        self.normalizer = normalizer
+        self.ruleset = ruleset or RuleSet(normalizer=normalizer)
+        self.scanned = 0
+        self.matched = 0
+        self.swaps = 0
+
+    def swap(self, ruleset: RuleSet) -> RuleSet:
+        """Replace the active rules, returning the previous set"""
+        previous, self.ruleset = self.ruleset, ruleset
+        self.swaps += 1
+        logger.info(f"Moderation rules swapped: {len(previous)} -> {len(ruleset)} rules")
+        return previous
+
+    async def reload(self, rules: Iterable[Rule], case_sensitive: bool = False) -> RuleSet:
+        """Compile rules off the event loop, then swap them in"""
+        rules = list(rules)
+        loop = asyncio.get_running_loop()
+        ruleset = await loop.run_in_executor(None, RuleSet, rules, case_sensitive, self.normalizer)
+        self.swap(ruleset)
+        return ruleset
+
+    def scan(self, text: str) -> List[Rule]:
+        matches = self.ruleset.scan(text)
+        self.scanned += 1
+        if matches:
+            self.matched += 1
+        return matches
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "rules": len(self.ruleset),
+            "scanned": self.scanned,
+            "matched": self.matched,
+            "swaps": self.swaps,
+        }
@@ -0,0 +1,328 @@
+"""
+Sharded connection pool for watching large numbers of rooms
+"""
+import asyncio
+import logging
+import multiprocessing
+import queue
+import zlib
+from typing import Dict, List, Optional, Iterable
+
+from .client import Client
+from .models import Message
+from .utils import get_user_info
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WEBSOCKET_URI = "wss://livechat.pump.fun/socket.io/?EIO=4&transport=websocket"
+
+
+def shard_for_room(room_id: str, shard_count: int) -> int:
+    """Stable shard index for a room, identical across processes and restarts"""
+    return zlib.crc32(room_id.encode("utf-8")) % shard_count
+
+
+def _picklable(value):
+    # Exceptions raised deep in websockets/aiohttp don't always survive pickling
+    if isinstance(value, BaseException):
+        return RuntimeError(repr(value))
+    return value
+
+
+async def _supervise(client: Client, room_ids: List[str], username: str,
+                     is_running, restart_delay: float, on_error=None):
+    """Keep a shard's client running, restarting it if its reconnect loop gives up"""
+    while is_running():
+        try:
+            await client.start(room_ids, username)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Shard crashed: {e}")
+            if on_error is not None:
+                await on_error(e)
+        if is_running():
+            logger.warning(f"Shard stopped, restarting in {restart_delay}s")
+            await asyncio.sleep(restart_delay)
+
+
+def _worker_main(token: str, websocket_uri: str, assignments: Dict[int, List[str]],
+                 username: str, event_names: List[str], restart_delay: float,
+                 out_queue, command_queue):
+    """Entry point for pool worker processes"""
+    asyncio.run(_worker_run(token, websocket_uri, assignments, username, event_names,
+                            restart_delay, out_queue, command_queue))
+
+
+async def _worker_run(token, websocket_uri, assignments, username, event_names,
+                      restart_delay, out_queue, command_queue):
+    loop = asyncio.get_running_loop()
+    running = True
+    clients: Dict[int, Client] = {}
+
+    def make_forwarder(event_name):
+        async def forward(*args):
+            out_queue.put((event_name, tuple(_picklable(arg) for arg in args)))
+        return forward
+
+    for shard_id in assignments:
+        client = Client(token, websocket_uri)
+        for event_name in event_names:
+            client.listen(event_name)(make_forwarder(event_name))
+        clients[shard_id] = client
+
+    tasks = [
+        asyncio.create_task(_supervise(clients[shard_id], rooms, username,
+                                       lambda: running, restart_delay))
+        for shard_id, rooms in assignments.items()
+    ]
+
+    while running:
+        command = await loop.run_in_executor(None, command_queue.get)
+        kind = command[0]
+        try:
+            if kind == "stop":
+                running = False
+            elif kind == "send":
+                _, shard_id, content, room_id, send_username = command
+                await clients[shard_id].send_message(content, room_id, send_username)
+            elif kind == "reply":
+                _, shard_id, message, content = command
+                await clients[shard_id].send_reply(message, content)
+        except Exception as e:
+            out_queue.put(('error', (_picklable(e),)))
+
+    for client in clients.values():
+        await client.close()
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+class ClientPool:
+    """Spreads many rooms across several websocket connections and worker processes
+
+    Rooms are assigned to shards by a stable hash of their room ID. Each shard is a
+    regular :class:`Client` running its own reconnect loop, and events from every
+    shard are merged into the handlers registered on the pool.
+
+    Only events the pool has handlers for are forwarded, so shards still skip frames
+    nobody listens to. With worker processes, handlers must be registered before
+    ``start``; in-process shards pick up handlers added later too.
+    """
+
+    def __init__(self, token: str, shards: int = 1, processes: int = 1,
+                 websocket_uri: str = DEFAULT_WEBSOCKET_URI, restart_delay: float = 5.0):
+        """
+        Initialize the pool
+
+        Args:
+            token: Authentication token shared by every shard
+            shards: Total number of websocket connections
+            processes: Number of worker processes the shards are spread over
+            websocket_uri: Websocket URI used by every shard
+            restart_delay: Seconds to wait before restarting a shard that stopped
+        """
+        if shards < 1 or processes < 1:
+            raise ValueError("shards and processes must be at least 1")
+
+        self.token = token
+        self.shard_count = shards
+        self.process_count = min(processes, shards)
+        self.websocket_uri = websocket_uri
+        self.restart_delay = restart_delay
+        self.username: Optional[str] = None
+
+        self.clients: Dict[int, Client] = {}
+        self.room_shards: Dict[str, int] = {}
+
+        self._event_handlers: Dict[str, List] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._processes: List[multiprocessing.Process] = []
+        self._command_queues: Dict[int, "multiprocessing.Queue"] = {}
+        self._out_queue = None
+        self._running = False
+
+    def event(self, func):
+        if not asyncio.iscoroutinefunction(func):
+            raise TypeError('Event handler must be a coroutine function')
+
+        event_name = func.__name__
+        if event_name.startswith('on_'):
+            event_name = event_name[3:]
+
+        self._add_handler(event_name, func)
+        return func
+
+    def listen(self, event_name: str):
+        def decorator(func):
+            if not asyncio.iscoroutinefunction(func):
+                raise TypeError('Event handler must be a coroutine function')
+
+            self._add_handler(event_name, func)
+            return func
+        return decorator
+
+    def _add_handler(self, event_name: str, func):
+        handlers = self._event_handlers.setdefault(event_name, [])
+        handlers.append(func)
+        if len(handlers) == 1:
+            # First handler for this event: start forwarding it from running shards
+            for client in self.clients.values():
+                self._forward(client, event_name)
+
+    async def _dispatch(self, event_name: str, *args):
+        handlers = self._event_handlers.get(event_name, [])
+        if handlers:
+            await asyncio.gather(*(handler(*args) for handler in handlers), return_exceptions=True)
+
+    def shard_for(self, room_id: str) -> int:
+        """Get the shard index a room is assigned to"""
+        return shard_for_room(room_id, self.shard_count)
+
+    def process_for(self, shard_id: int) -> int:
+        """Get the worker process index a shard runs in"""
+        return shard_id % self.process_count
+
+    def assign_rooms(self, room_ids: Iterable[str]) -> Dict[int, List[str]]:
+        """Group room IDs by shard"""
+        assignments: Dict[int, List[str]] = {}
+        for room_id in room_ids:
+            shard_id = self.shard_for(room_id)
+            self.room_shards[room_id] = shard_id
+            assignments.setdefault(shard_id, []).append(room_id)
+        return assignments
+
+    def _forward(self, client: Client, event_name: str):
+        async def forward(*args):
+            await self._dispatch(event_name, *args)
+        client.listen(event_name)(forward)
+
+    def _wire(self, client: Client):
+        # Forward every event the pool has handlers for into the merged stream
+        for event_name, handlers in self._event_handlers.items():
+            if handlers:
+                self._forward(client, event_name)
+
+    async def start(self, room_ids: Iterable[str], username: Optional[str] = None):
+        """Connect every shard and run until closed"""
+        room_ids = list(dict.fromkeys(room_ids))
+        if username is None:
+            # Looked up once here instead of once per shard/process
+            user_info = await get_user_info(self.token)
+            username = user_info.get("username")
+            if not username:
+                raise Exception("No username found in user info")
+        self.username = username
+        self._running = True
+
+        assignments = self.assign_rooms(room_ids)
+        if self.process_count > 1:
+            await self._start_processes(assignments, username)
+        else:
+            await self._start_local(assignments, username)
+
+    async def _start_local(self, assignments: Dict[int, List[str]], username: str):
+        for shard_id, rooms in assignments.items():
+            client = Client(self.token, self.websocket_uri)
+            self._wire(client)
+            self.clients[shard_id] = client
+            self._tasks.append(asyncio.create_task(
+                _supervise(client, rooms, username, lambda: self._running,
+                           self.restart_delay, lambda e: self._dispatch('error', e))
+            ))
+        try:
+            await asyncio.gather(*self._tasks)
+        except asyncio.CancelledError:
+            pass
+
+    async def _start_processes(self, assignments: Dict[int, List[str]], username: str):
+        context = multiprocessing.get_context("spawn")
+        self._out_queue = context.Queue()
+        per_process: Dict[int, Dict[int, List[str]]] = {}
+        for shard_id, rooms in assignments.items():
+            per_process.setdefault(self.process_for(shard_id), {})[shard_id] = rooms
+
+        for process_id, process_assignments in per_process.items():
+            command_queue = context.Queue()
+            process = context.Process(
+                target=_worker_main,
+                args=(self.token, self.websocket_uri, process_assignments, username,
+                      [event_name for event_name, handlers in self._event_handlers.items() if handlers],
+                      self.restart_delay,
+                      self._out_queue, command_queue),
+                daemon=True,
+            )
+            process.start()
+            self._processes.append(process)
+            self._command_queues[process_id] = command_queue
+
+        await self._pump_events()
+
+    async def _pump_events(self):
+        loop = asyncio.get_running_loop()
+        while self._running:
+            try:
+                item = await loop.run_in_executor(None, self._out_queue.get, True, 0.5)
+            except queue.Empty:
+                continue
+            batch = [item]
+            # Drain whatever else arrived so we hop through the executor once per burst
+            while len(batch) < 512:
+                try:
+                    batch.append(self._out_queue.get_nowait())
+                except queue.Empty:
+                    break
+            for event_name, args in batch:
+                await self._dispatch(event_name, *args)
+
+    @property
+    def latencies(self) -> Dict[int, Optional[float]]:
+        """Last measured round-trip time per in-process shard"""
+        return {shard_id: client.latency for shard_id, client in self.clients.items()}
+
+    def _shard_for_send(self, room_id: str) -> int:
+        shard_id = self.room_shards.get(room_id)
+        if shard_id is None:
+            raise ValueError(f"Room {room_id} is not managed by this pool")
+        return shard_id
+
+    async def send_message(self, content: str, room_id: str, username: Optional[str] = None):
+        """Queue a message through the shard that owns the room"""
+        shard_id = self._shard_for_send(room_id)
+        username = username or self.username
+        if self._processes:
+            self._command_queues[self.process_for(shard_id)].put(
+                ("send", shard_id, content, room_id, username)
+            )
+            return
+        return await self.clients[shard_id].send_message(content, room_id, username)
+
+    async def send_reply(self, message: Message, content: str):
+        """Queue a reply through the shard that received the message"""
+        shard_id = self._shard_for_send(message.room.id)
+        if self._processes:
+            self._command_queues[self.process_for(shard_id)].put(
+                ("reply", shard_id, message, content)
+            )
+            return
+        return await self.clients[shard_id].send_reply(message, content)
+
+    async def close(self):
+        """Stop every shard and worker process"""
+        self._running = False
+        for client in self.clients.values():
+            await client.close()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+        for command_queue in self._command_queues.values():
+            command_queue.put(("stop",))
+        for process in self._processes:
+            await asyncio.get_running_loop().run_in_executor(None, process.join, 5)
+            if process.is_alive():
+                process.terminate()
+        self._processes.clear()
+        self._command_queues.clear()
@@ -1,7 +1,9 @@
 import pytest
 import asyncio
+import time
 from unittest.mock import AsyncMock, MagicMock, patch
-from pump_self_melon import Client, Message, User, Room
+from pump_self_melon import Client, Message, User, Room, ModelCache
+from pump_self_melon.core import ReconnectPolicy, Dispatcher, Batcher
 from datetime import datetime
 
 class TestClient:
@@ -95,6 +97,23 @@ class TestClient:
         expected_message = '420["joinRoom",{"roomId":"test_room","username":"test_user"}]'
         mock_websocket.send.assert_called_once_with(expected_message)
     
+    @pytest.mark.asyncio
+    async def test_rejoin_skips_confirmed_permission_check(self, client):
+        client.websocket = AsyncMock()
+        client.enable_banning()
+        checks = []
+        
+        async def check_mod_permissions(self):
+            checks.append(self.room_id)
+            self.has_mod_permissions = True
+            return True
+        
+        with patch('pump_self_melon.client.BanManager.check_mod_permissions', check_mod_permissions):
+            await client.join_room("test_room", "test_user")
+            await client.join_room("test_room", "test_user")
+        
+        assert checks == ["test_room"]
+    
     @pytest.mark.asyncio
     async def test_send_message(self, client):
         mock_websocket = AsyncMock()
@@ -102,7 +121,7 @@ class TestClient:
         client.current_room = Room("test_room")
         client.current_username = "test_user"
         
-        await client.send_message("Hello world!")
+        await client.send_message("Hello world!", wait=True)
         
         expected_message = '423["sendMessage",{"roomId":"test_room","message":"Hello world!","username":"test_user"}]'
         mock_websocket.send.assert_called_once_with(expected_message)
@@ -122,7 +141,7 @@ class TestClient:
         room = Room("test_room")
         original_message = Message("msg_123", "Original message content", user, room)
         
-        await client.reply(original_message, "This is a reply")
+        await (await client.reply(original_message, "This is a reply"))
         
         expected_data = {
             "roomId": "test_room",
@@ -134,6 +153,156 @@ class TestClient:
         expected_message = f'423["sendMessage",{{"roomId":"test_room","message":"This is a reply","username":"test_user","replyToId":"msg_123","replyPreview":"Original message content"}}]'
         mock_websocket.send.assert_called_once()
     
+    @pytest.mark.asyncio
+    async def test_join_multiple_rooms(self, client):
+        mock_websocket = AsyncMock()
+        client.websocket = mock_websocket
+        
+        await client.join_room("room_a", "user_a")
+        await client.join_room("room_b", "user_b")
+        
+        assert set(client.rooms) == {"room_a", "room_b"}
+        assert client.current_room.id == "room_b"
+        assert set(client.ban_managers) == {"room_a", "room_b"}
+        assert mock_websocket.send.call_count == 2
+    
+    @pytest.mark.asyncio
+    async def test_leave_room(self, client):
+        mock_websocket = AsyncMock()
+        client.websocket = mock_websocket
+        left = []
+        
+        @client.event
+        async def on_leave(room, user):
+            left.append((room.id, user.username))
+        
+        await client.join_room("room_a", "user_a")
+        await client.join_room("room_b", "user_b")
+        await client.leave_room("room_b")
+        
+        assert list(client.rooms) == ["room_a"]
+        assert client.current_room.id == "room_a"
+        assert client.current_username == "user_a"
+        assert left == [("room_b", "user_b")]
+        mock_websocket.send.assert_called_with('42["leaveRoom",{"roomId":"room_b"}]')
+    
+    @pytest.mark.asyncio
+    async def test_messages_routed_by_room(self, client):
+        client.websocket = AsyncMock()
+        received = []
+        
+        @client.event
+        async def on_message(message):
+            received.append(message)
+        
+        await client.join_room("room_a", "user_a")
+        await client.join_room("room_b", "user_b")
+        
+        await client._handle_message('42["newMessage",{"id":"1","message":"a","username":"u","roomId":"room_a"}]')
+        await client._handle_message('42["newMessage",{"id":"2","message":"b","username":"u","roomId":"room_b"}]')
+        await client._handle_message('42["newMessage",{"id":"3","message":"c","username":"u","roomId":"room_c"}]')
+        
+        assert [message.id for message in received] == ["1", "2"]
+        assert received[0].room is client.rooms["room_a"]
+        assert received[1].room is client.rooms["room_b"]
+    
+    @pytest.mark.asyncio
+    async def test_sends_do_not_block_receive_loop(self, client):
+        mock_websocket = AsyncMock()
+        client.websocket = mock_websocket
+        await client.join_room("room_a", "user_a")
+        
+        @client.event
+        async def on_message(message):
+            for index in range(3):
+                await client.send_message(f"reply {index}", room_id="room_a")
+        
+        started = time.monotonic()
+        await client._handle_message('42["newMessage",{"id":"1","message":"hi","username":"u","roomId":"room_a"}]')
+        
+        assert time.monotonic() - started < 0.5
+        assert client.send_queue.depth > 0
+        client.send_queue.close()
+    
+    @pytest.mark.asyncio
+    async def test_send_message_to_joined_room(self, client):
+        mock_websocket = AsyncMock()
+        client.websocket = mock_websocket
+        
+        await client.join_room("room_a", "user_a")
+        await client.join_room("room_b", "user_b")
+        await client.send_message("hi", room_id="room_a", wait=True)
+        
+        sent = mock_websocket.send.call_args[0][0]
+        assert '"roomId": "room_a"' in sent or '"roomId":"room_a"' in sent
+        assert "user_a" in sent
+    
+    @pytest.mark.asyncio
+    async def test_engineio_ping_answered(self, client):
+        mock_websocket = AsyncMock()
+        client.websocket = mock_websocket
+        
+        await client._handle_message("2")
+        
+        mock_websocket.send.assert_called_once_with("3")
+        assert client.heartbeat.pings_received == 1
+    
+    @pytest.mark.asyncio
+    async def test_open_packet_configures_heartbeat(self, client):
+        client.websocket = AsyncMock()
+        
+        await client._handle_message('0{"sid":"abc","upgrades":[],"pingInterval":10000,"pingTimeout":5000}')
+        
+        assert client.heartbeat.session_id == "abc"
+        assert client.heartbeat.ping_interval == 10.0
+        assert client.heartbeat.ping_timeout == 5.0
+    
+    @pytest.mark.asyncio
+    async def test_wait_for_authentication(self, client):
+        mock_websocket = AsyncMock()
+        mock_websocket.recv.side_effect = [
+            '0{"sid":"abc","pingInterval":25000,"pingTimeout":20000}',
+            '40{"sid":"def"}',
+            '430[{"authenticated":true}]',
+        ]
+        client.websocket = mock_websocket
+        
+        await client._wait_for_authentication()
+        
+        assert client.is_authenticated is True
+        assert client.heartbeat.session_id == "abc"
+        assert mock_websocket.recv.call_count == 3
+    
+    @pytest.mark.asyncio
+    async def test_wait_for_authentication_timeout(self, client):
+        mock_websocket = AsyncMock()
+        
+        async def never():
+            await asyncio.sleep(10)
+        
+        mock_websocket.recv.side_effect = never
+        client.websocket = mock_websocket
+        
+        with pytest.raises(asyncio.TimeoutError):
+            await client._wait_for_authentication(timeout=0.05)
+        assert client.is_authenticated is False
+    
+    @pytest.mark.asyncio
+    async def test_start_backs_off_then_gives_up(self):
+        policy = ReconnectPolicy(base_delay=0.001, max_delay=0.001, max_attempts=3)
+        client = Client("test_token", reconnect_policy=policy)
+        backoffs = []
+        
+        @client.event
+        async def on_backoff(delay, attempt):
+            backoffs.append(attempt)
+        
+        with patch.object(Client, 'connect', new_callable=AsyncMock, return_value=False):
+            await asyncio.wait_for(client.start("test_room", "test_user"), timeout=1)
+        
+        assert backoffs == [1, 2]
+        assert policy.get_stats()["total_failures"] == 3
+    
     def test_check_authentication_success(self, client):
         auth_message = '430[{"authenticated":true,"userId":"123"}]'
         result = client._check_authentication(auth_message)
@@ -171,9 +340,114 @@ class TestClient:
         raw_message = '43["otherEvent","data"]'
         
         message = client._parse_message(raw_message)
-        
+
         assert message is None
-    
+
+    @pytest.mark.asyncio
+    async def test_unsubscribed_events_skip_decoding(self, client):
+        raw_message = '42["newMessage",{"id":"1","message":"hi","username":"u","roomId":"r"}]'
+        received = []
+
+        with patch("pump_self_melon.client.decode_frame") as mock_decode:
+            await client._handle_message(raw_message)
+            mock_decode.assert_not_called()
+        assert client.frames_skipped == 1
+
+        @client.event
+        async def on_message(message):
+            received.append(message.content)
+
+        await client._handle_message(raw_message)
+        assert received == ["hi"]
+
+        client.remove_listener(on_message)
+        await client._handle_message(raw_message)
+        assert received == ["hi"]
+        assert client.frames_skipped == 2
+
+    @pytest.mark.asyncio
+    async def test_ban_manager_toggle_refreshes_routes(self, client):
+        client.websocket = AsyncMock()
+        await client.join_room("r", "bot")
+        raw_message = '42["newMessage",{"id":"1","message":"hi","username":"u","userAddress":"0x1","roomId":"r"}]'
+
+        await client._handle_message(raw_message)
+        assert client.frames_skipped == 1
+
+        client.ban_manager.enable_banning()
+        await client._handle_message(raw_message)
+        assert client.frames_skipped == 1
+        assert "1" in client.ban_manager.message_to_user
+
+        client.ban_manager.disable_banning()
+        await client._handle_message(raw_message)
+        assert client.frames_skipped == 2
+
+    @pytest.mark.asyncio
+    async def test_dispatcher_keeps_receive_loop_free(self):
+        client = Client("test_token", dispatcher=Dispatcher(workers=2))
+        release = asyncio.Event()
+        received = []
+
+        @client.event
+        async def on_message(message):
+            if message.room.id == "slow":
+                await release.wait()
+            received.append(message.room.id)
+
+        await client._handle_message('42["newMessage",{"id":"1","message":"a","username":"u","roomId":"slow"}]')
+        await client._handle_message('42["newMessage",{"id":"2","message":"b","username":"u","roomId":"fast"}]')
+        await asyncio.sleep(0.01)
+
+        assert received == ["fast"]
+        release.set()
+        await client.dispatcher.join()
+        assert received == ["fast", "slow"]
+        client.dispatcher.close()
+
+    @pytest.mark.asyncio
+    async def test_dispatcher_counts_handler_failures(self):
+        client = Client("test_token", dispatcher=Dispatcher(workers=1))
+
+        @client.event
+        async def on_message(message):
+            raise RuntimeError("boom")
+
+        await client._handle_message('42["newMessage",{"id":"1","message":"a","username":"u","roomId":"r"}]')
+        await client.dispatcher.join()
+
+        assert client.dispatcher.get_stats()["failed"] == 1
+        client.dispatcher.close()
+
+    @pytest.mark.asyncio
+    async def test_handler_timeout_reported_as_error(self, client):
+        errors = []
+
+        @client.listen('message', timeout=0.01)
+        async def hangs(message):
+            await asyncio.sleep(1)
+
+        @client.event
+        async def on_error(error):
+            errors.append(error)
+
+        await client._dispatch('message', Message("1", "hi", User("u"), Room("r")))
+
+        assert len(errors) == 1
+        assert errors[0].timed_out
+        assert errors[0].handler is hangs
+
+    @pytest.mark.asyncio
+    async def test_banning_keeps_messages_routed(self, client):
+        client.websocket = AsyncMock()
+        await client.join_room("r", "u")
+        client.enable_banning()
+
+        await client._handle_message('42["newMessage",{"id":"1","message":"hi","username":"u","userAddress":"0x1","roomId":"r"}]')
+
+        assert client.ban_manager.message_to_user["1"] == "0x1"
+        assert client.frames_skipped == 0
+
     @pytest.mark.asyncio
     async def test_disconnect(self, client):
         mock_websocket = AsyncMock()
@@ -221,6 +495,189 @@ class TestModels:
         assert "msg_123" in repr(message)
         assert "testuser" in repr(message)
 
+class TestModelCache:
+    def test_models_are_slotted(self):
+        user = User("testuser", "0x123")
+        message = Message("1", "hi", user, Room("room"))
+        
+        assert not hasattr(user, "__dict__")
+        assert not hasattr(message, "__dict__")
+        assert message.raw_data == {}
+    
+    def test_users_and_rooms_interned(self):
+        cache = ModelCache()
+        
+        assert cache.user("alice", "0x1") is cache.user("alice", "0x1")
+        assert cache.user("alice", "0x1") is not cache.user("alice", "0x2")
+        assert cache.room("room") is cache.room("room")
+        assert cache.get_stats()["hits"] == 2
+    
+    def test_cache_is_bounded(self):
+        cache = ModelCache(max_users=10)
+        for index in range(100):
+            cache.user(f"user_{index}", f"0x{index}")
+        
+        assert cache.get_stats()["users"] == 10
+    
+    def test_client_shares_authors(self):
+        client = Client("test_token")
+        first = client._parse_message('42["newMessage",{"id":"1","message":"a","username":"u","userAddress":"0x1","roomId":"r"}]')
+        second = client._parse_message('42["newMessage",{"id":"2","message":"b","username":"u","userAddress":"0x1","roomId":"r"}]')
+        
+        assert first.author is second.author
+        assert first.room is second.room
+    
+    def test_raw_data_modes(self):
+        raw = '42["newMessage",{"id":"1","message":"a","username":"u","roomId":"r","replyToId":"0"}]'
+        
+        assert Client("t")._parse_message(raw).raw_data["message"] == "a"
+        assert Client("t", raw_data="compact")._parse_message(raw).raw_data == {"replyToId": "0"}
+        assert Client("t", raw_data="none")._parse_message(raw).raw_data == {}
+
+    @pytest.mark.asyncio
+    async def test_wait_for_reply_without_raw_data(self):
+        client = Client("test_token", raw_data="none")
+        replies = asyncio.create_task(client.wait_for('message', reply_to="1", timeout=1))
+        await asyncio.sleep(0)
+
+        await client._handle_message('42["newMessage",{"id":"2","message":"yes","username":"b","roomId":"r","replyToId":"1"}]')
+
+        reply = await replies
+        assert reply.reply_to_id == "1"
+        assert reply.raw_data == {}
+
+class TestLazyMessage:
+    def test_fields_built_on_access(self):
+        cache = ModelCache()
+        payload = {"id": "1", "message": "hi", "username": "u", "userAddress": "0x1",
+                   "roomId": "r", "timestamp": 1700000000123}
+        message = Message.from_payload(payload, cache=cache)
+
+        assert message.content == "hi"
+        assert cache.get_stats()["users"] == 0
+        assert message.author is cache.user("u", "0x1")
+        assert message.room.id == "r"
+        assert message.timestamp_ms == 1700000000123
+        assert message.timestamp == datetime.fromtimestamp(1700000000.123)
+
+    def test_bad_timestamp_falls_back(self):
+        message = Message.from_payload({"id": "1", "timestamp": "soon"})
+
+        assert message.timestamp_ms is None
+        assert isinstance(message.timestamp, datetime)
+
+    def test_materialize_drops_payload(self):
+        payload = {"id": "1", "message": "hi", "username": "u", "roomId": "r", "replyToId": "0"}
+        message = Message.from_payload(payload).materialize("compact")
+        payload.clear()
+
+        assert message.content == "hi"
+        assert message.author.username == "u"
+        assert message.raw_data == {"replyToId": "0"}
+
+    def test_pickle_round_trip(self):
+        import pickle
+
+        message = Message.from_payload({"id": "1", "message": "hi", "username": "u", "roomId": "r",
+                                        "timestamp": 1700000000000})
+        copy = pickle.loads(pickle.dumps(message))
+
+        assert copy.content == "hi"
+        assert copy.author.username == "u"
+        assert copy.timestamp == message.timestamp
+        assert copy.timestamp_ms == 1700000000000
+
+class TestMessageBatch:
+    @pytest.mark.asyncio
+    async def test_batches_delivered_with_columns(self):
+        client = Client("test_token", batcher=Batcher(max_size=2, max_delay=10))
+        batches = []
+
+        @client.event
+        async def on_message_batch(batch):
+            batches.append(batch)
+
+        for index in range(3):
+            await client._handle_message(
+                f'42["newMessage",{{"id":"{index}","message":"m{index}","username":"u","roomId":"r","timestamp":{1000 + index}}}]'
+            )
+
+        assert len(batches) == 1
+        assert batches[0].ids == ["0", "1"]
+        assert batches[0].contents == ["m0", "m1"]
+        assert batches[0].timestamps == [1000, 1001]
+        assert batches[0].authors[0] is batches[0].authors[1]
+
+        await client.batcher.close()
+        assert batches[1].ids == ["2"]
+
+class TestMessageStreams:
+    @pytest.mark.asyncio
+    async def test_streams_by_room_and_predicate(self):
+        client = Client("test_token")
+        room_a = client.messages(room="a")
+        everything = client.messages()
+        commands = client.messages(predicate=lambda message: message.content.startswith("!"))
+
+        for index, (room_id, content) in enumerate([("a", "hi"), ("b", "!help"), ("a", "!ping")]):
+            await client._handle_message(
+                f'42["newMessage",{{"id":"{index}","message":"{content}","username":"u","roomId":"{room_id}"}}]'
+            )
+        await client.close()
+
+        assert [message.content async for message in room_a] == ["hi", "!ping"]
+        assert len([message async for message in everything]) == 3
+        assert [message.content async for message in commands] == ["!help", "!ping"]
+        assert client._streams == {}
+
+    @pytest.mark.asyncio
+    async def test_closed_stream_unsubscribes(self):
+        client = Client("test_token")
+        stream = client.messages(room="a")
+        stream.close()
+
+        await client._handle_message('42["newMessage",{"id":"1","message":"hi","username":"u","roomId":"a"}]')
+
+        assert client.frames_skipped == 1
+
+class TestWaitFor:
+    @pytest.mark.asyncio
+    async def test_wait_for_author_and_reply(self):
+        client = Client("test_token")
+        by_author = asyncio.create_task(client.wait_for('message', author="0x2", timeout=1))
+        replies = asyncio.create_task(client.wait_for('message', reply_to="1", timeout=1))
+        await asyncio.sleep(0)
+        assert client._waiters.pending('message') == 2
+
+        await client._handle_message('42["newMessage",{"id":"1","message":"q","username":"a","userAddress":"0x1","roomId":"r"}]')
+        await client._handle_message('42["newMessage",{"id":"2","message":"yes","username":"b","userAddress":"0x2","roomId":"r","replyToId":"1"}]')
+
+        assert (await by_author).id == "2"
+        assert (await replies).content == "yes"
+        assert len(client._waiters) == 0
+
+    @pytest.mark.asyncio
+    async def test_wait_for_timeout_cleans_up(self):
+        client = Client("test_token")
+
+        with pytest.raises(asyncio.TimeoutError):
+            await client.wait_for('message', check=lambda message: False, timeout=0.01)
+
+        assert len(client._waiters) == 0
+        await client._handle_message('42["newMessage",{"id":"1","message":"q","username":"a","roomId":"r"}]')
+        assert client.frames_skipped == 1
+
+    @pytest.mark.asyncio
+    async def test_wait_for_other_events(self):
+        client = Client("test_token")
+        waiter = asyncio.create_task(client.wait_for('join', timeout=1))
+        await asyncio.sleep(0)
+
+        await client._dispatch('join', Room("r"), User("u"))
+        room, user = await waiter
+
+        assert room.id == "r"
+
 class TestIntegration:
     @pytest.mark.asyncio
     async def test_full_message_flow(self):
@@ -0,0 +1,190 @@
+import pytest
+from unittest.mock import AsyncMock
+from pump_self_melon import Client, CommandRouter, Message, User, Room
+from pump_self_melon.commands import CommandOnCooldown
+from pump_self_melon.core import TextNormalizer
+
+def make_message(content, username="user", address="0x1", room_id="room"):
+    return Message("msg_1", content, User(username, address), Room(room_id))
+
+class TestCommandRouter:
+    @pytest.fixture
+    def client(self):
+        client = Client(token="test_token")
+        client.send_message = AsyncMock()
+        client.send_reply = AsyncMock()
+        return client
+
+    @pytest.fixture
+    def router(self, client):
+        return CommandRouter(client, prefix="!")
+
+    def test_find_longest_match_on_word_boundary(self, router):
+        @router.command()
+        async def ban(ctx):
+            pass
+
+        @router.command(name="ban list")
+        async def ban_list(ctx):
+            pass
+
+        command, invoked_with, rest = router.find("!BAN list now")
+        assert command.name == "ban list"
+        assert rest == "now"
+
+        assert router.find("!ban alice")[0].name == "ban"
+        assert router.find("!banana") is None
+        assert router.find("ban") is None
+
+    @pytest.mark.asyncio
+    async def test_arguments_converted_from_signature(self, client, router):
+        calls = []
+
+        @router.command(aliases=("add",))
+        async def sum_numbers(ctx, first: int, *rest: int):
+            calls.append(first + sum(rest))
+            await ctx.send("done")
+
+        await client._dispatch('message', make_message("!add 1 2 3"))
+
+        assert calls == [6]
+        client.send_message.assert_awaited_once_with("done", room_id="room")
+        assert router.get_stats()["commands"]["sum_numbers"]["calls"] == 1
+
+    @pytest.mark.asyncio
+    async def test_quoted_arguments(self, client, router):
+        seen = []
+
+        @router.command()
+        async def echo(ctx, text):
+            seen.append(text)
+
+        await router.process(make_message('!echo "hello world"'))
+
+        assert seen == ["hello world"]
+
+    @pytest.mark.asyncio
+    async def test_bad_arguments_reported(self, client, router):
+        errors = []
+
+        @router.command()
+        async def kick(ctx, count: int):
+            pass
+
+        @client.event
+        async def on_command_error(ctx, error):
+            errors.append(error)
+
+        await router.process(make_message("!kick lots"))
+        await router.process(make_message("!kick"))
+
+        assert len(errors) == 2
+        assert router.commands["kick"].failures == 2
+
+    @pytest.mark.asyncio
+    async def test_per_user_cooldown(self, client, router):
+        calls = []
+        errors = []
+
+        @router.command(cooldown=(1, 60))
+        async def ping(ctx):
+            calls.append(ctx.author.address)
+
+        @client.event
+        async def on_command_error(ctx, error):
+            errors.append(error)
+
+        await router.process(make_message("!ping", address="0x1"))
+        await router.process(make_message("!ping", address="0x1"))
+        await router.process(make_message("!ping", address="0x2"))
+
+        assert calls == ["0x1", "0x2"]
+        assert isinstance(errors[0], CommandOnCooldown)
+        assert errors[0].retry_after > 0
+
+    @pytest.mark.asyncio
+    async def test_ignores_own_messages(self, client, router):
+        calls = []
+
+        @router.command()
+        async def ping(ctx):
+            calls.append(1)
+
+        client.current_username = "bot"
+        await router.process(make_message("!ping", username="bot"))
+
+        assert calls == []
+
+    def test_normalizer_applied_before_routing(self, client):
+        router = CommandRouter(client, prefix="!", normalizer=TextNormalizer(leetspeak=False, max_repeat=None))
+
+        @router.command()
+        async def ping(ctx):
+            pass
+
+        assert router.find(router.normalizer("!\uff30\uff29\uff2e\uff27")) is not None
+        assert router.find(router.normalizer("!pi\u200bng")) is not None
+
+    @pytest.mark.asyncio
+    async def test_normalizer_leaves_arguments_alone(self, client):
+        router = CommandRouter(client, prefix="!", normalizer=TextNormalizer())
+        seen = []
+
+        @router.command()
+        async def ban(ctx, address, minutes: int):
+            seen.append((ctx.invoked_with, address, minutes, ctx.rest))
+
+        await client._dispatch('message', make_message("!\uff22\uff21\uff2e  7xKXtg2CW87 100"))
+        await client._dispatch('message', make_message("!B4N 7xKXtg2CW87 100"))
+
+        assert seen == [("ban", "7xKXtg2CW87", 100, "7xKXtg2CW87 100")] * 2
+
+    @pytest.mark.asyncio
+    async def test_prefix_not_normalized(self, client):
+        router = CommandRouter(client, prefix="!", normalizer=TextNormalizer())
+        seen = []
+
+        @router.command()
+        async def ban(ctx, address):
+            seen.append(address)
+
+        for content in ("iban someone", "1ban x", "|ban x"):
+            await client._dispatch('message', make_message(content))
+
+        assert seen == []
+        assert router.unmatched == 3
+
+    def test_remove_command(self, router):
+        @router.command(aliases=("p",))
+        async def ping(ctx):
+            pass
+
+        router.remove_command("ping")
+
+        assert router.find("!ping") is None
+        assert router.find("!p") is None
+        assert router._trie == {}
+
+    def test_alias_collision_rejected(self, router):
+        @router.command(aliases=("p",))
+        async def ping(ctx):
+            pass
+
+        with pytest.raises(ValueError):
+            @router.command(aliases=("P",))
+            async def pong(ctx):
+                pass
+
+        router.remove_command("ping")
+        assert router.commands == {}
+        assert router._trie == {}
+
+    def test_duplicate_command(self, router):
+        @router.command()
+        async def ping(ctx):
+            pass
+
+        with pytest.raises(ValueError):
+            @router.command(name="ping")
+            async def other(ctx):
+                pass
@@ -1,6 +1,22 @@
 import pytest
 import asyncio
+from unittest.mock import AsyncMock
 from pump_self_melon.core import EventEmitter, RateLimiter
+from pump_self_melon.core.heartbeat import Heartbeat
+from pump_self_melon.core.reconnect import ReconnectPolicy
+from pump_self_melon.core.sender import SendQueue
+from pump_self_melon.core.dispatch import Dispatcher
+from pump_self_melon.core.batch import Batcher
+from pump_self_melon.core.stream import Stream
+from pump_self_melon.core.waiters import WaiterRegistry
+from pump_self_melon.core.normalize import TextNormalizer
+from pump_self_melon.core.index import MessageIndex
+from pump_self_melon.core.store import BanStore
+from pump_self_melon.core.pipeline import SingleFlight, map_concurrent
+from pump_self_melon.core.retry import RetryQueue, RetryableError, RetryLater, parse_retry_after
+from pump_self_melon.core.supervisor import HandlerSupervisor, SlowHandlerError
+from pump_self_melon.core.protocol import decode_frame, peek_event
+from pump_self_melon.core import codec
 
 class TestEventEmitter:
     @pytest.fixture
@@ -83,12 +99,10 @@ class TestRateLimiter:
     
     @pytest.mark.asyncio
     async def test_over_limit_blocks(self, rate_limiter):
-        for _ in range(3):
-            await rate_limiter.acquire()
-        
         import time
         start_time = time.time()
-        await rate_limiter.acquire()
+        for _ in range(4):
+            await rate_limiter.acquire()
         end_time = time.time()
         
         assert (end_time - start_time) >= 0.9
@@ -101,4 +115,963 @@ class TestRateLimiter:
         
         for _ in range(3):
             result = await rate_limiter.acquire()
-            assert result is True
\ No newline at end of file
+            assert result is True
+    
+    def test_try_acquire(self):
+        rate_limiter = RateLimiter(max_calls=3, time_window=1, burst=3)
+        assert all(rate_limiter.try_acquire() for _ in range(3))
+        assert rate_limiter.try_acquire() is False
+        assert rate_limiter.delay() > 0
+    
+    @staticmethod
+    def _admitted(monkeypatch, rate_limiter, seconds):
+        # Greedy caller polling every 10ms on a fake clock
+        clock = [1000.0]
+        monkeypatch.setattr("pump_self_melon.core.utils.time.monotonic", lambda: clock[0])
+        admitted = []
+        for step in range(int(seconds * 100)):
+            clock[0] = 1000.0 + step / 100
+            while rate_limiter.try_acquire():
+                admitted.append(clock[0])
+        return admitted
+    
+    def test_sustained_rate_over_several_windows(self, monkeypatch):
+        admitted = self._admitted(monkeypatch, RateLimiter(max_calls=5, time_window=1.0), 3.0)
+        
+        assert len(admitted) == 15
+        for index in range(len(admitted) - 5):
+            assert admitted[index + 5] - admitted[index] >= 1.0 - 1e-6
+    
+    def test_burst_on_top_of_sustained_rate(self, monkeypatch):
+        admitted = self._admitted(monkeypatch, RateLimiter(max_calls=5, time_window=1.0, burst=3), 3.0)
+        
+        assert admitted[:3] == [1000.0] * 3
+        assert admitted[3] > 1000.0
+        assert len(admitted) == 17
+    
+    def test_burst_must_be_positive(self):
+        with pytest.raises(ValueError):
+            RateLimiter(max_calls=3, time_window=1, burst=0)
+    
+    def test_keys_are_independent(self):
+        rate_limiter = RateLimiter(max_calls=3, time_window=1, burst=3)
+        for _ in range(3):
+            assert rate_limiter.try_acquire("room_a")
+        assert not rate_limiter.try_acquire("room_a")
+        assert rate_limiter.try_acquire("room_b")
+    
+    @pytest.mark.asyncio
+    async def test_waiters_woken_in_order(self):
+        rate_limiter = RateLimiter(max_calls=1, time_window=0.02)
+        order = []
+        
+        async def waiter(index):
+            await rate_limiter.acquire("key")
+            order.append(index)
+        
+        await asyncio.gather(*(waiter(index) for index in range(5)))
+        
+        assert order == [0, 1, 2, 3, 4]
+    
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_returns_slot(self):
+        rate_limiter = RateLimiter(max_calls=1, time_window=10)
+        await rate_limiter.acquire("key")
+        
+        waiter = asyncio.create_task(rate_limiter.acquire("key"))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        
+        assert rate_limiter.delay("key") <= 10
+    
+    @pytest.mark.asyncio
+    async def test_idle_keys_evicted(self):
+        rate_limiter = RateLimiter(max_calls=2, time_window=0.02)
+        for index in range(100):
+            rate_limiter.try_acquire(index)
+        assert len(rate_limiter) == 100
+        
+        await asyncio.sleep(0.05)
+        rate_limiter.try_acquire("fresh")
+        
+        assert len(rate_limiter) == 1
+
+class TestHeartbeat:
+    @pytest.mark.asyncio
+    async def test_stall_detected(self):
+        stalled = asyncio.Event()
+        
+        async def on_stall():
+            stalled.set()
+        
+        heartbeat = Heartbeat(on_stall=on_stall, rtt_interval=0)
+        heartbeat.handle_open({"sid": "abc", "pingInterval": 50, "pingTimeout": 50})
+        heartbeat.start(AsyncMock())
+        
+        await asyncio.wait_for(stalled.wait(), timeout=1)
+        heartbeat.stop()
+        
+        assert heartbeat.stalls == 1
+    
+    @pytest.mark.asyncio
+    async def test_pings_keep_connection_alive(self):
+        stalled = False
+        
+        async def on_stall():
+            nonlocal stalled
+            stalled = True
+        
+        heartbeat = Heartbeat(on_stall=on_stall, rtt_interval=0)
+        heartbeat.handle_open({"pingInterval": 60, "pingTimeout": 60})
+        heartbeat.start(AsyncMock())
+        
+        for _ in range(6):
+            await asyncio.sleep(0.05)
+            heartbeat.handle_ping()
+        heartbeat.stop()
+        
+        assert not stalled
+        assert heartbeat.pings_received == 6
+    
+    @pytest.mark.asyncio
+    async def test_measure_rtt(self):
+        loop = asyncio.get_running_loop()
+        websocket = AsyncMock()
+        
+        async def ping():
+            waiter = loop.create_future()
+            loop.call_later(0.02, waiter.set_result, None)
+            return waiter
+        
+        websocket.ping = ping
+        heartbeat = Heartbeat(rtt_interval=0)
+        heartbeat.start(websocket)
+        
+        rtt = await heartbeat.measure_rtt()
+        heartbeat.stop()
+        
+        assert rtt >= 0.015
+        assert heartbeat.latency == rtt
+        assert heartbeat.get_stats()["average_latency"] == rtt
+
+
+class TestReconnectPolicy:
+    def test_exponential_backoff_capped(self):
+        policy = ReconnectPolicy(base_delay=1, max_delay=10, jitter=False,
+                                 max_attempts=None, failure_threshold=None)
+        
+        delays = [policy.record_failure() for _ in range(6)]
+        
+        assert delays == [1, 2, 4, 8, 10, 10]
+    
+    def test_full_jitter_within_ceiling(self):
+        policy = ReconnectPolicy(base_delay=1, max_delay=8, max_attempts=None, failure_threshold=None)
+        
+        for attempt in range(1, 20):
+            delay = policy.record_failure()
+            assert 0 <= delay <= policy.backoff(attempt)
+    
+    def test_gives_up_after_max_attempts(self):
+        policy = ReconnectPolicy(max_attempts=3, failure_threshold=None)
+        
+        assert policy.record_failure() is not None
+        assert policy.record_failure() is not None
+        assert policy.record_failure() is None
+        assert policy.exhausted
+    
+    def test_retry_forever(self):
+        policy = ReconnectPolicy(base_delay=0.01, max_delay=0.01, max_attempts=None, failure_threshold=None)
+        
+        assert all(policy.record_failure() is not None for _ in range(1000))
+    
+    def test_circuit_breaker_opens_and_closes(self):
+        policy = ReconnectPolicy(base_delay=0.01, jitter=False, max_attempts=None,
+                                 failure_threshold=2, cooldown=30)
+        
+        policy.record_failure()
+        assert policy.state == "closed"
+        delay = policy.record_failure()
+        assert policy.state == "open"
+        assert delay == 30
+        assert policy.circuit_opens == 1
+        
+        policy.record_success()
+        assert policy.state == "closed"
+        assert policy.attempts == 0
+        assert policy.get_stats()["total_reconnects"] == 1
+
+
+class TestSendQueue:
+    @pytest.mark.asyncio
+    async def test_future_resolves_when_written(self):
+        sent = []
+        
+        async def send(frame):
+            sent.append(frame)
+        
+        queue = SendQueue(send)
+        future = await queue.put("room", {"roomId": "room", "message": "hi", "username": "bot"})
+        await future
+        
+        assert len(sent) == 1
+        assert sent[0].startswith('423["sendMessage",')
+        assert queue.get_stats()["sent"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_close_fails_message_being_written(self):
+        started = asyncio.Event()
+        
+        async def stalled_send(frame):
+            started.set()
+            await asyncio.sleep(10)
+        
+        queue = SendQueue(stalled_send, maxsize=1)
+        future = await queue.put("room", {"message": "hi"})
+        await started.wait()
+        
+        queue.close()
+        
+        with pytest.raises(ConnectionError):
+            await asyncio.wait_for(future, 1)
+        # Its slot in the bounded queue was handed back
+        again = await asyncio.wait_for(queue.put("room", {"message": "again"}), 1)
+        queue.close()
+        with pytest.raises(ConnectionError):
+            await again
+    
+    @pytest.mark.asyncio
+    async def test_priority_jumps_queue(self):
+        sent = []
+        
+        async def send(frame):
+            sent.append(frame)
+        
+        queue = SendQueue(send, room_rate=(1, 0.05))
+        await (await queue.put("room", {"roomId": "room", "message": "chat 0", "username": "bot"}))
+        futures = [
+            await queue.put("room", {"roomId": "room", "message": f"chat {i}", "username": "bot"})
+            for i in range(1, 3)
+        ]
+        futures.append(await queue.put("room", {"roomId": "room", "message": "mod", "username": "bot"}, priority=True))
+        await asyncio.gather(*futures)
+        
+        assert "chat 0" in sent[0]
+        assert "mod" in sent[1]
+    
+    @pytest.mark.asyncio
+    async def test_rooms_paced_independently(self):
+        sent = []
+        
+        async def send(frame):
+            sent.append(frame)
+        
+        queue = SendQueue(send, room_rate=(1, 10))
+        await (await queue.put("room_a", {"roomId": "room_a", "message": "a", "username": "bot"}))
+        pending = await queue.put("room_a", {"roomId": "room_a", "message": "a2", "username": "bot"})
+        await asyncio.wait_for(
+            await queue.put("room_b", {"roomId": "room_b", "message": "b", "username": "bot"}), timeout=1
+        )
+        
+        assert len(sent) == 2
+        assert not pending.done()
+        queue.close()
+        with pytest.raises(ConnectionError):
+            await pending
+    
+    @pytest.mark.asyncio
+    async def test_coalesce_pending_messages(self):
+        sent = []
+        
+        async def send(frame):
+            sent.append(frame)
+        
+        queue = SendQueue(send, room_rate=(1, 0.05), coalesce=True)
+        await (await queue.put("room", {"roomId": "room", "message": "line 0", "username": "bot"}))
+        futures = [
+            await queue.put("room", {"roomId": "room", "message": f"line {i}", "username": "bot"})
+            for i in range(1, 4)
+        ]
+        await asyncio.gather(*futures)
+        
+        assert len(sent) == 2
+        assert "line 1\\nline 2\\nline 3" in sent[1]
+        assert queue.get_stats()["coalesced"] == 2
+    
+    @pytest.mark.asyncio
+    async def test_bounded_queue_applies_backpressure(self):
+        release = asyncio.Event()
+        
+        async def send(frame):
+            await release.wait()
+        
+        queue = SendQueue(send, maxsize=2)
+        await queue.put("room", {"roomId": "room", "message": "1", "username": "bot"})
+        await queue.put("room", {"roomId": "room", "message": "2", "username": "bot"})
+        
+        blocked = asyncio.create_task(queue.put("room", {"roomId": "room", "message": "3", "username": "bot"}))
+        await asyncio.sleep(0.01)
+        assert not blocked.done()
+        
+        release.set()
+        await asyncio.wait_for(blocked, timeout=1)
+
+
+class TestDispatcher:
+    @pytest.mark.asyncio
+    async def test_same_key_runs_in_order(self):
+        seen = []
+        
+        async def handler(value, delay):
+            await asyncio.sleep(delay)
+            seen.append(value)
+        
+        dispatcher = Dispatcher(workers=4)
+        await dispatcher.submit("room", handler, 1, 0.03)
+        await dispatcher.submit("room", handler, 2, 0)
+        await dispatcher.join()
+        
+        assert seen == [1, 2]
+        dispatcher.close()
+    
+    @pytest.mark.asyncio
+    async def test_slow_key_does_not_block_others(self):
+        seen = []
+        
+        async def handler(value, delay):
+            await asyncio.sleep(delay)
+            seen.append(value)
+        
+        dispatcher = Dispatcher(workers=2)
+        await dispatcher.submit("slow", handler, "slow", 0.05)
+        await dispatcher.submit("fast", handler, "fast", 0)
+        await dispatcher.join()
+        
+        assert seen == ["fast", "slow"]
+        assert dispatcher.get_stats()["processed"] == 2
+        dispatcher.close()
+    
+    @pytest.mark.asyncio
+    async def test_max_in_flight_applies_backpressure(self):
+        release = asyncio.Event()
+        
+        async def handler():
+            await release.wait()
+        
+        dispatcher = Dispatcher(workers=1, max_in_flight=2)
+        await dispatcher.submit(None, handler)
+        await dispatcher.submit(None, handler)
+        blocked = asyncio.create_task(dispatcher.submit(None, handler))
+        await asyncio.sleep(0.01)
+        
+        assert not blocked.done()
+        assert dispatcher.in_flight == 2
+        release.set()
+        await blocked
+        await dispatcher.join()
+        dispatcher.close()
+    
+    @pytest.mark.asyncio
+    async def test_failures_are_counted(self):
+        async def handler():
+            raise ValueError("boom")
+        
+        dispatcher = Dispatcher()
+        await dispatcher.submit(None, handler)
+        await dispatcher.join()
+        
+        assert dispatcher.get_stats()["failed"] == 1
+        dispatcher.close()
+
+class TestHandlerSupervisor:
+    @pytest.mark.asyncio
+    async def test_timeout_cancels_handler(self):
+        cancelled = False
+        
+        async def handler():
+            nonlocal cancelled
+            try:
+                await asyncio.sleep(1)
+            except asyncio.CancelledError:
+                cancelled = True
+                raise
+        
+        supervisor = HandlerSupervisor(timeout=0.01)
+        error = await supervisor.run("message", handler)
+        
+        assert isinstance(error, SlowHandlerError)
+        assert error.timed_out
+        assert cancelled
+        assert supervisor.get_stats()[handler.__qualname__]["timeouts"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_timeout_lookup_order(self):
+        async def handler():
+            pass
+        
+        supervisor = HandlerSupervisor(timeout=5, event_timeouts={"message": 1})
+        assert supervisor.timeout_for("ready", handler) == 5
+        assert supervisor.timeout_for("message", handler) == 1
+        supervisor.set_timeout(handler, 0.5)
+        assert supervisor.timeout_for("message", handler) == 0.5
+    
+    @pytest.mark.asyncio
+    async def test_slow_handler_reported(self):
+        async def handler():
+            await asyncio.sleep(0.02)
+        
+        supervisor = HandlerSupervisor(slow_threshold=0.001)
+        error = await supervisor.run("message", handler)
+        
+        assert isinstance(error, SlowHandlerError)
+        assert not error.timed_out
+    
+    @pytest.mark.asyncio
+    async def test_repeat_offender_quarantined(self):
+        calls = 0
+        
+        async def handler():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(1)
+        
+        supervisor = HandlerSupervisor(timeout=0.01, quarantine_after=2)
+        await supervisor.run("message", handler)
+        error = await supervisor.run("message", handler)
+        
+        assert error.quarantined
+        assert supervisor.is_quarantined(handler)
+        assert await supervisor.run("message", handler) is None
+        assert calls == 2
+        
+        supervisor.release(handler)
+        assert not supervisor.is_quarantined(handler)
+    
+    @pytest.mark.asyncio
+    async def test_handler_exceptions_swallowed(self):
+        async def handler():
+            raise ValueError("boom")
+        
+        supervisor = HandlerSupervisor(timeout=1)
+        
+        assert await supervisor.run("message", handler) is None
+        assert supervisor.get_stats()[handler.__qualname__]["failures"] == 1
+
+class TestBatcher:
+    @pytest.mark.asyncio
+    async def test_flush_by_size(self):
+        batches = []
+        
+        async def flush(batch):
+            batches.append(batch)
+        
+        batcher = Batcher(flush, max_size=3, max_delay=10)
+        for item in range(7):
+            await batcher.add(item)
+        
+        assert batches == [[0, 1, 2], [3, 4, 5]]
+        assert batcher.pending == 1
+        await batcher.close()
+        assert batches[-1] == [6]
+    
+    @pytest.mark.asyncio
+    async def test_flush_by_deadline(self):
+        batches = []
+        
+        async def flush(batch):
+            batches.append(batch)
+        
+        batcher = Batcher(flush, max_size=100, max_delay=0.01)
+        await batcher.add("a")
+        await batcher.add("b")
+        assert batches == []
+        
+        await asyncio.sleep(0.05)
+        assert batches == [["a", "b"]]
+        assert batcher.get_stats()["batches"] == 1
+
+class TestStream:
+    @pytest.mark.asyncio
+    async def test_iterates_until_closed(self):
+        stream = Stream()
+        for item in range(3):
+            await stream.put(item)
+        stream.close()
+        
+        assert [item async for item in stream] == [0, 1, 2]
+    
+    @pytest.mark.asyncio
+    async def test_predicate_filters(self):
+        stream = Stream(predicate=lambda item: item % 2 == 0)
+        for item in range(5):
+            await stream.put(item)
+        
+        assert len(stream) == 3
+    
+    @pytest.mark.asyncio
+    async def test_drop_policies(self):
+        oldest = Stream(maxsize=2, overflow="drop_oldest")
+        newest = Stream(maxsize=2, overflow="drop_newest")
+        for item in range(4):
+            await oldest.put(item)
+            await newest.put(item)
+        
+        assert [await oldest.get(), await oldest.get()] == [2, 3]
+        assert [await newest.get(), await newest.get()] == [0, 1]
+        assert oldest.get_stats()["dropped"] == 2
+    
+    @pytest.mark.asyncio
+    async def test_block_waits_for_consumer(self):
+        stream = Stream(maxsize=1)
+        await stream.put("a")
+        blocked = asyncio.create_task(stream.put("b"))
+        await asyncio.sleep(0.01)
+        
+        assert not blocked.done()
+        assert await stream.get() == "a"
+        assert await blocked
+        assert await stream.get() == "b"
+    
+    def test_unknown_overflow(self):
+        with pytest.raises(ValueError):
+            Stream(overflow="spill")
+
+class TestWaiterRegistry:
+    @pytest.mark.asyncio
+    async def test_resolves_only_matching_key(self):
+        registry = WaiterRegistry()
+        waiter = asyncio.create_task(registry.wait("message", key="a"))
+        await asyncio.sleep(0)
+        
+        assert registry.resolve("message", ("other",), keys=[None, "b"]) == 0
+        assert registry.resolve("message", ("hit",), keys=[None, "a"]) == 1
+        assert await waiter == "hit"
+        assert len(registry) == 0
+    
+    @pytest.mark.asyncio
+    async def test_timeout_cleans_up(self):
+        registry = WaiterRegistry()
+        
+        with pytest.raises(asyncio.TimeoutError):
+            await registry.wait("ready", timeout=0.01)
+        assert len(registry) == 0
+        assert registry.pending("ready") == 0
+    
+    @pytest.mark.asyncio
+    async def test_check_and_multiple_args(self):
+        registry = WaiterRegistry()
+        waiter = asyncio.create_task(registry.wait("join", check=lambda room, user: user == "bob"))
+        await asyncio.sleep(0)
+        
+        registry.resolve("join", ("room", "alice"))
+        registry.resolve("join", ("room", "bob"))
+        
+        assert await waiter == ("room", "bob")
+
+class TestTextNormalizer:
+    def test_folds_evasions(self):
+        normalizer = TextNormalizer()
+        
+        assert normalizer("\uff26\uff32\uff25\uff25 SOL") == "fre sol"
+        assert normalizer("fr\u200bee s\u200bol") == "fre sol"
+        assert normalizer("fr\u0435\u0435 s\u043el") == "fre sol"
+        assert normalizer("FR33 $0L") == "fre sol"
+        assert normalizer("caf\u00e9") == "cafe"
+    
+    def test_options(self):
+        normalizer = TextNormalizer(leetspeak=False, max_repeat=None, strip_accents=False)
+        
+        assert normalizer("Fr33eee caf\u00e9") == "fr33eee caf\u00e9"
+        assert TextNormalizer(max_repeat=2)("scaaaam") == "scaam"
+    
+    def test_cache_hits_and_bound(self):
+        normalizer = TextNormalizer(cache_size=2)
+        normalizer("a")
+        normalizer("a")
+        normalizer("b")
+        normalizer("c")
+        
+        stats = normalizer.get_stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 3
+        assert stats["cached"] == 2
+        assert normalizer.normalize("d", cache=False) == "d"
+        assert normalizer.get_stats()["cached"] == 2
+
+class TestMessageIndex:
+    def test_dict_like_access(self):
+        index = MessageIndex()
+        index["1"] = "0xabc"
+        index.add("2", "0xdef")
+        
+        assert "1" in index
+        assert index["2"] == "0xdef"
+        assert index.get("3") is None
+        assert len(index) == 2
+        del index["1"]
+        assert "1" not in index
+        with pytest.raises(KeyError):
+            index["1"]
+    
+    def test_entry_cap_evicts_oldest(self):
+        index = MessageIndex(max_entries=2, max_age=None, max_bytes=None)
+        index.add("1", "0xa")
+        index.add("2", "0xb")
+        index.add("1", "0xa")
+        index.add("3", "0xc")
+        
+        assert list(index) == ["1", "3"]
+        assert index.get_stats()["evicted_size"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_expired_entries_hidden_and_swept(self):
+        index = MessageIndex(max_age=0.02)
+        index.add("1", "0xa")
+        
+        await asyncio.sleep(0.05)
+        assert "1" not in index
+        
+        index.add("2", "0xb")
+        assert len(index) == 1
+        assert index.get_stats()["evicted_age"] == 1
+    
+    def test_memory_budget_and_interning(self):
+        index = MessageIndex(max_entries=None, max_age=None, max_bytes=5_000)
+        for number in range(100):
+            index.add(str(number), "".join(["0x", "abc"]))
+        
+        stats = index.get_stats()
+        assert stats["estimated_bytes"] <= 5_000
+        assert stats["evicted_memory"] == 100 - len(index)
+        assert stats["addresses"] == 1
+        assert index["99"] is index[str(100 - len(index))]
+        
+        index.clear()
+        assert index.get_stats()["estimated_bytes"] == 0
+    
+    def test_reverse_lookups(self):
+        index = MessageIndex()
+        index.add("1", "0xa", "room1", "FREE SOL")
+        index.add("2", "0xb", "room1", "free sol ")
+        index.add("3", "0xa", "room2", "hello")
+        index.add("4", "0xc", "room1", "free sol")
+        
+        assert index.messages_from("0xa") == ["1", "3"]
+        assert index.rooms_of("0xa") == ["room1", "room2"]
+        assert index.messages_with("Free Sol") == ["1", "2", "4"]
+        assert index.authors_of("free sol") == ["0xa", "0xb", "0xc"]
+        assert index.room_of("3") == "room2"
+        
+        assert index.forget("0xa") == ["1", "3"]
+        assert index.authors_of("free sol") == ["0xb", "0xc"]
+        assert index.get_stats()["addresses"] == 2
+    
+    def test_postings_evicted_with_entries(self):
+        index = MessageIndex(max_entries=2, max_age=None, max_bytes=None)
+        index.add("1", "0xa", text="spam")
+        index.add("2", "0xb", text="spam")
+        index.add("3", "0xc", text="other")
+        
+        assert index.authors_of("spam") == ["0xb"]
+        assert index.messages_from("0xa") == []
+        assert index.get_stats()["addresses"] == 2
+    
+    @pytest.mark.asyncio
+    async def test_window_stops_at_older_messages(self):
+        index = MessageIndex()
+        index.add("1", "0xa", text="spam")
+        await asyncio.sleep(0.05)
+        index.add("2", "0xb", text="spam")
+        
+        assert index.authors_of("spam", within=0.02) == ["0xb"]
+        assert index.authors_of("spam") == ["0xa", "0xb"]
+
+class TestBanStore:
+    @pytest.mark.asyncio
+    async def test_round_trip(self, tmp_path):
+        store = BanStore(str(tmp_path), flush_delay=0.01)
+        store.record_ban("room", "0xa")
+        store.record_ban("room", "0xb")
+        store.record_unban("room", "0xa")
+        store.record_ban("other/room", "0xc")
+        
+        await asyncio.sleep(0.05)
+        assert store.get_stats()["pending"] == 0
+        assert store.get_stats()["writes"] == 1
+        
+        reloaded = BanStore(str(tmp_path))
+        assert reloaded.banned("room") == {"0xb"}
+        assert reloaded.is_banned("other/room", "0xc")
+        assert not reloaded.is_banned("unknown", "0xc")
+        assert reloaded.get_stats()["rooms_loaded"] == 3
+    
+    @pytest.mark.asyncio
+    async def test_torn_last_line_dropped(self, tmp_path):
+        store = BanStore(str(tmp_path))
+        with open(store.path_for("room"), "w") as file:
+            file.write("+0xa\n+0x")
+        
+        assert store.banned("room") == {"0xa"}
+        assert store.get_stats()["skipped_lines"] == 1
+        
+        store.record_ban("room", "0xb")
+        await store.close()
+        assert BanStore(str(tmp_path)).banned("room") == {"0xa", "0xb"}
+    
+    @pytest.mark.asyncio
+    async def test_compaction(self, tmp_path):
+        store = BanStore(str(tmp_path), compact_min=10)
+        for index in range(10):
+            store.record_ban("room", f"0x{index}")
+            store.record_unban("room", f"0x{index}")
+        store.record_ban("room", "0xkeep")
+        await store.close()
+        
+        assert store.get_stats()["compactions"] == 1
+        with open(store.path_for("room")) as file:
+            assert file.read() == "+0xkeep\n"
+        assert BanStore(str(tmp_path)).banned("room") == {"0xkeep"}
+
+class TestPipeline:
+    @pytest.mark.asyncio
+    async def test_map_concurrent_bounded_and_streamed(self):
+        running = 0
+        peak = 0
+        
+        async def work(delay):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(delay)
+            running -= 1
+            return delay * 100
+        
+        results = [pair async for pair in map_concurrent(work, [0.06, 0.01, 0.02, 0.01], concurrency=2)]
+        
+        assert peak == 2
+        assert [item for item, _ in results] == [0.01, 0.02, 0.01, 0.06]
+        assert dict(results)[0.02] == 2
+    
+    @pytest.mark.asyncio
+    async def test_map_concurrent_error_cancels_rest(self):
+        cancelled = []
+        
+        async def work(item):
+            if item == "bad":
+                raise ValueError(item)
+            try:
+                await asyncio.sleep(1)
+            except asyncio.CancelledError:
+                cancelled.append(item)
+                raise
+        
+        with pytest.raises(ValueError):
+            async for _ in map_concurrent(work, ["slow", "bad"], concurrency=2):
+                pass
+        
+        assert cancelled == ["slow"]
+    
+    @pytest.mark.asyncio
+    async def test_single_flight_merges_calls(self):
+        single_flight = SingleFlight()
+        calls = []
+        
+        async def request():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "done"
+        
+        results = await asyncio.gather(*(single_flight.run("key", request) for _ in range(5)))
+        
+        assert results == ["done"] * 5
+        assert calls == [1]
+        assert single_flight.get_stats() == {"in_flight": 0, "calls": 1, "merged": 4}
+        
+        await single_flight.run("key", request)
+        assert len(calls) == 2
+
+class TestRetryQueue:
+    @staticmethod
+    def policy(max_attempts=3):
+        return ReconnectPolicy(base_delay=0.01, max_delay=0.01, jitter=False, max_attempts=max_attempts,
+                               failure_threshold=None)
+    
+    @pytest.mark.asyncio
+    async def test_retry_after_then_success(self):
+        attempts = []
+        
+        async def send(key, payload):
+            attempts.append(payload)
+            if len(attempts) == 1:
+                raise RetryableError("429", retry_after=0.02)
+            return True
+        
+        queue = RetryQueue(send, self.policy())
+        queue.submit("job", "first", retry_after=0.01)
+        queue.submit("job", "second")
+        
+        await asyncio.sleep(0.1)
+        
+        assert attempts == ["second", "second"]
+        stats = queue.get_stats()
+        assert stats["pending"] == 0
+        assert stats["submitted"] == 1
+        assert stats["succeeded"] == 1
+        assert stats["rate_limited"] == 1
+        await queue.close()
+    
+    @pytest.mark.asyncio
+    async def test_deferral_does_not_use_up_attempts(self):
+        calls = []
+        
+        async def send(key, payload):
+            calls.append(key)
+            if len(calls) <= 4:
+                raise RetryLater(0.005)
+            return True
+        
+        queue = RetryQueue(send, self.policy(max_attempts=2))
+        queue.submit(("ban", "0x1"), "spam")
+        
+        await asyncio.sleep(0.2)
+        
+        assert len(calls) == 5
+        stats = queue.get_stats()
+        assert stats["succeeded"] == 1
+        assert stats["dead_lettered"] == 0
+        assert stats["deferred"] == 4
+        assert stats["retries"] == 1
+        await queue.close()
+    
+    @pytest.mark.asyncio
+    async def test_dead_letter_after_max_attempts(self):
+        send = AsyncMock(side_effect=RetryableError("503"))
+        queue = RetryQueue(send, self.policy(max_attempts=3))
+        queue.submit(("ban", "0x1"), "spam")
+        
+        await asyncio.sleep(0.1)
+        
+        assert send.await_count == 2
+        assert [job.key for job in queue.dead_letters] == [("ban", "0x1")]
+        assert queue.dead_letters[0].last_error == "503"
+        assert queue.get_stats()["dead_lettered"] == 1
+        await queue.close()
+    
+    @pytest.mark.asyncio
+    async def test_cancel_and_permanent_failure(self):
+        send = AsyncMock(return_value=False)
+        queue = RetryQueue(send, self.policy())
+        queue.submit("cancelled")
+        queue.submit("failing")
+        queue.cancel("cancelled")
+        
+        await asyncio.sleep(0.05)
+        
+        send.assert_awaited_once_with("failing", None)
+        assert queue.get_stats()["failed"] == 1
+        await queue.close()
+    
+    @pytest.mark.asyncio
+    async def test_pending_jobs_survive_restart(self, tmp_path):
+        path = str(tmp_path / "retry.json")
+        queue = RetryQueue(policy=ReconnectPolicy(base_delay=60), path=path)
+        queue.submit(("ban", "0x1"), "spam")
+        await queue.close()
+        
+        restored = RetryQueue(AsyncMock(return_value=True), path=path)
+        assert ("ban", "0x1") in restored
+        restored.start()
+        await asyncio.sleep(0.02)
+        
+        restored._send.assert_awaited_once_with(("ban", "0x1"), "spam")
+        await restored.close()
+        assert RetryQueue(path=path).get_stats()["pending"] == 0
+    
+    def test_parse_retry_after(self):
+        assert parse_retry_after("5") == 5.0
+        assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+        assert parse_retry_after("soon") is None
+        assert parse_retry_after(None) is None
+
+class TestDecodeFrame:
+    def test_event_frame(self):
+        frame = decode_frame('42["newMessage",{"id":"1"}]')
+        
+        assert frame.packet_type == "42"
+        assert frame.ack_id is None
+        assert frame.event == "newMessage"
+        assert frame.args == [{"id": "1"}]
+    
+    def test_ack_frame(self):
+        frame = decode_frame('430[{"authenticated":true}]')
+        
+        assert frame.packet_type == "43"
+        assert frame.ack_id == 0
+        assert frame.event is None
+        assert frame.args == [{"authenticated": True}]
+    
+    def test_event_with_ack_id(self):
+        frame = decode_frame('4212["joinRoom",{"roomId":"r"}]')
+        
+        assert frame.ack_id == 12
+        assert frame.event == "joinRoom"
+    
+    def test_transport_frames(self):
+        assert decode_frame("2").packet_type == "2"
+        assert decode_frame("3").packet_type == "3"
+        
+        frame = decode_frame('0{"sid":"abc","pingInterval":25000}')
+        assert frame.packet_type == "0"
+        assert frame.data["pingInterval"] == 25000
+    
+    def test_peek_event(self):
+        assert peek_event('42["newMessage",{"id":"1"}]') == "newMessage"
+        assert peek_event('4212["joinRoom",{}]') == "joinRoom"
+        assert peek_event('430[{"authenticated":true}]') is None
+        assert peek_event('42["odd\\"name",1]') is None
+        assert peek_event("2") is None
+    
+    def test_invalid_json(self):
+        frame = decode_frame('42["newMessage",{broken')
+        
+        assert frame.packet_type == "42"
+        assert frame.event is None
+        assert frame.data is None
+    
+    def test_empty_frame(self):
+        assert decode_frame("").packet_type == ""
+
+
+class TestCodec:
+    @pytest.fixture
+    def stdlib_codec(self):
+        previous = codec.name
+        codec.use("json")
+        yield codec
+        codec.use(previous)
+    
+    def test_compact_output(self):
+        payload = {"roomId": "room", "message": "héllo \"quoted\"", "username": "bot"}
+        
+        assert codec.dumps(payload) == '{"roomId":"room","message":"héllo \\"quoted\\"","username":"bot"}'
+        assert codec.dumps_bytes(payload) == codec.dumps(payload).encode("utf-8")
+    
+    def test_backends_match(self, stdlib_codec):
+        payload = ["sendMessage", {"roomId": "room", "message": "gm 🚀", "username": "bot"}]
+        stdlib_output = codec.dumps(payload)
+        
+        try:
+            codec.use("orjson")
+        except ImportError:
+            pytest.skip("orjson not installed")
+        
+        assert codec.dumps(payload) == stdlib_output
+    
+    def test_loads_accepts_bytes(self, stdlib_codec):
+        assert codec.loads(b'{"a":1}') == {"a": 1}
+        assert codec.loads(memoryview(b'[1,2]')) == [1, 2]
+    
+    def test_unknown_codec(self):
+        with pytest.raises(ValueError):
+            codec.use("pickle")
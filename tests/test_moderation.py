@@ -0,0 +1,191 @@
+import pytest
+import asyncio
+from unittest.mock import AsyncMock
+from pump_self_melon import BanManager, Message, User, Room, Rule, RuleSet, RuleEngine
+from pump_self_melon.core import BanStore, ReconnectPolicy, RetryQueue, RetryableError, TextNormalizer
+
+class TestRuleSet:
+    def test_phrases_found_in_one_pass(self):
+        ruleset = RuleSet.from_lists(phrases=["he", "she", "his", "hers", "scam link"])
+
+        names = [rule.pattern for rule in ruleset.scan("USHERS love a Scam Link")]
+
+        assert names == ["she", "he", "hers", "scam link"]
+        assert ruleset.scan("clean message") == []
+
+    def test_overlapping_phrases_use_failure_links(self):
+        ruleset = RuleSet.from_lists(phrases=["abcd", "bc"])
+
+        assert [rule.pattern for rule in ruleset.scan("xabcx")] == ["bc"]
+
+    def test_regexes_report_every_match(self):
+        ruleset = RuleSet.from_lists(regexes=[r"free \w+", r"\bairdrop\b", r"t\.me/\S+"])
+
+        matches = ruleset.scan("Free SOL airdrop at t.me/scam")
+
+        assert len(matches) == 3
+        assert ruleset.scan("nothing here") == []
+
+    def test_uncombinable_regexes_still_match(self):
+        ruleset = RuleSet.from_lists(regexes=[r"(a)\1", r"zz"])
+
+        assert [rule.pattern for rule in ruleset.scan("baab")] == [r"(a)\1"]
+
+    def test_backreferences_keep_their_groups(self):
+        ruleset = RuleSet.from_lists(regexes=[r"(x)y", r"(a)\1", r"zz"])
+
+        assert [rule.pattern for rule in ruleset.scan("aa")] == [r"(a)\1"]
+        assert [rule.pattern for rule in ruleset.scan("xy zz aa")] == [r"(x)y", r"(a)\1", r"zz"]
+
+    def test_case_sensitive(self):
+        ruleset = RuleSet.from_lists(phrases=["Scam"], case_sensitive=True)
+
+        assert ruleset.scan("scam") == []
+        assert len(ruleset.scan("Scam")) == 1
+
+    def test_normalizer_catches_obfuscation(self):
+        ruleset = RuleSet.from_lists(phrases=["free sol"], normalizer=TextNormalizer())
+
+        assert len(ruleset.scan("FR33 s\u200bo\u043el!!")) == 1
+        assert ruleset.scan("free solana") != []
+
+    def test_regexes_ignore_normalizer(self):
+        ruleset = RuleSet.from_lists(phrases=["free sol"], regexes=[r"free\s+(sol|airdrop)", r"\d{3,}", r"\bfree \w+"],
+                                     normalizer=TextNormalizer())
+
+        assert [rule.pattern for rule in ruleset.scan("FREE airdrop now")] == [r"free\s+(sol|airdrop)", r"\bfree \w+"]
+        assert [rule.pattern for rule in ruleset.scan("send 1000 tokens")] == [r"\d{3,}"]
+        assert len(ruleset.scan("FR33 s\u200bo\u043el")) == 1
+
+    def test_invalid_rule(self):
+        with pytest.raises(ValueError):
+            Rule("x", kind="glob")
+
+class TestRuleEngine:
+    @pytest.mark.asyncio
+    async def test_reload_swaps_rules(self):
+        previous = RuleSet.from_lists(phrases=["old"])
+        engine = RuleEngine(previous)
+
+        ruleset = await engine.reload([Rule("new")])
+
+        assert engine.ruleset is ruleset
+        assert [rule.pattern for rule in previous.scan("old new")] == ["old"]
+        assert [rule.pattern for rule in engine.scan("old new")] == ["new"]
+        assert engine.get_stats()["swaps"] == 1
+
+    @pytest.mark.asyncio
+    async def test_ban_manager_moderate(self):
+        engine = RuleEngine(RuleSet([Rule("scam", reason="No scams"), Rule("meh", action="flag")]))
+        manager = BanManager("token", "room", enabled=True, rules=engine)
+        manager.ban_user = AsyncMock(return_value=True)
+
+        flagged = await manager.moderate(Message("1", "meh", User("u", "0x1"), Room("room")))
+        banned = await manager.moderate(Message("2", "a SCAM", User("u", "0x1"), Room("room")))
+
+        assert [rule.action for rule in flagged] == ["flag"]
+        assert [rule.pattern for rule in banned] == ["scam"]
+        manager.ban_user.assert_awaited_once_with("0x1", "No scams")
+        assert manager.get_stats()["rules"]["matched"] == 2
+
+class TestBulkModeration:
+    @pytest.mark.asyncio
+    async def test_ban_by_text(self):
+        manager = BanManager("token", "room", enabled=True)
+        manager.ban_user = AsyncMock(return_value=True)
+        for index, (address, content) in enumerate([("0x1", "Join t.me/x"), ("0x2", "hi"), ("0x3", "join T.ME/x")]):
+            manager.track_message(Message(str(index), content, User("u", address), Room("room")))
+        
+        results = await manager.ban_by_text("join t.me/x", "Raid")
+        
+        assert results == {"0x1": True, "0x3": True}
+        assert manager.ban_user.await_count == 2
+        assert manager.get_user_activity("0x2") == {"messages": ["1"], "rooms": ["room"]}
+        assert manager.purge_user("0x2") == 1
+        assert manager.get_stats()["tracked_messages"] == 2
+    
+    @pytest.mark.asyncio
+    async def test_warm_start_skips_known_bans(self, tmp_path):
+        store = BanStore(str(tmp_path))
+        store.record_ban("room", "0x1")
+        await store.close()
+        
+        manager = BanManager("token", "room", enabled=True, store=BanStore(str(tmp_path)))
+        manager.has_mod_permissions = True
+        manager._get_session = AsyncMock()
+        
+        assert manager.is_user_banned("0x1")
+        assert await manager.ban_user("0x1")
+        manager._get_session.assert_not_awaited()
+    
+    @pytest.mark.asyncio
+    async def test_ban_many_merges_racing_requests(self):
+        manager = BanManager("token", "room", enabled=True)
+        manager.has_mod_permissions = True
+        posted = []
+        
+        async def post_ban(address, reason):
+            posted.append(address)
+            await asyncio.sleep(0.01)
+            return address != "0xbad"
+        
+        manager._post_ban = post_ban
+        
+        racing = asyncio.gather(manager.ban_user("0x1"), manager.ban_user("0x1"))
+        results = dict([pair async for pair in manager.ban_many(["0x1", "0x2", "0xbad", "0x2"], concurrency=2)])
+        
+        assert await racing == [True, True]
+        assert results == {"0x1": True, "0x2": True, "0xbad": False}
+        assert sorted(posted) == ["0x1", "0x2", "0xbad"]
+        assert manager.get_stats()["requests"]["merged"] == 2
+
+class TestModerationRetries:
+    @pytest.fixture
+    def manager(self):
+        policy = ReconnectPolicy(base_delay=0.01, max_delay=0.01, jitter=False, max_attempts=3,
+                                 failure_threshold=None)
+        manager = BanManager("token", "room", enabled=True, retry_queue=RetryQueue(policy=policy))
+        manager.has_mod_permissions = True
+        return manager
+    
+    @pytest.mark.asyncio
+    async def test_rate_limited_ban_lands_later(self, manager):
+        async def request_ban(address, reason):
+            if manager._request_ban.await_count == 1:
+                raise RetryableError("429", retry_after=0.01)
+            manager.banned_users.add(address)
+            return True
+        
+        manager._request_ban = AsyncMock(side_effect=request_ban)
+        
+        assert not await manager.ban_user("0x1", "spam")
+        await asyncio.sleep(0.05)
+        
+        assert manager.is_user_banned("0x1")
+        assert manager.get_stats()["retries"]["succeeded"] == 1
+        await manager.close()
+    
+    @pytest.mark.asyncio
+    async def test_newer_intent_supersedes_queued_retry(self, manager):
+        manager._request_ban = AsyncMock(side_effect=RetryableError("503", retry_after=60))
+        manager._request_unban = AsyncMock(return_value=True)
+        
+        await manager.ban_user("0x1")
+        assert ("ban", "0x1") in manager.retry_queue
+        
+        await manager.unban_user("0x1")
+        assert len(manager.retry_queue) == 0
+        await manager.close()
+    
+    def test_retryable_statuses(self):
+        class Response:
+            def __init__(self, status, headers=None):
+                self.status = status
+                self.headers = headers or {}
+        
+        with pytest.raises(RetryableError) as error:
+            BanManager._raise_if_retryable(Response(429, {"Retry-After": "3"}), "slow down")
+        assert error.value.retry_after == 3.0
+        with pytest.raises(RetryableError):
+            BanManager._raise_if_retryable(Response(502), "bad gateway")
+        BanManager._raise_if_retryable(Response(403), "forbidden")
@@ -0,0 +1,111 @@
+import pytest
+from unittest.mock import AsyncMock, patch
+from pump_self_melon import Client, ClientPool
+from pump_self_melon.pool import shard_for_room
+
+class TestClientPool:
+    @pytest.fixture
+    def pool(self):
+        return ClientPool(token="test_token", shards=4)
+    
+    def test_invalid_sizes(self):
+        with pytest.raises(ValueError):
+            ClientPool(token="test_token", shards=0)
+    
+    def test_shard_assignment_is_stable(self, pool):
+        rooms = [f"room_{i}" for i in range(100)]
+        assignments = pool.assign_rooms(rooms)
+        
+        assert sum(len(shard_rooms) for shard_rooms in assignments.values()) == 100
+        assert set(assignments) <= {0, 1, 2, 3}
+        for room_id in rooms:
+            assert pool.shard_for(room_id) == shard_for_room(room_id, 4)
+            assert room_id in assignments[pool.room_shards[room_id]]
+    
+    def test_process_count_capped_by_shards(self):
+        pool = ClientPool(token="test_token", shards=2, processes=8)
+        assert pool.process_count == 2
+        assert {pool.process_for(shard_id) for shard_id in range(2)} == {0, 1}
+    
+    @pytest.mark.asyncio
+    async def test_events_merged_from_shards(self, pool):
+        received = []
+        
+        @pool.event
+        async def on_message(message):
+            received.append(message.id)
+        
+        shard_a = Client("test_token")
+        shard_b = Client("test_token")
+        pool._wire(shard_a)
+        pool._wire(shard_b)
+        
+        await shard_a._handle_message('42["newMessage",{"id":"1","message":"a","username":"u","roomId":"room_a"}]')
+        await shard_b._handle_message('42["newMessage",{"id":"2","message":"b","username":"u","roomId":"room_b"}]')
+        
+        assert received == ["1", "2"]
+    
+    @pytest.mark.asyncio
+    async def test_only_handled_events_forwarded(self, pool):
+        shard = Client("test_token")
+        pool._wire(shard)
+        pool.clients[0] = shard
+        frame = '42["newMessage",{"id":"1","message":"a","username":"u","roomId":"room_a"}]'
+        
+        await shard._handle_message(frame)
+        assert shard.frames_skipped == 1
+        
+        received = []
+        
+        @pool.event
+        async def on_message(message):
+            received.append(message.id)
+        
+        await shard._handle_message(frame)
+        assert received == ["1"]
+    
+    @pytest.mark.asyncio
+    async def test_workers_told_only_handled_events(self):
+        pool = ClientPool(token="test_token", shards=2, processes=2)
+        
+        @pool.event
+        async def on_error(error):
+            pass
+        
+        with patch('pump_self_melon.pool.multiprocessing.get_context') as get_context, \
+             patch.object(ClientPool, '_pump_events', new_callable=AsyncMock):
+            await pool._start_processes({0: ["room_a"]}, "bot")
+        
+        event_names = get_context.return_value.Process.call_args.kwargs["args"][4]
+        assert event_names == ["error"]
+    
+    @pytest.mark.asyncio
+    async def test_send_routes_to_owning_shard(self, pool):
+        pool.assign_rooms(["room_a"])
+        shard_id = pool.room_shards["room_a"]
+        shard = Client("test_token")
+        shard.send_message = AsyncMock()
+        pool.clients[shard_id] = shard
+        pool.username = "bot"
+        
+        await pool.send_message("hello", "room_a")
+        
+        shard.send_message.assert_called_once_with("hello", "room_a", "bot")
+    
+    @pytest.mark.asyncio
+    async def test_send_unknown_room(self, pool):
+        with pytest.raises(ValueError):
+            await pool.send_message("hello", "missing_room")
+    
+    @pytest.mark.asyncio
+    async def test_username_fetched_once(self, pool):
+        with patch('pump_self_melon.pool.get_user_info', new_callable=AsyncMock) as mock_info, \
+             patch.object(ClientPool, '_start_local', new_callable=AsyncMock) as mock_start:
+            mock_info.return_value = {"username": "bot"}
+            
+            await pool.start([f"room_{i}" for i in range(20)])
+            
+            mock_info.assert_called_once()
+            assignments, username = mock_start.call_args[0]
+            assert username == "bot"
+            assert sum(len(rooms) for rooms in assignments.values()) == 20